@@ -1,4 +1,43 @@
+"""Command line entry point: ``python -m app <command>``."""
+
+import argparse
+import json
+from pathlib import Path
+
+from .database import session_scope
 from .main import app
+from .migrations import run_migrations
+from .seed_data import DEMO_AUTHORS, DEMO_PLAYS, seed_catalogue
 
 __all__ = ["app"]
 
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("migrate", help="apply pending schema migrations (release step)")
+    seed = commands.add_parser("seed", help="insert missing demo or fixture authors and plays")
+    seed.add_argument(
+        "--fixture",
+        type=Path,
+        help='JSON file {"authors": [...], "plays": [...]} shaped like app/seed_data.py '
+        "(default: the demo data)",
+    )
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        print(f"Schema version {run_migrations()}")
+    elif args.command == "seed":
+        run_migrations()
+        if args.fixture:
+            fixture = json.loads(args.fixture.read_text(encoding="utf-8"))
+            authors, plays = fixture.get("authors", []), fixture.get("plays", [])
+        else:
+            authors, plays = DEMO_AUTHORS, DEMO_PLAYS
+        with session_scope() as session:
+            added_authors, added_plays = seed_catalogue(session, authors, plays)
+        print(f"Added {added_authors} authors and {added_plays} plays")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""Outbox for deleting stored assets outside the admin request.
+
+Handlers call :func:`queue_deletion` before they commit, so the outbox row
+is written in the same transaction as the change that orphaned the asset.
+Assets shared by several rows (see ``app.assets``) are only queued once the
+last reference is gone, and are skipped if they were reused in the meantime.
+A worker thread drains due rows in batches, one bulk delete call per storage
+backend (see ``core.storage``), without holding row locks during the calls;
+failed batches are retried with exponential backoff and rows that keep
+failing are left with status "failed" and the last error.
+"""
+
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlmodel import Session, select
+
+from .assets import DELETING, release_reference
+from .core.asset_cache import asset_cache
+from .core.storage import StorageBackend, storage_for_url
+from .core.config import get_settings
+from .database import engine
+from .document_text import forget_document
+from .images import stored_variant_urls
+from .models import AssetDeletion, StoredAsset
+
+PENDING = "pending"
+FAILED = "failed"
+# Rows per batch (Cloudinary accepts at most 100 ids per bulk delete).
+BATCH_SIZE = 100
+# How long a claimed batch stays with its worker before others may retry it
+CLAIM_LEASE = timedelta(minutes=5)
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+_wake = threading.Event()
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+
+
+def queue_deletion(session: Session, url: Optional[str]) -> None:
+    """Release one reference to a stored asset and, if it was the last,
+    schedule its deletion when ``session`` commits."""
+    if storage_for_url(url) is None:
+        return
+    if not release_reference(session, url):
+        return
+    session.add(AssetDeletion(url=url))
+    if not event.contains(session, "after_commit", _wake_after_commit):
+        event.listen(session, "after_commit", _wake_after_commit, once=True)
+
+
+def _wake_after_commit(_session: Session) -> None:
+    _wake.set()
+
+
+def _retry(row: AssetDeletion, error: str, now: datetime) -> None:
+    row.attempts += 1
+    row.error = error
+    if row.attempts >= settings.asset_deletion_max_attempts:
+        row.status = FAILED
+    else:
+        delay = settings.asset_deletion_backoff_seconds * 2 ** (row.attempts - 1)
+        row.next_attempt_at = now + timedelta(seconds=delay)
+
+
+def drain_once(limit: int = BATCH_SIZE) -> int:
+    """Process one batch of due deletions and return how many rows it held.
+
+    Rows and assets are only locked while the batch is claimed and while the
+    outcome is recorded, not during the remote delete calls: claimed assets
+    are marked ``DELETING`` (so they are no longer shared, see
+    ``assets._revive``) and claimed rows are not due again for CLAIM_LEASE,
+    after which a batch lost with a crashed worker is picked up again.
+    """
+    now = datetime.utcnow()
+    # backend -> url -> deletion row ids (the same asset may be queued twice)
+    batches: Dict[StorageBackend, Dict[str, List[int]]] = defaultdict(lambda: defaultdict(list))
+    # url -> (asset id, variants) for the assets marked DELETING
+    marked: Dict[str, Tuple[int, Optional[List[dict]]]] = {}
+    with Session(engine) as session:
+        rows = session.exec(
+            select(AssetDeletion)
+            .where(AssetDeletion.status == PENDING, AssetDeletion.next_attempt_at <= now)
+            .order_by(AssetDeletion.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        ).all()
+        assets = {
+            asset.url: asset
+            for asset in session.exec(
+                select(StoredAsset)
+                .where(StoredAsset.url.in_({row.url for row in rows}))
+                .with_for_update()
+            )
+        }
+        for row in rows:
+            asset = assets.get(row.url)
+            if asset is not None and asset.ref_count > 0:
+                # Uploaded again since it was queued; keep the asset.
+                session.delete(row)
+                continue
+            backend = storage_for_url(row.url)
+            if backend is None:
+                session.delete(row)
+                continue
+            if asset is not None:
+                asset.ref_count = DELETING
+                session.add(asset)
+                marked[row.url] = (asset.id, asset.variants)
+            row.next_attempt_at = now + CLAIM_LEASE
+            session.add(row)
+            batches[backend][row.url].append(row.id)
+        session.commit()
+
+    outcomes: Dict[StorageBackend, Tuple[Dict[str, bool], Optional[str]]] = {}
+    for backend, by_url in batches.items():
+        try:
+            outcomes[backend] = (backend.delete_many(list(by_url)), None)
+        except Exception as exc:
+            outcomes[backend] = ({}, f"{type(exc).__name__}: {exc}")
+
+    variants: Dict[StorageBackend, Set[str]] = defaultdict(set)
+    with Session(engine) as session:
+        for backend, by_url in batches.items():
+            gone, error = outcomes[backend]
+            for url, row_ids in by_url.items():
+                asset = None
+                if url in marked:
+                    asset = session.exec(
+                        select(StoredAsset)
+                        .where(StoredAsset.id == marked[url][0])
+                        .with_for_update()
+                    ).first()
+                # Still ours unless an upload revived (and repointed) it meanwhile
+                still_marked = (
+                    asset is not None and asset.ref_count == DELETING and asset.url == url
+                )
+                if gone.get(url):
+                    asset_cache.invalidate(url)
+                    forget_document(session, url)
+                    if url in marked:
+                        _collect_variants(variants, marked.pop(url)[1])
+                    if still_marked:
+                        session.delete(asset)
+                    for row_id in row_ids:
+                        row = session.get(AssetDeletion, row_id)
+                        if row is not None:
+                            session.delete(row)
+                    continue
+                if still_marked:
+                    asset.ref_count = 0
+                    session.add(asset)
+                elif asset is not None:
+                    # Repointed meanwhile: its old variants are nobody's now
+                    for variant_url in stored_variant_urls(marked[url][1]):
+                        session.add(AssetDeletion(url=variant_url))
+                for row_id in row_ids:
+                    row = session.get(AssetDeletion, row_id)
+                    if row is None:
+                        continue
+                    _retry(row, error or f"{backend.name}: не е изтрит", now)
+                    row.updated_at = now
+                    session.add(row)
+        session.commit()
+
+    # Stored image variants go once their original is gone (best effort).
+    for backend, urls in variants.items():
+        try:
+            backend.delete_many(sorted(urls))
+        except Exception:
+            logger.exception("Deleting image variants failed")
+    return len(rows)
+
+
+def _collect_variants(
+    variants: Dict[StorageBackend, Set[str]], stored: Optional[List[dict]]
+) -> None:
+    for variant_url in stored_variant_urls(stored):
+        backend = storage_for_url(variant_url)
+        if backend is not None:
+            variants[backend].add(variant_url)
+
+
+def _run() -> None:
+    while not _stop.is_set():
+        try:
+            handled = drain_once()
+        except Exception:
+            logger.exception("Asset deletion batch failed")
+            handled = 0
+        if handled < BATCH_SIZE:
+            # Backlog drained: sleep until the next commit or poll.
+            _wake.wait(settings.asset_deletion_interval_seconds)
+            _wake.clear()
+
+
+def start_deletion_worker() -> None:
+    global _thread
+    if _thread is not None and _thread.is_alive():
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_run, name="asset-deletions", daemon=True)
+    _thread.start()
+
+
+def stop_deletion_worker() -> None:
+    global _thread
+    _stop.set()
+    _wake.set()
+    if _thread is not None:
+        _thread.join(timeout=5)
+        _thread = None
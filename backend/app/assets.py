@@ -0,0 +1,267 @@
+"""Content-addressed bookkeeping for uploaded files.
+
+Every upload is hashed (SHA-256) before anything is sent: background jobs
+while their spool is written, request files from Starlette's spool. When a stored asset with the same hash is still referenced, its URL is
+reused and the transfer is skipped, together with any image variants already
+made for it. ``StoredAsset.ref_count`` counts the rows pointing at each URL; :func:`add_reference` and
+``asset_deletions.queue_deletion`` keep it in step with those rows, inside the
+caller's transaction.
+"""
+
+import hashlib
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from typing import BinaryIO, List, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile, status
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from .core.cloudinary_service import check_upload_size
+from .core.storage import delete_url, get_storage, storage_for_url
+from .database import engine
+from .images import build_variants, stored_variant_urls
+from .models import AssetDeletion, StoredAsset
+from .pdf_preview import describe_pdf
+
+HASH_CHUNK_SIZE = 1024 * 1024
+# ref_count of an asset whose file the deletion worker is removing right now
+DELETING = -1
+
+
+@dataclass(frozen=True)
+class StoredUpload:
+    url: str
+    sha256: str
+    size: int
+    reused: bool  # True when an existing asset was reused and nothing was sent
+    variants: List[dict] = field(default_factory=list)
+    owns_variants: bool = False  # the variants were created by this upload
+    page_count: Optional[int] = None  # PDFs described on upload
+
+
+def copy_with_digest(source: BinaryIO, target: BinaryIO) -> Tuple[str, int]:
+    """Copy ``source`` into ``target``; return the SHA-256 hex digest and size."""
+    digest = hashlib.sha256()
+    size = 0
+    while True:
+        chunk = source.read(HASH_CHUNK_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk)
+        target.write(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def file_digest(handle: BinaryIO) -> Tuple[str, int]:
+    """Return the SHA-256 hex digest and size of ``handle``, rewound afterwards."""
+    digest = hashlib.sha256()
+    size = 0
+    handle.seek(0)
+    while True:
+        chunk = handle.read(HASH_CHUNK_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk)
+        size += len(chunk)
+    handle.seek(0)
+    return digest.hexdigest(), size
+
+
+def find_asset(sha256: str) -> Optional[StoredAsset]:
+    """Look up a live asset by hash (own session, safe from worker threads)."""
+    with Session(engine) as session:
+        return session.exec(
+            select(StoredAsset).where(
+                StoredAsset.sha256 == sha256, StoredAsset.ref_count > 0
+            )
+        ).first()
+
+
+def store_stream(
+    handle: BinaryIO,
+    folder: str,
+    name_prefix: Optional[str] = None,
+    filename: Optional[str] = None,
+    derive_images: bool = False,
+    describe_pdfs: bool = False,
+    digest: Optional[Tuple[str, int]] = None,
+) -> StoredUpload:
+    """Upload ``handle`` unless identical content is already stored.
+
+    With ``derive_images`` the responsive variants of an image are made too;
+    with ``describe_pdfs`` the page count and first-page preview of a PDF.
+    ``digest`` is the (SHA-256, size) of the content when already known;
+    otherwise ``handle`` is read once to compute it.
+    """
+    sha256, size = digest or file_digest(handle)
+    check_upload_size(size)
+    existing = find_asset(sha256)
+    if existing is not None:
+        stored = StoredUpload(
+            existing.url,
+            sha256,
+            size,
+            reused=True,
+            variants=existing.variants or [],
+            page_count=existing.page_count,
+        )
+        backend = storage_for_url(existing.url)
+    else:
+        backend = get_storage()
+        url = backend.upload(handle, folder, name_prefix, filename)
+        handle.seek(0)
+        stored = StoredUpload(url, sha256, size, reused=False)
+    if backend is None or stored.variants:
+        return stored
+    prefix = name_prefix or sha256[:12]
+    if derive_images:
+        variants = build_variants(backend, handle, stored.url, folder, prefix)
+        stored = replace(stored, variants=variants, owns_variants=True)
+    elif describe_pdfs and stored.page_count is None:
+        page_count, variants = describe_pdf(backend, handle, stored.url, folder, prefix)
+        stored = replace(stored, variants=variants, owns_variants=True, page_count=page_count)
+    return stored
+
+
+def store_upload(
+    upload: UploadFile,
+    folder: str,
+    name_prefix: Optional[str] = None,
+    derive_images: bool = False,
+    describe_pdfs: bool = False,
+) -> StoredUpload:
+    return store_stream(
+        upload.file, folder, name_prefix, upload.filename, derive_images, describe_pdfs
+    )
+
+
+def add_reference(session: Session, stored: StoredUpload) -> StoredUpload:
+    """Count one more row using ``stored`` and return the URL/variants to save on it.
+
+    Must run in the transaction that saves the URL. If another request
+    stored the same content first, its URL wins and our copy is deleted.
+    Only live assets (``ref_count > 0``) are shared: one at zero (or
+    ``DELETING``) is queued for deletion, so it is revived only if it still
+    holds our URL and is otherwise pointed at our fresh copy.
+    """
+    now = datetime.utcnow()
+    live = StoredAsset.sha256 == stored.sha256
+    result = session.execute(
+        update(StoredAsset)
+        .where(live, StoredAsset.ref_count > 0)
+        .values(ref_count=StoredAsset.ref_count + 1, updated_at=now)
+    )
+    if result.rowcount == 0 and _revive(session, stored, now):
+        return stored
+    if result.rowcount == 0:
+        if stored.reused:
+            # The asset we meant to reuse was deleted since we looked it up.
+            raise _deleted_meanwhile()
+        try:
+            with session.begin_nested():
+                session.add(
+                    StoredAsset(
+                        sha256=stored.sha256,
+                        url=stored.url,
+                        size=stored.size,
+                        ref_count=1,
+                        variants=stored.variants or None,
+                        page_count=stored.page_count,
+                    )
+                )
+            return stored
+        except IntegrityError:
+            # Someone else stored the same content meanwhile; theirs is live.
+            result = session.execute(
+                update(StoredAsset)
+                .where(live, StoredAsset.ref_count > 0)
+                .values(ref_count=StoredAsset.ref_count + 1, updated_at=now)
+            )
+            if result.rowcount == 0:
+                raise _deleted_meanwhile()
+    asset = session.exec(select(StoredAsset).where(live)).one()
+    if stored.owns_variants:
+        if not asset.variants and asset.url == stored.url:
+            asset.variants = stored.variants
+            asset.page_count = asset.page_count or stored.page_count
+            session.add(asset)
+        else:
+            for url in stored_variant_urls(stored.variants):
+                delete_url(url)
+    if asset.url != stored.url and not stored.reused:
+        delete_url(stored.url)
+    return replace(
+        stored,
+        url=asset.url,
+        variants=asset.variants or [],
+        page_count=asset.page_count or stored.page_count,
+    )
+
+
+def _deleted_meanwhile() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Файлът беше изтрит междувременно, опитайте отново.",
+    )
+
+
+def _revive(session: Session, stored: StoredUpload, now: datetime) -> bool:
+    """Take over an unreferenced asset row with our hash, if there is one.
+
+    Its deletion is already queued by URL, so if it holds another URL the
+    row is pointed at ``stored`` and its old variants are queued as well;
+    the deletion worker skips rows that are referenced again. While the
+    worker is removing the file (``DELETING``) it also removes the old
+    variants, and our URL must differ from the one going away.
+    """
+    dead = session.exec(
+        select(StoredAsset)
+        .where(StoredAsset.sha256 == stored.sha256, StoredAsset.ref_count <= 0)
+        .with_for_update()
+    ).first()
+    if dead is None:
+        return False
+    if dead.ref_count == DELETING and dead.url == stored.url:
+        raise _deleted_meanwhile()
+    if dead.url != stored.url:
+        if dead.ref_count != DELETING:
+            for url in stored_variant_urls(dead.variants):
+                session.add(AssetDeletion(url=url))
+        dead.url = stored.url
+        dead.size = stored.size
+        dead.variants = stored.variants or None
+        dead.page_count = stored.page_count
+    dead.ref_count = 1
+    dead.updated_at = now
+    session.add(dead)
+    return True
+
+
+def release_reference(session: Session, url: str) -> bool:
+    """Drop one reference to ``url``; return True when nothing uses it any more.
+
+    URLs without an asset row (uploaded before deduplication) are treated
+    as having a single reference.
+    """
+    asset = session.exec(select(StoredAsset).where(StoredAsset.url == url)).first()
+    if asset is None:
+        return True
+    session.execute(
+        update(StoredAsset)
+        .where(StoredAsset.id == asset.id, StoredAsset.ref_count > 0)
+        .values(ref_count=StoredAsset.ref_count - 1, updated_at=datetime.utcnow())
+    )
+    session.refresh(asset)
+    return asset.ref_count <= 0
+
+
+def discard_upload(stored: StoredUpload) -> None:
+    """Remove a fresh upload whose database write failed."""
+    if stored.owns_variants:
+        for url in stored_variant_urls(stored.variants):
+            delete_url(url)
+    if not stored.reused:
+        delete_url(stored.url)
@@ -0,0 +1,44 @@
+"""Helpers for committing catalogue writes made outside the public routers."""
+
+from typing import Iterable, Set
+
+from sqlmodel import Session
+
+from .http_cache import commit_catalogue_change
+from .models import Author, LiteraryPiece, Play
+from .response_cache import response_cache
+
+
+def commit_change(session: Session, tags: Iterable[str]) -> None:
+    """Commit a catalogue write and drop cached public responses that embed it."""
+    version = commit_catalogue_change(session)
+    response_cache.invalidate(tags, version)
+
+
+def author_tags(author: Author) -> Set[str]:
+    # Pieces embed their play with its author, so pieces of the author's
+    # plays change too, whoever wrote the piece.
+    return {
+        "authors",
+        "plays",
+        "library",
+        f"author:{author.id}",
+        *(f"play:{play.id}" for play in author.plays),
+        *(f"piece:{piece.id}" for piece in author.literary_pieces),
+        *(f"piece:{piece.id}" for play in author.plays for piece in play.literary_pieces),
+    }
+
+
+def play_tags(play: Play, *author_ids: int) -> Set[str]:
+    return {
+        "plays",
+        "library",
+        f"play:{play.id}",
+        f"author:{play.author_id}",
+        *(f"author:{author_id}" for author_id in author_ids),
+        *(f"piece:{piece.id}" for piece in play.literary_pieces),
+    }
+
+
+def piece_tags(piece: LiteraryPiece) -> Set[str]:
+    return {"library", f"piece:{piece.id}"}
@@ -0,0 +1,158 @@
+"""Size-bounded on-disk cache for proxied upstream (Cloudinary) assets.
+
+Files live under ``asset_cache_root`` (never under the public media mount)
+named by the SHA-256 of their URL, with a small JSON sidecar holding the
+content type. Entries are written to a temp file and renamed into place,
+so readers never see a partial file. A file's mtime is its last use, which
+drives LRU eviction. The directory is shared by all workers; hit/miss counters are per worker.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from threading import Lock
+from typing import BinaryIO, Dict, Optional, Tuple
+
+from .config import get_settings
+
+
+@dataclass
+class CachedAsset:
+    path: Path
+    content_type: str
+    size: int
+
+
+@dataclass
+class AssetCacheStats:
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+    bytes_saved: int = 0
+
+
+@dataclass
+class DiskAssetCache:
+    directory: Path
+    max_bytes: int
+    stats: AssetCacheStats = field(default_factory=AssetCacheStats)
+    _size: Optional[int] = None
+    _lock: Lock = field(default_factory=Lock)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def path_for(self, url: str) -> Path:
+        return self.directory / hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def lookup(self, url: str) -> Optional[CachedAsset]:
+        """Return the cached copy of ``url`` and mark it as recently used."""
+        if not self.enabled:
+            return None
+        path = self.path_for(url)
+        try:
+            size = path.stat().st_size
+            meta = json.loads(path.with_suffix(".json").read_text())
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.stats.misses += 1
+            return None
+        with self._lock:
+            self.stats.hits += 1
+            self.stats.bytes_saved += size
+        return CachedAsset(path, meta.get("content_type", "application/octet-stream"), size)
+
+    def temp_file(self) -> Tuple[BinaryIO, Path]:
+        """Open a spool file inside the cache directory (same filesystem)."""
+        fd, name = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        return os.fdopen(fd, "wb"), Path(name)
+
+    def publish(self, url: str, tmp_path: Path, content_type: str) -> None:
+        """Atomically move a completely written spool file into the cache."""
+        size = tmp_path.stat().st_size
+        if not self.enabled or size > self.max_bytes:
+            tmp_path.unlink(missing_ok=True)
+            return
+        path = self.path_for(url)
+        path.with_suffix(".json").write_text(json.dumps({"content_type": content_type}))
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.stats.stores += 1
+            self._size = self._scan_size() if self._size is None else self._size + size
+            over_budget = self._size > self.max_bytes
+        if over_budget:
+            self.evict()
+
+    def invalidate(self, url: str) -> None:
+        """Drop the cached copy of ``url`` (after delete or re-upload)."""
+        if not self.enabled:
+            return
+        path = self.path_for(url)
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except OSError:
+            return
+        path.with_suffix(".json").unlink(missing_ok=True)
+        with self._lock:
+            self.stats.invalidations += 1
+            if self._size is not None:
+                self._size -= size
+
+    def evict(self) -> None:
+        """Remove least recently used entries until the cache fits its budget."""
+        entries = []
+        for path in self.directory.iterdir():
+            if path.suffix:
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            path.with_suffix(".json").unlink(missing_ok=True)
+            total -= size
+            evicted += 1
+        with self._lock:
+            self._size = total
+            self.stats.evictions += evicted
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.stats.hits + self.stats.misses
+            return {
+                **self.stats.__dict__,
+                "bytes": self._size if self._size is not None else self._scan_size(),
+                "max_bytes": self.max_bytes,
+                "hit_ratio": round(self.stats.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def _scan_size(self) -> int:
+        return sum(
+            path.stat().st_size for path in self.directory.iterdir() if not path.suffix
+        )
+
+
+settings = get_settings()
+asset_cache = DiskAssetCache(
+    directory=settings.asset_cache_root,
+    max_bytes=settings.asset_cache_max_bytes,
+)
+asset_cache.directory.mkdir(parents=True, exist_ok=True)
+# Earlier releases kept the cache under media_root, where /media served it
+shutil.rmtree(settings.media_root / "asset-cache", ignore_errors=True)
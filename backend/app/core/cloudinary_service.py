@@ -1,14 +1,22 @@
 """Cloudinary service for file uploads and management."""
 
+import os
+import uuid
+from functools import lru_cache
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
 import cloudinary
+import cloudinary.api
 import cloudinary.uploader
-from fastapi import UploadFile
+from fastapi import HTTPException, UploadFile, status
 
+from .asset_cache import asset_cache
 from .config import get_settings
 
 
+@lru_cache
 def init_cloudinary() -> None:
-    """Initialize Cloudinary with settings from environment."""
+    """Initialize Cloudinary with settings from environment (once per process)."""
     settings = get_settings()
     cloudinary.config(
         cloud_name=settings.cloudinary_cloud_name,
@@ -18,27 +26,54 @@ def init_cloudinary() -> None:
     )
 
 
-def upload_file(
-    upload: UploadFile, folder: str, name_prefix: str | None = None
+class _BorrowedFile:
+    """File proxy whose ``with`` block does not close the underlying upload."""
+
+    def __init__(self, handle: BinaryIO) -> None:
+        self._handle = handle
+
+    def __getattr__(self, name: str):
+        return getattr(self._handle, name)
+
+    def __enter__(self) -> "_BorrowedFile":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+
+def upload_size(upload: UploadFile) -> int:
+    """Return the size of a spooled upload without reading it."""
+    upload.file.seek(0, os.SEEK_END)
+    size = upload.file.tell()
+    upload.file.seek(0)
+    return size
+
+
+def check_upload_size(size: int) -> None:
+    """Reject files above the configured upload limit with 413."""
+    if size > get_settings().max_upload_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="Файлът е твърде голям.",
+        )
+
+
+def upload_stream(
+    handle: BinaryIO,
+    folder: str,
+    name_prefix: str | None = None,
+    filename: str | None = None,
 ) -> str:
-    """Upload a file to Cloudinary and return the secure URL.
-    
-    Args:
-        upload: The uploaded file
-        folder: Cloudinary folder to organize files (e.g., 'authors', 'plays', 'pdfs')
-        name_prefix: Optional prefix for the public_id (e.g., 'author-1')
-    
-    Returns:
-        The secure URL of the uploaded file
+    """Upload an open binary file to Cloudinary and return the secure URL.
+
+    The file is sent with Cloudinary's chunked upload API, so at most
+    ``upload_chunk_size`` bytes of it are held in memory at a time. The
+    handle is left open.
     """
     init_cloudinary()
     
-    # Read file content
-    file_content = upload.file.read()
-    upload.file.seek(0)  # Reset file pointer for potential reuse
-    
     # Generate public_id with unique identifier to avoid overwrites
-    import uuid
     unique_id = uuid.uuid4().hex[:8]  # Short unique ID
     if name_prefix:
         public_id = f"{name_prefix}-{unique_id}"
@@ -47,71 +82,114 @@ def upload_file(
     
     # Upload to Cloudinary (folder is set separately, public_id is just the name)
     # Set access_mode to "public" to ensure files are accessible
-    result = cloudinary.uploader.upload(
-        file_content,
+    result = cloudinary.uploader.upload_large(
+        _BorrowedFile(handle),
         folder=folder,
         public_id=public_id,
+        filename=filename or public_id,
+        chunk_size=get_settings().upload_chunk_size,
         resource_type="auto",  # Auto-detect image, video, or raw (for PDFs)
         access_mode="public",  # Make files publicly accessible
     )
-    
     return result["secure_url"]
 
 
-def delete_file(url: str) -> None:
-    """Delete a file from Cloudinary by its URL.
+def upload_file(
+    upload: UploadFile, folder: str, name_prefix: str | None = None
+) -> str:
+    """Upload a file to Cloudinary and return the secure URL.
     
     Args:
-        url: The Cloudinary secure URL of the file to delete
+        upload: The uploaded file
+        folder: Cloudinary folder to organize files (e.g., 'authors', 'plays', 'pdfs')
+        name_prefix: Optional prefix for the public_id (e.g., 'author-1')
+    
+    Returns:
+        The secure URL of the uploaded file
+    """
+    check_upload_size(upload_size(upload))
+    url = upload_stream(upload.file, folder, name_prefix, upload.filename)
+    upload.file.seek(0)  # Reset file pointer for potential reuse
+    return url
+
+
+def cloudinary_public_id(url: str) -> Optional[Tuple[str, str]]:
+    """Return ``(public_id, resource_type)`` for a Cloudinary URL, else ``None``.
+
+    URL format: https://res.cloudinary.com/{cloud_name}/{resource_type}/upload/{version}/{folder}/{public_id}.{format}
+    or: https://res.cloudinary.com/{cloud_name}/{resource_type}/upload/{version}/{public_id}.{format}
     """
     if not url or not url.startswith("https://res.cloudinary.com"):
+        return None
+    parts = url.split("/upload/")
+    if len(parts) < 2:
+        return None
+
+    # Get the part after /upload/
+    path_part = parts[1]
+
+    # Remove version if present (format: v1234567890/)
+    if "/" in path_part:
+        path_parts = path_part.split("/", 1)
+        if path_parts[0].startswith("v") and len(path_parts[0]) > 1 and path_parts[0][1:].isdigit():
+            # Version found, use the rest
+            public_id_with_ext = path_parts[1]
+        else:
+            # No version, use the whole path
+            public_id_with_ext = path_part
+    else:
+        public_id_with_ext = path_part
+
+    # Remove file extension to get public_id (which may include folder)
+    if "." in public_id_with_ext:
+        public_id = public_id_with_ext.rsplit(".", 1)[0]
+    else:
+        public_id = public_id_with_ext
+
+    # Determine resource type from URL
+    if "/image/" in url:
+        resource_type = "image"
+    elif "/video/" in url:
+        resource_type = "video"
+    elif "/raw/" in url or url.endswith(".pdf"):
+        resource_type = "raw"
+    else:
+        resource_type = "image"
+    return public_id, resource_type
+
+
+def delete_resources(public_ids: List[str], resource_type: str) -> Dict[str, str]:
+    """Delete up to 100 assets of one resource type in a single API call.
+
+    Returns Cloudinary's per-id outcome ("deleted", "not_found", ...).
+    Errors are raised so the caller can retry.
+    """
+    init_cloudinary()
+    result = cloudinary.api.delete_resources(public_ids, resource_type=resource_type)
+    return result.get("deleted", {})
+
+
+def delete_file(url: str) -> None:
+    """Delete a file from Cloudinary by its URL, right away.
+
+    Request handlers queue deletions through ``app.asset_deletions`` instead.
+
+    Args:
+        url: The Cloudinary secure URL of the file to delete
+    """
+    if url:
+        # Drop any locally cached copy served by the download proxy
+        asset_cache.invalidate(url)
+
+    target = cloudinary_public_id(url)
+    if target is None:
         # Not a Cloudinary URL, skip deletion
         return
-    
+
     init_cloudinary()
-    
+    public_id, resource_type = target
     try:
-        # Extract public_id from URL
-        # URL format: https://res.cloudinary.com/{cloud_name}/{resource_type}/upload/{version}/{folder}/{public_id}.{format}
-        # or: https://res.cloudinary.com/{cloud_name}/{resource_type}/upload/{version}/{public_id}.{format}
-        parts = url.split("/upload/")
-        if len(parts) < 2:
-            return
-        
-        # Get the part after /upload/
-        path_part = parts[1]
-        
-        # Remove version if present (format: v1234567890/)
-        if "/" in path_part:
-            path_parts = path_part.split("/", 1)
-            if path_parts[0].startswith("v") and len(path_parts[0]) > 1 and path_parts[0][1:].isdigit():
-                # Version found, use the rest
-                public_id_with_ext = path_parts[1]
-            else:
-                # No version, use the whole path
-                public_id_with_ext = path_part
-        else:
-            public_id_with_ext = path_part
-        
-        # Remove file extension to get public_id (which may include folder)
-        if "." in public_id_with_ext:
-            public_id = public_id_with_ext.rsplit(".", 1)[0]
-        else:
-            public_id = public_id_with_ext
-        
-        # Determine resource type from URL
-        if "/image/" in url:
-            resource_type = "image"
-        elif "/video/" in url:
-            resource_type = "video"
-        elif "/raw/" in url or url.endswith(".pdf"):
-            resource_type = "raw"
-        else:
-            resource_type = "auto"
-        
-        # Delete from Cloudinary
         cloudinary.uploader.destroy(public_id, resource_type=resource_type)
     except Exception:
         # Silently fail if deletion doesn't work (file might not exist or URL format is unexpected)
         pass
-
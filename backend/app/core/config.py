@@ -3,7 +3,7 @@
 import json
 from functools import lru_cache
 from pathlib import Path
-from typing import List, Literal, Union
+from typing import Dict, List, Literal, Optional, Union
 
 from pydantic import BaseSettings, Field, validator
 
@@ -31,6 +31,36 @@ class Settings(BaseSettings):
     database_url: str = Field(
         default="postgresql+psycopg2://postgres:postgres@db:5432/bgpiesa"
     )
+    # Connection pool (ignored for SQLite). Each app worker process has its
+    # own pool, so the database sees up to workers * (size + overflow)
+    # connections; keep size + overflow near the threadpool size (40 by
+    # default) so sync handlers don't queue on checkout.
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0  # seconds to wait for a free connection
+    db_pool_recycle: int = 1800  # seconds; reconnect before the server drops us
+    db_pool_pre_ping: bool = True  # detect connections killed by a DB restart
+    db_statement_timeout_ms: Optional[int] = None  # Postgres statement_timeout
+    # asyncio URL for the public read endpoints; derived from database_url
+    # (psycopg2 -> asyncpg, sqlite -> aiosqlite) when unset
+    async_database_url: Optional[str] = None
+    # Read replicas for the public GET endpoints, comma-separated (the async
+    # driver is derived as above). Admin routes, uploads and background
+    # workers always use database_url. A replica that fails to connect is
+    # skipped for db_replica_retry_seconds and reads fall back to the primary.
+    database_read_url: Optional[str] = None
+    db_replica_connect_timeout_seconds: float = 2.0
+    db_replica_retry_seconds: float = 30.0
+    # Apply pending schema migrations at startup. Turn off when
+    # `python -m app migrate` runs as a release step; workers then only
+    # check that the schema is current.
+    run_migrations_on_startup: bool = True
+    # Insert the missing demo authors/plays at startup; turn off in production
+    # and use `python -m app seed` when needed
+    seed_demo_data_on_startup: bool = True
+    # Report each request's statement count and DB time in the X-DB-Queries
+    # and Server-Timing response headers
+    db_timing_headers: bool = True
     # Required; read from ADMIN_PASSWORD env var (or .env)
     admin_password: str = Field(..., env="ADMIN_PASSWORD")
     # Required; read from JWT_SECRET env var (or .env)
@@ -39,11 +69,81 @@ class Settings(BaseSettings):
     access_token_expire_minutes: int = 60 * 12
     media_root: Path = Field(default=Path("media").resolve())
     media_url_prefix: str = "/media"
+    # How long total counts for paginated list endpoints are cached
+    count_cache_seconds: int = 60
+    # Cache-Control for public catalogue reads; browsers revalidate with the
+    # ETag, a CDN may serve its copy for s-maxage seconds
+    catalogue_cache_control: str = "public, max-age=0, s-maxage=60, stale-while-revalidate=300"
+    # In-process cache of serialized catalogue responses (0 entries disables it)
+    response_cache_max_entries: int = 512
+    response_cache_max_bytes: int = 32 * 1024 * 1024
+    response_cache_ttl_seconds: float = 30.0
+    # Pooled HTTP client used to proxy upstream (Cloudinary) downloads
+    upstream_http2: bool = True
+    upstream_max_connections: int = 100
+    upstream_max_keepalive_connections: int = 50
+    upstream_keepalive_expiry_seconds: float = 30.0
+    upstream_connect_timeout_seconds: float = 5.0
+    upstream_timeout_seconds: float = 30.0
+    # On-disk cache of proxied upstream files (0 disables it); must not be
+    # under media_root, which is served publicly
+    asset_cache_root: Path = Field(default=Path("asset-cache").resolve())
+    asset_cache_max_bytes: int = 512 * 1024 * 1024
+    # Uploads: request bodies above max_upload_bytes are rejected with 413 before
+    # they are read; accepted files go to Cloudinary in upload_chunk_size parts
+    # (Cloudinary requires at least 5 MB per part)
+    max_upload_bytes: int = 50 * 1024 * 1024
+    upload_chunk_size: int = 6 * 1024 * 1024
+    # Gallery batch uploads: files per request, request body cap, parallel uploads
+    max_batch_files: int = 50
+    max_batch_upload_bytes: int = 500 * 1024 * 1024
+    upload_batch_concurrency: int = 4
+    # Background upload jobs (?background=true on the admin upload routes)
+    upload_workers: int = 2
+    upload_job_max_attempts: int = 4
+    upload_job_backoff_seconds: float = 2.0
+    # Spooled files waiting for a worker; like asset_cache_root, must not be
+    # under media_root
+    upload_spool_root: Path = Field(default=Path("upload-spool").resolve())
+    # Responsive derivatives of uploaded play images and author photos:
+    # name -> maximum width in px, and the formats each one is encoded in
+    image_variant_widths: Dict[str, int] = {"thumb": 160, "card": 480, "full": 1280}
+    image_variant_formats: List[Literal["webp", "avif"]] = ["webp"]
+    # Width in px of the first-page preview made for uploaded play/library PDFs
+    pdf_preview_width: int = 480
+    # Outbox worker for deleting replaced/removed Cloudinary assets
+    asset_deletion_interval_seconds: float = 5.0
+    asset_deletion_max_attempts: int = 8
+    asset_deletion_backoff_seconds: float = 10.0
+    # Background text extraction of uploaded PDFs for script search
+    text_index_interval_seconds: float = 5.0
+    text_index_max_attempts: int = 5
+    text_index_backoff_seconds: float = 30.0
+    # Where new uploads go: "cloudinary", "local" (media_root/local_storage_dir,
+    # served under media_url_prefix) or "s3" (any S3-compatible service; needs
+    # boto3). Files already stored elsewhere keep being served and deleted.
+    storage_backend: Literal["cloudinary", "local", "s3"] = "cloudinary"
+    local_storage_dir: str = "uploads"
+    s3_bucket: Optional[str] = None
+    s3_endpoint_url: Optional[str] = None
+    s3_region: Optional[str] = None
+    s3_access_key_id: Optional[str] = None
+    s3_secret_access_key: Optional[str] = None
+    # Public base URL of the bucket (CDN or endpoint/bucket); defaults to the latter
+    s3_public_base_url: Optional[str] = None
     # Cloudinary configuration
     cloudinary_cloud_name: str = Field(..., env="CLOUDINARY_CLOUD_NAME")
     cloudinary_api_key: str = Field(..., env="CLOUDINARY_API_KEY")
     cloudinary_api_secret: str = Field(..., env="CLOUDINARY_API_SECRET")
 
+    @validator("asset_cache_root", "upload_spool_root")
+    def outside_media_root(cls, v: Path, values: dict) -> Path:
+        media_root = values.get("media_root")
+        v = v.resolve()
+        if media_root is not None and v.is_relative_to(media_root.resolve()):
+            raise ValueError(f"must not be under media_root ({media_root}), which is served publicly")
+        return v
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -0,0 +1,328 @@
+"""Streaming file delivery with HTTP Range support.
+
+Used by the download endpoints for both remote (Cloudinary, S3) files, which
+are proxied chunk by chunk, and files on local disk (the local storage
+backend and legacy files under ``media_root``).
+"""
+
+import asyncio
+import hashlib
+import mimetypes
+from email.utils import formatdate
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Dict, Iterator, Optional, Tuple
+
+import httpx
+from fastapi import HTTPException, Request, status
+from fastapi.responses import FileResponse, RedirectResponse, Response, StreamingResponse
+
+from .asset_cache import asset_cache
+from .http_client import get_http_client
+from .storage import storage_for_url
+
+CHUNK_SIZE = 64 * 1024
+
+# Bodies are relayed byte for byte, so never let httpx decode a compressed
+# body behind a passed-through Content-Length.
+UPSTREAM_REQUEST_HEADERS = {"accept-encoding": "identity"}
+# Request headers forwarded upstream so the origin can answer ranges itself.
+FORWARDED_REQUEST_HEADERS = ("range", "if-range", "if-none-match", "if-modified-since")
+# Upstream response headers passed through to the client.
+PASSTHROUGH_RESPONSE_HEADERS = (
+    "content-length",
+    "content-range",
+    "accept-ranges",
+    "etag",
+    "last-modified",
+)
+
+
+def _inline_disposition(filename: str) -> str:
+    return f'inline; filename="{filename}"'
+
+
+def _passthrough_headers(upstream_headers: httpx.Headers, filename: str) -> Dict[str, str]:
+    headers = {
+        name: upstream_headers[name]
+        for name in PASSTHROUGH_RESPONSE_HEADERS
+        if name in upstream_headers
+    }
+    headers.setdefault("accept-ranges", "bytes")
+    headers["content-disposition"] = _inline_disposition(filename)
+    return headers
+
+
+def _content_type(upstream: httpx.Response, media_type: Optional[str]) -> str:
+    return media_type or upstream.headers.get(
+        "content-type", "application/octet-stream"
+    ).split(";")[0]
+
+
+class _SharedTransfer:
+    """One upstream fetch whose body is spooled to disk and tailed by readers.
+
+    The fetch runs as its own task, so it keeps going when the client that
+    started it disconnects. Every reader opens the spool file before the
+    transfer can finish; on POSIX the open handle stays valid after the
+    file is moved into the asset cache or unlinked.
+    """
+
+    def __init__(self, url: str, media_type: Optional[str]) -> None:
+        self.url = url
+        self.media_type = media_type
+        self.status_code = 502
+        self.content_type = "application/octet-stream"
+        self.upstream_headers: Optional[httpx.Headers] = None
+        self.size = 0
+        self.done = False
+        self.failed = False
+        self.ready = asyncio.Event()
+        self._changed = asyncio.Condition()
+        self._handle, self.path = asset_cache.temp_file()
+        self.task = asyncio.create_task(self._run())
+
+    async def _notify(self) -> None:
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def _run(self) -> None:
+        complete = False
+        try:
+            client = get_http_client()
+            proxy_stats["upstream_fetches"] += 1
+            upstream = await client.send(
+                client.build_request("GET", self.url, headers=UPSTREAM_REQUEST_HEADERS),
+                stream=True,
+            )
+            try:
+                self.status_code = upstream.status_code
+                self.upstream_headers = upstream.headers
+                self.content_type = _content_type(upstream, self.media_type)
+                self.ready.set()
+                if upstream.status_code != 200:
+                    return
+                async for chunk in upstream.aiter_bytes(CHUNK_SIZE):
+                    self._handle.write(chunk)
+                    self._handle.flush()
+                    self.size += len(chunk)
+                    await self._notify()
+                complete = True
+            finally:
+                await upstream.aclose()
+        except httpx.HTTPError:
+            pass
+        finally:
+            self._handle.close()
+            _inflight.pop(self.url, None)
+            self.failed = not complete
+            self.done = True
+            self.ready.set()
+            if complete:
+                asset_cache.publish(self.url, self.path, self.content_type)
+            else:
+                self.path.unlink(missing_ok=True)
+            await self._notify()
+
+    async def follow(self, handle: BinaryIO) -> AsyncIterator[bytes]:
+        """Yield the body as it lands on disk, until the transfer ends."""
+        position = 0
+        try:
+            while True:
+                chunk = handle.read(CHUNK_SIZE)
+                if chunk:
+                    position += len(chunk)
+                    yield chunk
+                    continue
+                if self.done:
+                    if self.failed:
+                        raise RuntimeError(f"Upstream transfer of {self.url} failed")
+                    return
+                async with self._changed:
+                    await self._changed.wait_for(lambda: self.done or self.size > position)
+        finally:
+            handle.close()
+
+
+_inflight: Dict[str, _SharedTransfer] = {}
+proxy_stats = {"upstream_fetches": 0, "coalesced": 0}
+
+
+async def proxy_remote_file(
+    url: str,
+    request: Request,
+    filename: str,
+    media_type: Optional[str] = None,
+) -> Response:
+    """Stream ``url`` to the client without buffering the whole file.
+
+    Files already in the disk cache are served locally. Concurrent plain
+    GETs for the same URL share a single upstream transfer, which also
+    fills the cache. Range and conditional requests are forwarded upstream
+    as-is, so 206/304/416 answers reach the browser unchanged. If the
+    origin cannot be reached the client is redirected to it instead.
+    """
+    cached = asset_cache.lookup(url)
+    if cached is not None:
+        return local_file_response(
+            cached.path, request, media_type or cached.content_type, filename
+        )
+    if any(name in request.headers for name in FORWARDED_REQUEST_HEADERS):
+        return await _proxy_direct(url, request, filename, media_type)
+
+    transfer = _inflight.get(url)
+    if transfer is None:
+        transfer = _inflight[url] = _SharedTransfer(url, media_type)
+    else:
+        proxy_stats["coalesced"] += 1
+    # Open before the first await so the spool file cannot be moved away first.
+    handle = open(transfer.path, "rb")
+    await transfer.ready.wait()
+    if transfer.status_code != 200 or transfer.upstream_headers is None:
+        handle.close()
+        return RedirectResponse(url=url, status_code=302)
+    return StreamingResponse(
+        transfer.follow(handle),
+        media_type=transfer.content_type,
+        headers=_passthrough_headers(transfer.upstream_headers, filename),
+    )
+
+
+async def _proxy_direct(
+    url: str, request: Request, filename: str, media_type: Optional[str]
+) -> Response:
+    """Forward a Range/conditional request upstream and stream the answer."""
+    headers = {
+        name: request.headers[name]
+        for name in FORWARDED_REQUEST_HEADERS
+        if name in request.headers
+    }
+    headers.update(UPSTREAM_REQUEST_HEADERS)
+    client = get_http_client()
+    try:
+        proxy_stats["upstream_fetches"] += 1
+        upstream = await client.send(
+            client.build_request("GET", url, headers=headers), stream=True
+        )
+    except httpx.HTTPError:
+        return RedirectResponse(url=url, status_code=302)
+    if upstream.status_code >= 400 and upstream.status_code != 416:
+        await upstream.aclose()
+        return RedirectResponse(url=url, status_code=302)
+
+    async def body() -> AsyncIterator[bytes]:
+        try:
+            async for chunk in upstream.aiter_bytes(CHUNK_SIZE):
+                yield chunk
+        finally:
+            await upstream.aclose()
+
+    return StreamingResponse(
+        body(),
+        status_code=upstream.status_code,
+        media_type=_content_type(upstream, media_type),
+        headers=_passthrough_headers(upstream.headers, filename),
+    )
+
+
+async def serve_stored_file(
+    url: str,
+    request: Request,
+    filename: str,
+    media_type: Optional[str] = None,
+) -> Response:
+    """Serve an uploaded file from whichever storage backend holds it.
+
+    Files on local disk are sent directly; anything else is proxied.
+    """
+    backend = storage_for_url(url)
+    path = backend.local_path(url) if backend is not None else None
+    if path is None:
+        return await proxy_remote_file(url, request, filename, media_type)
+    if not path.is_file():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Файлът липсва.")
+    return local_file_response(
+        path,
+        request,
+        media_type or mimetypes.guess_type(path.name)[0] or "application/octet-stream",
+        filename,
+    )
+
+
+def _file_validators(path: Path) -> Tuple[str, str]:
+    stat = path.stat()
+    etag = hashlib.md5(f"{stat.st_mtime}-{stat.st_size}".encode()).hexdigest()
+    return f'"{etag}"', formatdate(stat.st_mtime, usegmt=True)
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single ``bytes=`` range into inclusive offsets.
+
+    Returns ``None`` when the header should be ignored (unknown unit,
+    malformed or multiple ranges) and raises 416 when it cannot be satisfied.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = spec.strip().partition("-")
+    if not dash:
+        return None
+    try:
+        if first == "":
+            length = int(last)
+            start, end = max(size - length, 0), size - 1
+            satisfiable = length > 0 and size > 0
+        else:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+            satisfiable = start < size and start <= end
+    except ValueError:
+        return None
+    if not satisfiable:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Невалиден диапазон.",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+
+def _read_range(path: Path, start: int, end: int) -> Iterator[bytes]:
+    with path.open("rb") as handle:
+        handle.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = handle.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def local_file_response(
+    path: Path, request: Request, media_type: str, filename: Optional[str] = None
+) -> Response:
+    """Serve a local file, answering single byte ranges with 206."""
+    filename = filename or path.name
+    etag, last_modified = _file_validators(path)
+    headers: Dict[str, str] = {
+        "accept-ranges": "bytes",
+        "etag": etag,
+        "last-modified": last_modified,
+        "content-disposition": _inline_disposition(filename),
+    }
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range in (etag, last_modified)):
+        size = path.stat().st_size
+        byte_range = parse_range(range_header, size)
+        if byte_range is not None:
+            start, end = byte_range
+            headers["content-range"] = f"bytes {start}-{end}/{size}"
+            headers["content-length"] = str(end - start + 1)
+            return StreamingResponse(
+                _read_range(path, start, end),
+                status_code=status.HTTP_206_PARTIAL_CONTENT,
+                media_type=media_type,
+                headers=headers,
+            )
+    return FileResponse(path, media_type=media_type, headers=headers)
@@ -0,0 +1,300 @@
+"""Pluggable storage for uploaded files.
+
+``get_storage()`` is the backend new uploads go to (``settings.storage_backend``).
+``storage_for_url()`` finds the backend that holds an existing URL, so files
+keep being served and deleted after the active backend changes.
+"""
+
+import mimetypes
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Dict, List, Optional
+
+import httpx
+
+from . import cloudinary_service
+from .asset_cache import asset_cache
+from .config import get_settings
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def _object_name(name_prefix: Optional[str], filename: Optional[str]) -> str:
+    # Unique suffix so re-uploads never overwrite each other
+    unique_id = uuid.uuid4().hex[:8]
+    stem = f"{name_prefix}-{unique_id}" if name_prefix else unique_id
+    return stem + PurePosixPath(filename or "").suffix.lower()
+
+
+def _content_type(name: str) -> str:
+    return mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+
+class StorageBackend(ABC):
+    """Where uploaded files live. URLs returned by ``upload`` are stored on rows."""
+
+    name: str
+
+    @abstractmethod
+    def upload(
+        self,
+        handle: BinaryIO,
+        folder: str,
+        name_prefix: Optional[str] = None,
+        filename: Optional[str] = None,
+    ) -> str:
+        """Store the contents of ``handle`` and return the file's URL."""
+
+    @abstractmethod
+    def owns(self, url: str) -> bool:
+        """Whether ``url`` points into this backend."""
+
+    @abstractmethod
+    def delete_many(self, urls: List[str]) -> Dict[str, bool]:
+        """Delete files; maps each URL to True once it is gone.
+
+        Raises on transport errors so the caller can retry the batch.
+        """
+
+    def local_path(self, url: str) -> Optional[Path]:
+        """Path of the file on local disk, for backends that have one."""
+        return None
+
+    def derived_url(
+        self, url: str, width: int, fmt: str, page: Optional[int] = None
+    ) -> Optional[str]:
+        """URL of a resized/re-encoded image rendered by the backend on request.
+
+        ``page`` selects a page of a PDF. ``None`` means the backend cannot do
+        this and copies must be stored.
+        """
+        return None
+
+    def open(self, url: str) -> BinaryIO:
+        """Open a stored file for reading (remote files go to a temp file)."""
+        cached = asset_cache.lookup(url)
+        if cached is not None:
+            return cached.path.open("rb")
+        spool = tempfile.TemporaryFile()
+        with httpx.stream("GET", url, follow_redirects=True, timeout=60.0) as response:
+            response.raise_for_status()
+            for chunk in response.iter_bytes(COPY_CHUNK_SIZE):
+                spool.write(chunk)
+        spool.seek(0)
+        return spool
+
+
+class CloudinaryStorage(StorageBackend):
+    name = "cloudinary"
+
+    def __init__(self) -> None:
+        cloudinary_service.init_cloudinary()
+
+    def upload(self, handle, folder, name_prefix=None, filename=None) -> str:
+        return cloudinary_service.upload_stream(handle, folder, name_prefix, filename)
+
+    def owns(self, url: str) -> bool:
+        return cloudinary_service.cloudinary_public_id(url) is not None
+
+    def derived_url(self, url, width, fmt, page=None) -> Optional[str]:
+        if "/image/upload/" not in url:
+            return None
+        page_part = f"pg_{page}," if page else ""
+        return url.replace(
+            "/image/upload/", f"/image/upload/{page_part}w_{width},c_limit,f_{fmt},q_auto/", 1
+        )
+
+    def delete_many(self, urls: List[str]) -> Dict[str, bool]:
+        by_type: Dict[str, Dict[str, str]] = {}
+        for url in urls:
+            public_id, resource_type = cloudinary_service.cloudinary_public_id(url)
+            by_type.setdefault(resource_type, {})[public_id] = url
+        gone: Dict[str, bool] = {}
+        for resource_type, ids in by_type.items():
+            public_ids = list(ids)
+            # delete_resources accepts at most 100 ids per call
+            for start in range(0, len(public_ids), 100):
+                batch = public_ids[start : start + 100]
+                outcomes = cloudinary_service.delete_resources(batch, resource_type)
+                for public_id in batch:
+                    gone[ids[public_id]] = outcomes.get(public_id) in ("deleted", "not_found")
+        return gone
+
+
+class LocalStorage(StorageBackend):
+    """Files under ``media_root / local_storage_dir``, served as static files."""
+
+    name = "local"
+
+    def __init__(self, root: Path, url_prefix: str) -> None:
+        self.root = root
+        self.url_prefix = url_prefix.rstrip("/")
+
+    def upload(self, handle, folder, name_prefix=None, filename=None) -> str:
+        relative = PurePosixPath(folder) / _object_name(name_prefix, filename)
+        path = self.root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                shutil.copyfileobj(handle, out, COPY_CHUNK_SIZE)
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        return f"{self.url_prefix}/{relative}"
+
+    def owns(self, url: str) -> bool:
+        return url.startswith(self.url_prefix + "/")
+
+    def local_path(self, url: str) -> Optional[Path]:
+        if not self.owns(url):
+            return None
+        path = (self.root / url[len(self.url_prefix) + 1 :]).resolve()
+        return path if path.is_relative_to(self.root.resolve()) else None
+
+    def delete_many(self, urls: List[str]) -> Dict[str, bool]:
+        gone = {}
+        for url in urls:
+            path = self.local_path(url)
+            if path is not None:
+                path.unlink(missing_ok=True)
+            gone[url] = True
+        return gone
+
+    def open(self, url: str) -> BinaryIO:
+        path = self.local_path(url)
+        if path is None:
+            raise FileNotFoundError(url)
+        return path.open("rb")
+
+
+class S3Storage(StorageBackend):
+    """Any S3-compatible object store (AWS S3, MinIO, R2, ...)."""
+
+    name = "s3"
+
+    def __init__(
+        self,
+        bucket: str,
+        public_base_url: str,
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None,
+    ) -> None:
+        try:
+            import boto3
+        except ImportError as exc:  # pragma: no cover - optional dependency
+            raise RuntimeError("S3 storage requires the boto3 package.") from exc
+        self.bucket = bucket
+        self.public_base_url = public_base_url.rstrip("/")
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+        )
+
+    def _key(self, url: str) -> str:
+        return url[len(self.public_base_url) + 1 :]
+
+    def upload(self, handle, folder, name_prefix=None, filename=None) -> str:
+        key = f"{folder}/{_object_name(name_prefix, filename)}"
+        self.client.upload_fileobj(
+            handle, self.bucket, key, ExtraArgs={"ContentType": _content_type(key)}
+        )
+        return f"{self.public_base_url}/{key}"
+
+    def owns(self, url: str) -> bool:
+        return url.startswith(self.public_base_url + "/")
+
+    def delete_many(self, urls: List[str]) -> Dict[str, bool]:
+        gone = {}
+        # delete_objects accepts at most 1000 keys per call
+        for start in range(0, len(urls), 1000):
+            batch = urls[start : start + 1000]
+            result = self.client.delete_objects(
+                Bucket=self.bucket,
+                Delete={"Objects": [{"Key": self._key(url)} for url in batch], "Quiet": True},
+            )
+            failed = {error["Key"] for error in result.get("Errors", [])}
+            gone.update({url: self._key(url) not in failed for url in batch})
+        return gone
+
+    def open(self, url: str) -> BinaryIO:
+        spool = tempfile.TemporaryFile()
+        self.client.download_fileobj(self.bucket, self._key(url), spool)
+        spool.seek(0)
+        return spool
+
+
+_backends: Optional[Dict[str, StorageBackend]] = None
+_backends_lock = threading.Lock()
+
+
+def _registry() -> Dict[str, StorageBackend]:
+    global _backends
+    with _backends_lock:
+        if _backends is None:
+            settings = get_settings()
+            backends: Dict[str, StorageBackend] = {
+                "local": LocalStorage(
+                    settings.media_root / settings.local_storage_dir,
+                    f"{settings.media_url_prefix}/{settings.local_storage_dir}",
+                ),
+                "cloudinary": CloudinaryStorage(),
+            }
+            if settings.s3_bucket:
+                backends["s3"] = S3Storage(
+                    bucket=settings.s3_bucket,
+                    public_base_url=settings.s3_public_base_url
+                    or (
+                        f"{settings.s3_endpoint_url}/{settings.s3_bucket}"
+                        if settings.s3_endpoint_url
+                        else f"https://{settings.s3_bucket}.s3.amazonaws.com"
+                    ),
+                    endpoint_url=settings.s3_endpoint_url,
+                    region=settings.s3_region,
+                    access_key_id=settings.s3_access_key_id,
+                    secret_access_key=settings.s3_secret_access_key,
+                )
+            _backends = backends
+        return _backends
+
+
+def get_storage(name: Optional[str] = None) -> StorageBackend:
+    """The backend that receives new uploads, or the one called ``name``."""
+    name = name or get_settings().storage_backend
+    backend = _registry().get(name)
+    if backend is None:
+        raise RuntimeError(f"Storage backend '{name}' is not configured.")
+    return backend
+
+
+def storage_for_url(url: Optional[str]) -> Optional[StorageBackend]:
+    """The backend holding ``url``, or None for external and legacy URLs."""
+    if not url:
+        return None
+    for backend in _registry().values():
+        if backend.owns(url):
+            return backend
+    return None
+
+
+def delete_url(url: str) -> None:
+    """Delete one stored file right away, ignoring failures."""
+    asset_cache.invalidate(url)
+    backend = storage_for_url(url)
+    if backend is None:
+        return
+    try:
+        backend.delete_many([url])
+    except Exception:
+        pass
@@ -1,15 +1,204 @@
 """Database engine and session management."""
 
+import threading
+import time
 from contextlib import contextmanager
-from typing import Generator
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncGenerator, Dict, Generator, List, Optional
 
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from .core.config import get_settings
+from .query_stats import instrument
 
 
 settings = get_settings()
-engine = create_engine(settings.database_url, echo=False, connect_args={})
+
+
+@dataclass
+class PoolCounters:
+    checkouts: int = 0
+    timeouts: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+    connects: int = 0
+    invalidations: int = 0
+
+
+_counters_lock = threading.Lock()
+
+
+class _TimedCheckout:
+    """Pool mixin that records how long checkouts wait for a connection."""
+
+    counters: PoolCounters
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with _counters_lock:
+                self.counters.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with _counters_lock:
+                self.counters.checkouts += 1
+                self.counters.wait_seconds_total += waited
+                self.counters.wait_seconds_max = max(self.counters.wait_seconds_max, waited)
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def _instrumented(poolclass: type) -> type:
+    """Subclass of ``poolclass`` with its own counters (one per engine; a
+    disposed engine's new pool keeps counting into them)."""
+    return type(poolclass.__name__, (poolclass,), {"counters": PoolCounters()})
+
+
+# Async drivers used for each sync driver of DATABASE_URL
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def async_database_url(database_url: str) -> str:
+    """``database_url`` with its driver swapped for the asyncio one."""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(f"No async driver configured for '{backend}'.")
+    return str(url.set(drivername=ASYNC_DRIVERS[backend]))
+
+
+def _engine_options(
+    database_url: str, asynchronous: bool = False, connect_timeout: Optional[float] = None
+) -> Dict[str, Any]:
+    if database_url.startswith("sqlite"):
+        # Sessions may be opened and closed on different threadpool threads
+        return {} if asynchronous else {"connect_args": {"check_same_thread": False}}
+    connect_args: Dict[str, Any] = {}
+    if connect_timeout is not None:
+        connect_args["timeout" if asynchronous else "connect_timeout"] = connect_timeout
+    if settings.db_statement_timeout_ms:
+        timeout = str(settings.db_statement_timeout_ms)
+        if asynchronous:
+            connect_args["server_settings"] = {"statement_timeout": timeout}
+        else:
+            connect_args["options"] = f"-c statement_timeout={timeout}"
+    return {
+        "poolclass": _instrumented(
+            InstrumentedAsyncQueuePool if asynchronous else InstrumentedQueuePool
+        ),
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "connect_args": connect_args,
+    }
+
+
+def _count_connections(sync_engine) -> None:
+    counters = getattr(sync_engine.pool, "counters", None)
+    if counters is None:
+        return
+
+    @event.listens_for(sync_engine, "connect")
+    def _count_connect(_dbapi_connection, _connection_record) -> None:
+        with _counters_lock:
+            counters.connects += 1
+
+    @event.listens_for(sync_engine, "invalidate")
+    def _count_invalidate(_dbapi_connection, _connection_record, _exception) -> None:
+        with _counters_lock:
+            counters.invalidations += 1
+
+
+engine = create_engine(settings.database_url, echo=False, **_engine_options(settings.database_url))
+# Used by the public read endpoints so DB waits don't hold threadpool threads.
+async_engine = create_async_engine(
+    settings.async_database_url or async_database_url(settings.database_url),
+    echo=False,
+    **_engine_options(settings.database_url, asynchronous=True),
+)
+# Read replicas for the public endpoints (see app/replicas.py), in the
+# order of DATABASE_READ_URL.
+read_engines: List[AsyncEngine] = [
+    create_async_engine(
+        async_database_url(url),
+        echo=False,
+        **_engine_options(
+            url, asynchronous=True, connect_timeout=settings.db_replica_connect_timeout_seconds
+        ),
+    )
+    for url in (part.strip() for part in (settings.database_read_url or "").split(","))
+    if url
+]
+for _engine in (engine, async_engine, *read_engines):
+    _count_connections(getattr(_engine, "sync_engine", _engine))
+    instrument(getattr(_engine, "sync_engine", _engine))
+
+
+def display_url(bind: AsyncEngine) -> str:
+    """Engine URL without the password, for stats and logs."""
+    return bind.url.render_as_string(hide_password=True)
+
+
+def _pool_stats(pool) -> Dict[str, Any]:
+    stats: Dict[str, Any] = {"pool": type(pool).__name__}
+    counters = getattr(pool, "counters", None)
+    if counters is not None:
+        with _counters_lock:
+            stats.update(asdict(counters))
+        if stats["checkouts"]:
+            stats["wait_seconds_avg"] = stats["wait_seconds_total"] / stats["checkouts"]
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            # overflow() counts down from -size until the pool is full
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+            timeout=pool.timeout(),
+        )
+    return stats
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Live state of this worker's connection pools plus cumulative counters."""
+    return {
+        "sync": _pool_stats(engine.pool),
+        "async": _pool_stats(async_engine.sync_engine.pool),
+        "replicas": {
+            display_url(read_engine): _pool_stats(read_engine.sync_engine.pool)
+            for read_engine in read_engines
+        },
+    }
+
+
+if engine.dialect.name == "sqlite":
+
+    def _sqlite_unicode_lower(dbapi_connection, _connection_record) -> None:
+        """Make SQLite's lower() Unicode-aware so Cyrillic search works locally."""
+        dbapi_connection.create_function(
+            "lower", 1, lambda value: value.lower() if isinstance(value, str) else value
+        )
+
+    for _engine in (engine, async_engine, *read_engines):
+        event.listen(getattr(_engine, "sync_engine", _engine), "connect", _sqlite_unicode_lower)
 
 
 def init_db() -> None:
@@ -23,6 +212,12 @@ def get_session() -> Generator[Session, None, None]:
         yield session
 
 
+async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    """FastAPI dependency that yields an asyncio session (public reads)."""
+    async with AsyncSession(async_engine) as session:
+        yield session
+
+
 @contextmanager
 def session_scope() -> Generator[Session, None, None]:
     """Context manager for scripts."""
@@ -0,0 +1,189 @@
+"""Background text extraction of uploaded PDFs for script search.
+
+Handlers call :func:`queue_text_extraction` when a stored PDF is attached to
+a play, play file or library piece; the row is committed with that change.
+A worker thread opens due documents from storage, stores one
+``DocumentPage`` per page and retries failures with exponential backoff.
+Documents are keyed by URL, so deduplicated uploads are extracted once.
+"""
+
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import BinaryIO, List, Optional
+
+import pypdfium2 as pdfium
+from sqlalchemy import delete, event, union
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from .core.config import get_settings
+from .core.storage import storage_for_url
+from .database import engine
+from .models import DocumentPage, IndexedDocument, LiteraryPiece, Play, PlayFile
+from .pdf_preview import PDFIUM_LOCK
+
+PENDING = "pending"
+INDEXED = "indexed"
+FAILED = "failed"
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+_wake = threading.Event()
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+
+
+def is_pdf_url(url: Optional[str]) -> bool:
+    return bool(url) and url.lower().split("?", 1)[0].endswith(".pdf")
+
+
+def queue_text_extraction(session: Session, url: Optional[str]) -> None:
+    """Schedule extraction of a stored PDF when ``session`` commits (once per URL)."""
+    if not is_pdf_url(url) or storage_for_url(url) is None:
+        return
+    if session.exec(select(IndexedDocument.id).where(IndexedDocument.url == url)).first():
+        return
+    try:
+        with session.begin_nested():
+            session.add(IndexedDocument(url=url))
+    except IntegrityError:
+        return  # queued concurrently
+    if not event.contains(session, "after_commit", _wake_after_commit):
+        event.listen(session, "after_commit", _wake_after_commit, once=True)
+
+
+def _wake_after_commit(_session: Session) -> None:
+    _wake.set()
+
+
+def queue_missing_documents() -> None:
+    """Queue PDFs attached before extraction existed (or by hand)."""
+    unknown = union(
+        *(
+            select(column).where(
+                column.is_not(None),
+                ~select(IndexedDocument.id).where(IndexedDocument.url == column).exists(),
+            )
+            for column in (Play.pdf_path, LiteraryPiece.pdf_path, PlayFile.file_url)
+        )
+    )
+    with Session(engine) as session:
+        for url in sorted(session.execute(unknown).scalars()):
+            queue_text_extraction(session, url)
+        session.commit()
+
+
+def forget_document(session: Session, url: str) -> None:
+    """Drop the extracted text of a deleted file."""
+    document = session.exec(select(IndexedDocument).where(IndexedDocument.url == url)).first()
+    if document is None:
+        return
+    session.execute(delete(DocumentPage).where(DocumentPage.document_id == document.id))
+    session.delete(document)
+
+
+def extract_pages(handle: BinaryIO) -> List[str]:
+    """Text of every page of a PDF, in order."""
+    with PDFIUM_LOCK:
+        document = pdfium.PdfDocument(handle)
+        try:
+            pages = []
+            for index in range(len(document)):
+                page = document[index]
+                try:
+                    text_page = page.get_textpage()
+                    try:
+                        pages.append(text_page.get_text_range().replace("\x00", ""))
+                    finally:
+                        text_page.close()
+                finally:
+                    page.close()
+            return pages
+        finally:
+            document.close()
+
+
+def _claim_next(session: Session, now: datetime) -> Optional[IndexedDocument]:
+    return session.exec(
+        select(IndexedDocument)
+        .where(IndexedDocument.status == PENDING, IndexedDocument.next_attempt_at <= now)
+        .order_by(IndexedDocument.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    ).first()
+
+
+def _retry(document: IndexedDocument, error: str, now: datetime) -> None:
+    document.attempts += 1
+    document.error = error
+    if document.attempts >= settings.text_index_max_attempts:
+        document.status = FAILED
+    else:
+        delay = settings.text_index_backoff_seconds * 2 ** (document.attempts - 1)
+        document.next_attempt_at = now + timedelta(seconds=delay)
+
+
+def index_next() -> bool:
+    """Extract one due document; returns False when none was due."""
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        document = _claim_next(session, now)
+        if document is None:
+            return False
+        document.updated_at = now
+        backend = storage_for_url(document.url)
+        try:
+            if backend is None:
+                raise RuntimeError("файлът не е в хранилище")
+            with backend.open(document.url) as handle:
+                pages = extract_pages(handle)
+        except Exception as exc:
+            _retry(document, f"{type(exc).__name__}: {exc}", now)
+            session.add(document)
+            session.commit()
+            return True
+
+        session.execute(delete(DocumentPage).where(DocumentPage.document_id == document.id))
+        session.add_all(
+            DocumentPage(document_id=document.id, page_number=number, content=content)
+            for number, content in enumerate(pages, start=1)
+            if content.strip()
+        )
+        document.status = INDEXED
+        document.page_count = len(pages)
+        document.error = None
+        session.add(document)
+        # Script search validators follow the index itself (routers/search.py)
+        session.commit()
+        return True
+
+
+def _run() -> None:
+    while not _stop.is_set():
+        try:
+            handled = index_next()
+        except Exception:
+            logger.exception("Text extraction failed")
+            handled = False
+        if not handled:
+            _wake.wait(settings.text_index_interval_seconds)
+            _wake.clear()
+
+
+def start_text_index_worker() -> None:
+    global _thread
+    if _thread is not None and _thread.is_alive():
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_run, name="text-index", daemon=True)
+    _thread.start()
+
+
+def stop_text_index_worker() -> None:
+    global _thread
+    _stop.set()
+    _wake.set()
+    if _thread is not None:
+        _thread.join(timeout=5)
+        _thread = None
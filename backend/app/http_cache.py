@@ -0,0 +1,130 @@
+"""Conditional GET support (ETag / Last-Modified) for catalogue reads."""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional, Tuple
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy import update
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .core.config import get_settings
+from .models import CatalogueVersion
+from .replicas import get_read_session
+
+CATALOGUE_VERSION_ID = 1
+
+
+async def get_catalogue_version(session: AsyncSession) -> Tuple[int, Optional[datetime]]:
+    """Return the current catalogue version and when it last changed.
+
+    Without the version row (created by a migration) the change date is
+    unknown and ``None`` is returned for it.
+    """
+    row = await session.get(CatalogueVersion, CATALOGUE_VERSION_ID)
+    if not row:
+        return 0, None
+    return row.version, row.updated_at
+
+
+def bump_catalogue_version(session: Session) -> int:
+    """Mark the catalogue as changed and return the new version; call inside
+    the admin write transaction."""
+    now = datetime.utcnow()
+    result = session.execute(
+        update(CatalogueVersion)
+        .where(CatalogueVersion.id == CATALOGUE_VERSION_ID)
+        .values(version=CatalogueVersion.version + 1, updated_at=now)
+    )
+    if result.rowcount == 0:
+        session.add(CatalogueVersion(id=CATALOGUE_VERSION_ID, version=1, updated_at=now))
+        return 1
+    return session.execute(
+        select(CatalogueVersion.version).where(CatalogueVersion.id == CATALOGUE_VERSION_ID)
+    ).scalar_one()
+
+
+def commit_catalogue_change(session: Session) -> int:
+    """Bump the catalogue version, commit the admin write and return the version."""
+    version = bump_catalogue_version(session)
+    session.commit()
+    return version
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    tags = (tag.strip() for tag in header.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+
+def _not_modified_since(header: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+
+def is_not_modified(
+    request: Request, etag: Optional[str], last_modified: Optional[str]
+) -> bool:
+    """Evaluate If-None-Match / If-Modified-Since against response validators."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag is not None and _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if not if_modified_since or not last_modified:
+        return False
+    try:
+        modified = parsedate_to_datetime(last_modified)
+    except (TypeError, ValueError):
+        return False
+    return _not_modified_since(if_modified_since, modified)
+
+
+async def catalogue_validators(
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_read_session),
+) -> None:
+    """Attach validators and answer 304 before the endpoint queries anything.
+
+    The ETag combines the catalogue version with the request URL, so every
+    resource gets its own validator that changes on any admin write.
+    """
+    version, changed_at = await get_catalogue_version(session)
+    send_validators(request, response, version, changed_at)
+
+
+def send_validators(
+    request: Request,
+    response: Response,
+    version: int,
+    changed_at: Optional[datetime],
+    state: str = "",
+) -> None:
+    """Set the ETag/Last-Modified of this URL at ``version``, or answer 304.
+
+    ``state`` is mixed into the digest for reads that also depend on data
+    outside the catalogue version (see ``routers.search``).
+    """
+    resource = f"{request.url.path}?{request.url.query}"
+    if state:
+        resource = f"{resource}#{state}"
+    digest = hashlib.sha1(resource.encode("utf-8")).hexdigest()
+    headers = {
+        "ETag": f'"{version}-{digest[:16]}"',
+        "Cache-Control": get_settings().catalogue_cache_control,
+    }
+    if changed_at is not None:
+        headers["Last-Modified"] = format_datetime(
+            changed_at.replace(microsecond=0, tzinfo=timezone.utc), usegmt=True
+        )
+    if is_not_modified(request, headers["ETag"], headers.get("Last-Modified")):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
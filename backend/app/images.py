@@ -0,0 +1,86 @@
+"""Responsive derivatives of uploaded images (thumbnail, card, full size).
+
+Backends that resize on request (Cloudinary) only get derived URLs; for the
+others each width is resized with Pillow, encoded in every configured format
+and stored next to the original. Variants are plain dicts
+``{"name", "width", "format", "url"}``; copies we stored are flagged with
+``"stored": True`` so they are deleted together with the original.
+"""
+
+import io
+from typing import BinaryIO, List
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .core.config import get_settings
+from .core.storage import StorageBackend
+
+# Encoder quality per format; AVIF reaches the same visual quality lower.
+VARIANT_QUALITY = {"webp": 80, "avif": 55}
+
+settings = get_settings()
+
+
+def _widths() -> List[tuple]:
+    return sorted(settings.image_variant_widths.items(), key=lambda item: item[1])
+
+
+def build_variants(
+    backend: StorageBackend,
+    handle: BinaryIO,
+    url: str,
+    folder: str,
+    name_prefix: str,
+) -> List[dict]:
+    """Create the configured variants of the image at ``url``.
+
+    Returns an empty list for files Pillow cannot read (e.g. SVG). Widths
+    above the original are not upscaled. ``handle`` is rewound afterwards.
+    """
+    formats = settings.image_variant_formats
+    if backend.derived_url(url, 1, formats[0]) is not None:
+        return [
+            {"name": name, "width": width, "format": fmt, "url": backend.derived_url(url, width, fmt)}
+            for name, width in _widths()
+            for fmt in formats
+        ]
+
+    try:
+        with Image.open(handle) as original:
+            image = ImageOps.exif_transpose(original)
+            image.load()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        return []
+    finally:
+        handle.seek(0)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+    variants: List[dict] = []
+    previous_width = 0
+    for name, width in _widths():
+        width = min(width, image.width)
+        if width == previous_width:
+            continue
+        previous_width = width
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        for fmt in formats:
+            buffer = io.BytesIO()
+            resized.save(buffer, fmt.upper(), quality=VARIANT_QUALITY.get(fmt, 80))
+            buffer.seek(0)
+            variant_url = backend.upload(
+                buffer,
+                f"{folder}/variants",
+                name_prefix=f"{name_prefix}-{name}",
+                filename=f"{name}.{fmt}",
+            )
+            variants.append(
+                {"name": name, "width": width, "format": fmt, "url": variant_url, "stored": True}
+            )
+    return variants
+
+
+def stored_variant_urls(variants: List[dict]) -> List[str]:
+    """URLs of variant copies that were uploaded and must be deleted with the original."""
+    return [variant["url"] for variant in variants or [] if variant.get("stored")]
@@ -4,28 +4,59 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
+from .asset_deletions import start_deletion_worker, stop_deletion_worker
 from .core.config import get_settings
-from .database import init_db, session_scope
-from .migrations import run_migrations
-from .routers import admin, authors, library, plays
+from .core.http_client import close_http_client
+from .database import async_engine, read_engines, session_scope
+from .document_text import (
+    queue_missing_documents,
+    start_text_index_worker,
+    stop_text_index_worker,
+)
+from .migrations import check_schema_version, run_migrations
+from .pagination import NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER
+from .query_stats import DB_QUERIES_HEADER, QueryStatsMiddleware
+from .replicas import CATALOGUE_VERSION_HEADER, CatalogueVersionMiddleware
+from .response_cache import ResponseCacheMiddleware
+from .upload_limit import UploadSizeLimitMiddleware
+from .routers import admin, authors, library, plays, search
 from .seed_data import seed_demo_data
+from .upload_jobs import resume_upload_jobs, shutdown_upload_workers
 
 
 def create_app() -> FastAPI:
     settings = get_settings()
     app = FastAPI(title="bgpiesa API", version="1.0.0")
 
+    # Added before CORS so CORS headers are applied to their responses too.
+    app.add_middleware(ResponseCacheMiddleware)
+    app.add_middleware(CatalogueVersionMiddleware)
+    if settings.db_timing_headers:
+        app.add_middleware(QueryStatsMiddleware)
+    app.add_middleware(
+        UploadSizeLimitMiddleware,
+        max_bytes=settings.max_upload_bytes,
+        batch_max_bytes=settings.max_batch_upload_bytes,
+    )
     app.add_middleware(
         CORSMiddleware,
         allow_origins=settings.backend_cors_origins,
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[
+            NEXT_CURSOR_HEADER,
+            TOTAL_COUNT_HEADER,
+            CATALOGUE_VERSION_HEADER,
+            DB_QUERIES_HEADER,
+            "Server-Timing",
+        ],
     )
 
     app.include_router(authors.router)
     app.include_router(plays.router)
     app.include_router(library.router)
+    app.include_router(search.router)
     app.include_router(admin.router)
 
     app.mount(
@@ -38,12 +69,29 @@ def create_app() -> FastAPI:
     def healthcheck():
         return {"status": "ok", "app": settings.app_name}
 
+    @app.on_event("shutdown")
+    async def on_shutdown():
+        await close_http_client()
+        await async_engine.dispose()
+        for read_engine in read_engines:
+            await read_engine.dispose()
+        shutdown_upload_workers()
+        stop_deletion_worker()
+        stop_text_index_worker()
+
     @app.on_event("startup")
     def on_startup():
-        init_db()
-        run_migrations()
-        with session_scope() as session:
-            seed_demo_data(session)
+        if settings.run_migrations_on_startup:
+            run_migrations()
+        else:
+            check_schema_version()
+        if settings.seed_demo_data_on_startup:
+            with session_scope() as session:
+                seed_demo_data(session)
+        resume_upload_jobs()
+        start_deletion_worker()
+        queue_missing_documents()
+        start_text_index_worker()
 
     return app
 
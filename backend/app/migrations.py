@@ -1,9 +1,22 @@
-"""Database migration utilities."""
+"""Versioned schema migrations.
 
-from sqlalchemy import inspect, text
-from sqlmodel import Session
+``schemamigration`` records the steps in :data:`MIGRATIONS` that have been
+applied. Startup runs :func:`run_migrations` (or only checks the version when
+``RUN_MIGRATIONS_ON_STARTUP`` is off and ``python -m app migrate`` runs as a
+release step).
+"""
 
-from .database import engine
+from contextlib import contextmanager
+from typing import Callable, Generator, List, Tuple
+
+from sqlalchemy import func, inspect, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlmodel import Session, select
+
+from .database import engine, init_db
+from .http_cache import CATALOGUE_VERSION_ID
+from .models import CatalogueVersion, SchemaMigration
+from .search import PAGE_DOCUMENT, PAGE_VECTOR_COLUMN, SEARCH_COLUMNS, search_document
 
 
 def column_exists(table_name: str, column_name: str) -> bool:
@@ -56,77 +69,53 @@ def add_column_if_not_exists(table_name: str, column_name: str, column_type: str
 
 
 def migrate_play_table() -> None:
-    """Add new columns to the play table if they don't exist."""
-    try:
-        # Check if table exists
-        if not column_exists("play", "id"):
-            print("Table 'play' does not exist yet, will be created by init_db")
-            return
-        
-        # Add new columns if they don't exist
-        add_column_if_not_exists("play", "theme", "VARCHAR")
-        add_column_if_not_exists("play", "male_participants", "INTEGER")
-        add_column_if_not_exists("play", "female_participants", "INTEGER")
-    except Exception as e:
-        # If table doesn't exist yet, that's fine - init_db will create it
-        if "does not exist" not in str(e).lower() and "relation" not in str(e).lower():
-            print(f"Migration error (non-critical): {e}")
-        # Silently continue if table doesn't exist - it will be created by init_db
+    """Add theme and participant columns to the play table."""
+    if not table_exists("play"):
+        return
+    add_column_if_not_exists("play", "theme", "VARCHAR")
+    add_column_if_not_exists("play", "male_participants", "INTEGER")
+    add_column_if_not_exists("play", "female_participants", "INTEGER")
 
 
 def migrate_drop_duration() -> None:
     """Drop duration column from play table if it exists."""
-    try:
-        if not column_exists("play", "id"):
-            return
-        drop_column_if_exists("play", "duration")
-    except Exception as e:
-        if "does not exist" not in str(e).lower() and "relation" not in str(e).lower():
-            print(f"Migration error dropping duration (non-critical): {e}")
+    drop_column_if_exists("play", "duration")
 
 
 def migrate_play_image_captions() -> None:
     """Add caption_bg and caption_en to playimage table."""
-    try:
-        if not column_exists("playimage", "id"):
-            return
-        add_column_if_not_exists("playimage", "caption_bg", "VARCHAR")
-        add_column_if_not_exists("playimage", "caption_en", "VARCHAR")
-    except Exception as e:
-        if "does not exist" not in str(e).lower() and "relation" not in str(e).lower():
-            print(f"Migration error playimage captions (non-critical): {e}")
+    if not table_exists("playimage"):
+        return
+    add_column_if_not_exists("playimage", "caption_bg", "VARCHAR")
+    add_column_if_not_exists("playimage", "caption_en", "VARCHAR")
 
 
 def migrate_bilingual() -> None:
     """Add bilingual columns and backfill from existing title/description/biography."""
-    try:
-        with Session(engine) as session:
-            # Author: add biography_bg, biography_en and backfill from biography
-            if column_exists("author", "biography") and not column_exists("author", "biography_bg"):
-                for stmt in [
-                    "ALTER TABLE author ADD COLUMN biography_bg VARCHAR",
-                    "ALTER TABLE author ADD COLUMN biography_en VARCHAR",
-                ]:
-                    session.exec(text(stmt))
-                session.exec(text("UPDATE author SET biography_bg = biography"))
-                session.commit()
-                print("Migrated author to biography_bg/biography_en")
-
-            # Play: add title_bg, title_en, description_bg, description_en and backfill
-            if column_exists("play", "title") and not column_exists("play", "title_bg"):
-                for stmt in [
-                    "ALTER TABLE play ADD COLUMN title_bg VARCHAR",
-                    "ALTER TABLE play ADD COLUMN title_en VARCHAR",
-                    "ALTER TABLE play ADD COLUMN description_bg VARCHAR",
-                    "ALTER TABLE play ADD COLUMN description_en VARCHAR",
-                ]:
-                    session.exec(text(stmt))
-                session.exec(text("UPDATE play SET title_bg = title, description_bg = description"))
-                session.commit()
-                print("Migrated play to title_bg/title_en and description_bg/description_en")
-    except Exception as e:
-        if "does not exist" not in str(e).lower() and "relation" not in str(e).lower():
-            print(f"Bilingual migration error (non-critical): {e}")
+    with Session(engine) as session:
+        # Author: add biography_bg, biography_en and backfill from biography
+        if column_exists("author", "biography") and not column_exists("author", "biography_bg"):
+            for stmt in [
+                "ALTER TABLE author ADD COLUMN biography_bg VARCHAR",
+                "ALTER TABLE author ADD COLUMN biography_en VARCHAR",
+            ]:
+                session.exec(text(stmt))
+            session.exec(text("UPDATE author SET biography_bg = biography"))
+            session.commit()
+            print("Migrated author to biography_bg/biography_en")
+
+        # Play: add title_bg, title_en, description_bg, description_en and backfill
+        if column_exists("play", "title") and not column_exists("play", "title_bg"):
+            for stmt in [
+                "ALTER TABLE play ADD COLUMN title_bg VARCHAR",
+                "ALTER TABLE play ADD COLUMN title_en VARCHAR",
+                "ALTER TABLE play ADD COLUMN description_bg VARCHAR",
+                "ALTER TABLE play ADD COLUMN description_en VARCHAR",
+            ]:
+                session.exec(text(stmt))
+            session.exec(text("UPDATE play SET title_bg = title, description_bg = description"))
+            session.commit()
+            print("Migrated play to title_bg/title_en and description_bg/description_en")
 
 
 def table_exists(table_name: str) -> bool:
@@ -138,76 +127,185 @@ def table_exists(table_name: str) -> bool:
         return False
 
 
-def migrate_playfile_table() -> None:
-    """Create playfile table if it doesn't exist."""
-    try:
-        if table_exists("playfile"):
-            return
-        with Session(engine) as session:
-            session.exec(text("""
-                CREATE TABLE playfile (
-                    id SERIAL PRIMARY KEY,
-                    file_url VARCHAR NOT NULL,
-                    caption_bg VARCHAR,
-                    caption_en VARCHAR,
-                    play_id INTEGER NOT NULL REFERENCES play(id) ON DELETE CASCADE
+def migrate_literarypiece_pdf_path() -> None:
+    """Add pdf_path column to literarypiece table if it doesn't exist."""
+    if table_exists("literarypiece"):
+        add_column_if_not_exists("literarypiece", "pdf_path", "VARCHAR")
+
+
+def migrate_image_variants() -> None:
+    """Add JSON columns holding responsive image variants."""
+    for table_name, column_name in (
+        ("author", "photo_variants"),
+        ("playimage", "variants"),
+        ("storedasset", "variants"),
+    ):
+        if table_exists(table_name):
+            add_column_if_not_exists(table_name, column_name, "JSON")
+
+
+def migrate_pdf_metadata() -> None:
+    """Add page count, size and preview columns for uploaded PDFs."""
+    for table_name, column_name, column_type in (
+        ("play", "pdf_page_count", "INTEGER"),
+        ("play", "pdf_size", "INTEGER"),
+        ("play", "pdf_preview_url", "VARCHAR"),
+        ("literarypiece", "pdf_page_count", "INTEGER"),
+        ("literarypiece", "pdf_size", "INTEGER"),
+        ("literarypiece", "pdf_preview_url", "VARCHAR"),
+        ("storedasset", "page_count", "INTEGER"),
+    ):
+        if table_exists(table_name):
+            add_column_if_not_exists(table_name, column_name, column_type)
+
+
+def migrate_search_indexes() -> None:
+    """Create GIN full-text search indexes on Postgres."""
+    if engine.dialect.name != "postgresql":
+        return
+    with Session(engine) as session:
+        for table_name in SEARCH_COLUMNS:
+            session.exec(
+                text(
+                    f"CREATE INDEX IF NOT EXISTS ix_{table_name}_search "
+                    f"ON {table_name} USING GIN (({search_document(table_name)}))"
                 )
-            """))
+            )
+        session.commit()
+
+
+def migrate_document_page_search() -> None:
+    """Stored tsvector column and GIN index for extracted PDF text on Postgres."""
+    if engine.dialect.name != "postgresql":
+        return
+    add_column_if_not_exists(
+        "documentpage",
+        PAGE_VECTOR_COLUMN,
+        f"tsvector GENERATED ALWAYS AS ({PAGE_DOCUMENT}) STORED",
+    )
+    with Session(engine) as session:
+        session.exec(
+            text(
+                "CREATE INDEX IF NOT EXISTS ix_documentpage_search "
+                f"ON documentpage USING GIN ({PAGE_VECTOR_COLUMN})"
+            )
+        )
+        session.commit()
+
+
+def migrate_catalogue_version_row() -> None:
+    """Create the catalogue version row so HTTP validators have a real date."""
+    with Session(engine) as session:
+        if session.get(CatalogueVersion, CATALOGUE_VERSION_ID) is None:
+            # Version 1 so validators handed out before the row existed no longer match
+            session.add(CatalogueVersion(id=CATALOGUE_VERSION_ID, version=1))
             session.commit()
-            print("Created playfile table")
-    except Exception as e:
-        if "already exists" in str(e).lower() or "duplicate" in str(e).lower():
-            return
-        if "does not exist" not in str(e).lower() and "relation" not in str(e).lower():
-            print(f"Migration error playfile (non-critical): {e}")
 
 
-def migrate_literarypiece_table() -> None:
-    """Create literarypiece table if it doesn't exist."""
-    try:
-        if table_exists("literarypiece"):
-            return
-        with Session(engine) as session:
-            session.exec(text("""
-                CREATE TABLE literarypiece (
-                    id SERIAL PRIMARY KEY,
-                    title_bg VARCHAR NOT NULL,
-                    title_en VARCHAR,
-                    description_bg VARCHAR NOT NULL,
-                    description_en VARCHAR,
-                    pdf_path VARCHAR,
-                    author_id INTEGER NOT NULL REFERENCES author(id) ON DELETE CASCADE,
-                    play_id INTEGER REFERENCES play(id) ON DELETE SET NULL,
-                    created_at TIMESTAMP,
-                    updated_at TIMESTAMP
+# (table, columns) matching the keyset orders of the cursor-paginated lists
+KEYSET_INDEXES = (
+    ("play", ("title_bg", "id")),
+    ("author", ("name", "id")),
+    ("literarypiece", ("title_bg", "id")),
+)
+
+
+def migrate_keyset_indexes() -> None:
+    """Composite indexes so cursor pages are index range scans, not sorts."""
+    with Session(engine) as session:
+        for table_name, columns in KEYSET_INDEXES:
+            session.exec(
+                text(
+                    f"CREATE INDEX IF NOT EXISTS ix_{table_name}_{'_'.join(columns)} "
+                    f"ON {table_name} ({', '.join(columns)})"
                 )
-            """))
-            session.commit()
-            print("Created literarypiece table")
-    except Exception as e:
-        if "already exists" in str(e).lower() or "duplicate" in str(e).lower():
-            return
-        if "does not exist" not in str(e).lower() and "relation" not in str(e).lower():
-            print(f"Migration error literarypiece (non-critical): {e}")
+            )
+        session.commit()
 
 
-def migrate_literarypiece_pdf_path() -> None:
-    """Add pdf_path column to literarypiece table if it doesn't exist."""
+def migrate_upload_job_digest() -> None:
+    """Add the SHA-256 and size computed while a background upload is spooled."""
+    if not table_exists("uploadjob"):
+        return
+    add_column_if_not_exists("uploadjob", "sha256", "VARCHAR")
+    add_column_if_not_exists("uploadjob", "size", "INTEGER")
+
+
+# Applied in order after create_all. Append new steps with the next version
+# and never renumber; a new table also needs a step (even an empty one) so
+# that current databases run create_all again. Steps must be idempotent:
+# databases from before versioning run all of them once.
+MIGRATIONS: List[Tuple[int, str, Callable[[], None]]] = [
+    (1, "play theme and participants", migrate_play_table),
+    (2, "drop play duration", migrate_drop_duration),
+    (3, "play image captions", migrate_play_image_captions),
+    (4, "bilingual columns", migrate_bilingual),
+    (5, "literary piece pdf_path", migrate_literarypiece_pdf_path),
+    (6, "image variants", migrate_image_variants),
+    (7, "pdf metadata", migrate_pdf_metadata),
+    (8, "search indexes", migrate_search_indexes),
+    (9, "document page search", migrate_document_page_search),
+    (10, "catalogue version row", migrate_catalogue_version_row),
+    (11, "keyset pagination indexes", migrate_keyset_indexes),
+    (12, "upload job digest", migrate_upload_job_digest),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+# pg_advisory_lock key held while migrating, so one worker migrates at a time
+MIGRATION_LOCK_KEY = 0x6267_7069_6573_61  # "bgpiesa"
+
+
+def schema_version() -> int:
+    """Highest applied migration; 0 for a new or pre-versioning database."""
     try:
-        if not table_exists("literarypiece"):
-            return
-        add_column_if_not_exists("literarypiece", "pdf_path", "VARCHAR")
-    except Exception as e:
-        if "does not exist" not in str(e).lower() and "relation" not in str(e).lower():
-            print(f"Migration error literarypiece pdf_path (non-critical): {e}")
-
-
-def run_migrations() -> None:
-    """Run all pending migrations."""
-    migrate_play_table()
-    migrate_drop_duration()
-    migrate_play_image_captions()
-    migrate_bilingual()
-    migrate_playfile_table()
-    migrate_literarypiece_table()
-    migrate_literarypiece_pdf_path()
+        with Session(engine) as session:
+            return session.exec(select(func.max(SchemaMigration.version))).one() or 0
+    except (OperationalError, ProgrammingError):
+        return 0  # no schemamigration table yet
+
+
+@contextmanager
+def migration_lock() -> Generator[None, None, None]:
+    """Hold a Postgres advisory lock (no-op elsewhere) for the block."""
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        try:
+            yield
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+
+
+def run_migrations() -> int:
+    """Bring the schema up to date and return its version.
+
+    A current database costs one query. Otherwise the first worker to take
+    the lock migrates, and the others find the work done once they get it.
+    """
+    if schema_version() >= LATEST_VERSION:
+        return LATEST_VERSION
+    with migration_lock():
+        current = schema_version()
+        if current >= LATEST_VERSION:
+            return current
+        init_db()
+        for version, name, step in MIGRATIONS:
+            if version <= current:
+                continue
+            print(f"Applying migration {version}: {name}")
+            step()
+            with Session(engine) as session:
+                session.add(SchemaMigration(version=version, name=name))
+                session.commit()
+        return LATEST_VERSION
+
+
+def check_schema_version() -> None:
+    """Refuse to start on a database the release step has not migrated."""
+    current = schema_version()
+    if current < LATEST_VERSION:
+        raise RuntimeError(
+            f"Database schema is at version {current}, this code needs {LATEST_VERSION}; "
+            "run `python -m app migrate` first."
+        )
@@ -3,6 +3,7 @@
 from datetime import datetime
 from typing import List, Optional
 
+from sqlalchemy import JSON, Column
 from sqlmodel import Field, Relationship, SQLModel
 
 
@@ -17,6 +18,8 @@ class Author(SQLModel, table=True):
     biography_bg: str = Field(nullable=False)
     biography_en: Optional[str] = Field(default=None)
     photo_url: Optional[str] = Field(default=None)
+    # Resized copies of the photo, see app/images.py
+    photo_variants: Optional[List[dict]] = Field(default=None, sa_column=Column(JSON))
     created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
     updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
 
@@ -42,6 +45,10 @@ class Play(SQLModel, table=True):
     male_participants: Optional[int] = Field(default=None)
     female_participants: Optional[int] = Field(default=None)
     pdf_path: Optional[str] = Field(default=None)
+    # Filled in when the PDF is uploaded, see app/pdf_preview.py
+    pdf_page_count: Optional[int] = Field(default=None)
+    pdf_size: Optional[int] = Field(default=None)
+    pdf_preview_url: Optional[str] = Field(default=None)
     author_id: int = Field(foreign_key="author.id", nullable=False)
     created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
     updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
@@ -63,6 +70,7 @@ class Play(SQLModel, table=True):
 class PlayImage(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     image_url: str = Field(nullable=False)
+    variants: Optional[List[dict]] = Field(default=None, sa_column=Column(JSON))
     caption_bg: Optional[str] = Field(default=None)
     caption_en: Optional[str] = Field(default=None)
     play_id: int = Field(foreign_key="play.id", nullable=False)
@@ -87,6 +95,9 @@ class LiteraryPiece(SQLModel, table=True):
     description_bg: str = Field(nullable=False)
     description_en: Optional[str] = Field(default=None)
     pdf_path: Optional[str] = Field(default=None)
+    pdf_page_count: Optional[int] = Field(default=None)
+    pdf_size: Optional[int] = Field(default=None)
+    pdf_preview_url: Optional[str] = Field(default=None)
     author_id: int = Field(foreign_key="author.id", nullable=False)
     play_id: Optional[int] = Field(default=None, foreign_key="play.id")
     created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
@@ -95,3 +106,90 @@ class LiteraryPiece(SQLModel, table=True):
     author: "Author" = Relationship(back_populates="literary_pieces")
     play: Optional["Play"] = Relationship(back_populates="literary_pieces")
 
+
+
+class CatalogueVersion(SQLModel, table=True):
+    """Single-row counter bumped by every admin write, used for HTTP validators."""
+
+    id: Optional[int] = Field(default=1, primary_key=True)
+    version: int = Field(default=0, nullable=False)
+    updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+
+
+class UploadJob(SQLModel, table=True):
+    """Admin upload accepted with 202 and processed by the background workers."""
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    kind: str = Field(nullable=False)
+    target_id: int = Field(nullable=False)
+    status: str = Field(default="queued", nullable=False, index=True)
+    attempts: int = Field(default=0, nullable=False)
+    spool_path: str = Field(nullable=False)
+    # Hashed while spooling, so the worker does not read the file twice
+    sha256: Optional[str] = Field(default=None)
+    size: Optional[int] = Field(default=None)
+    filename: Optional[str] = Field(default=None)
+    caption_bg: Optional[str] = Field(default=None)
+    caption_en: Optional[str] = Field(default=None)
+    result_url: Optional[str] = Field(default=None)
+    error: Optional[str] = Field(default=None)
+    created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+    updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+
+
+class AssetDeletion(SQLModel, table=True):
+    """Stored asset waiting to be deleted by the background worker."""
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    url: str = Field(nullable=False)
+    status: str = Field(default="pending", nullable=False, index=True)
+    attempts: int = Field(default=0, nullable=False)
+    next_attempt_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+    error: Optional[str] = Field(default=None)
+    created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+    updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+
+
+class StoredAsset(SQLModel, table=True):
+    """Uploaded file keyed by content hash, shared by every row that uses it."""
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    sha256: str = Field(nullable=False, index=True, sa_column_kwargs={"unique": True})
+    url: str = Field(nullable=False, index=True)
+    size: int = Field(default=0, nullable=False)
+    ref_count: int = Field(default=0, nullable=False)
+    variants: Optional[List[dict]] = Field(default=None, sa_column=Column(JSON))
+    page_count: Optional[int] = Field(default=None)  # PDFs only
+    created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+    updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+
+
+class IndexedDocument(SQLModel, table=True):
+    """Stored PDF whose text is extracted page by page for script search."""
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    url: str = Field(nullable=False, index=True, sa_column_kwargs={"unique": True})
+    status: str = Field(default="pending", nullable=False, index=True)
+    attempts: int = Field(default=0, nullable=False)
+    next_attempt_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+    page_count: Optional[int] = Field(default=None)
+    error: Optional[str] = Field(default=None)
+    created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+    updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+
+
+class DocumentPage(SQLModel, table=True):
+    """Text of one PDF page; full-text indexed on Postgres."""
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    document_id: int = Field(foreign_key="indexeddocument.id", nullable=False, index=True)
+    page_number: int = Field(nullable=False)
+    content: str = Field(nullable=False)
+
+
+class SchemaMigration(SQLModel, table=True):
+    """One applied step of app/migrations.py."""
+
+    version: int = Field(primary_key=True)
+    name: str = Field(nullable=False)
+    applied_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
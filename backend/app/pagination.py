@@ -0,0 +1,138 @@
+"""Keyset (cursor) pagination helpers for the public list endpoints."""
+
+import base64
+import json
+import time
+from threading import Lock
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Request, Response, status
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.types import TypeDecorator
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .core.config import get_settings
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+COUNT_CACHE_MAX_ENTRIES = 1024
+PAGINATION_PARAMS = {"limit", "cursor", "include_total"}
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+# (expression, descending) pairs; the last one must be unique (the primary key).
+OrderSpec = Sequence[Tuple[ColumnElement, bool]]
+
+_count_cache: Dict[str, Tuple[float, int]] = {}
+_count_cache_lock = Lock()
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the sort key of the last row into an opaque token."""
+    raw = json.dumps(list(values), ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _matches_type(value: Any, expression: ColumnElement) -> bool:
+    column_type = expression.type
+    if isinstance(column_type, TypeDecorator):  # e.g. SQLModel's AutoString
+        column_type = column_type.impl
+    try:
+        expected = column_type.python_type
+    except NotImplementedError:
+        return True
+    if isinstance(value, bool):
+        return expected is bool
+    if expected is float:
+        return isinstance(value, (int, float))
+    return isinstance(value, expected)
+
+
+def decode_cursor(token: str, order: OrderSpec) -> List[Any]:
+    """Decode a cursor token for ``order``.
+
+    Rejects malformed tokens and tokens whose values do not have the types
+    of the order columns; the values are not signed, so any other values of
+    the right types are accepted, as the user could filter on them anyway.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError):
+        values = None
+    if (
+        not isinstance(values, list)
+        or len(values) != len(order)
+        or not all(_matches_type(v, expression) for v, (expression, _) in zip(values, order))
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Невалиден курсор."
+        )
+    return values
+
+
+def _after(order: OrderSpec, values: Sequence[Any]) -> ColumnElement:
+    """Build ``(a, b, c) > (x, y, z)`` honouring per-column direction."""
+    clauses = []
+    for index, (expression, descending) in enumerate(order):
+        equal = [order[i][0] == values[i] for i in range(index)]
+        beyond = expression < values[index] if descending else expression > values[index]
+        clauses.append(and_(*equal, beyond))
+    return or_(*clauses)
+
+
+async def paginate(
+    session: AsyncSession,
+    query: Select,
+    order: OrderSpec,
+    limit: Optional[int],
+    cursor: Optional[str],
+) -> Tuple[List[Any], Optional[str]]:
+    """Return one page of ``query`` ordered by ``order`` and the next cursor."""
+    limit = limit or DEFAULT_PAGE_SIZE
+    if cursor:
+        query = query.where(_after(order, decode_cursor(cursor, order)))
+    query = query.order_by(
+        *(expression.desc() if descending else expression for expression, descending in order)
+    ).limit(limit + 1)
+    result = await session.execute(query.add_columns(*(expression for expression, _ in order)))
+    rows = result.all()
+    next_cursor = encode_cursor(rows[limit - 1][1:]) if len(rows) > limit else None
+    return [row[0] for row in rows[:limit]], next_cursor
+
+
+async def count_rows(session: AsyncSession, query: Select, request: Request) -> int:
+    """Count the rows matched by ``query``, cached per route and filter set."""
+    filters = sorted(
+        (key, value)
+        for key, value in request.query_params.multi_items()
+        if key not in PAGINATION_PARAMS
+    )
+    key = f"{request.url.path}?{filters}"
+    ttl = get_settings().count_cache_seconds
+    now = time.monotonic()
+    with _count_cache_lock:
+        cached = _count_cache.get(key)
+    if cached and cached[0] > now:
+        return cached[1]
+    result = await session.execute(
+        select(func.count()).select_from(query.order_by(None).subquery())
+    )
+    total = result.scalar_one()
+    with _count_cache_lock:
+        if len(_count_cache) >= COUNT_CACHE_MAX_ENTRIES:
+            _count_cache.clear()
+        _count_cache[key] = (now + ttl, total)
+    return total
+
+
+def set_page_headers(
+    response: Response, next_cursor: Optional[str], total: Optional[int]
+) -> None:
+    """Expose pagination metadata without changing the list response body."""
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    if total is not None:
+        response.headers[TOTAL_COUNT_HEADER] = str(total)
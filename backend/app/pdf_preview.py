@@ -0,0 +1,82 @@
+"""Page count and first-page preview of uploaded PDFs.
+
+Detail pages show these instead of downloading the whole script. The preview
+is a variant dict like those in app/images.py (``name == "preview"``), so it
+is reused by deduplicated uploads and deleted together with the PDF.
+"""
+
+import io
+import threading
+from typing import BinaryIO, List, Optional, Tuple
+
+import pypdfium2 as pdfium
+
+from .core.config import get_settings
+from .core.storage import StorageBackend
+
+PREVIEW_NAME = "preview"
+PREVIEW_QUALITY = 80
+# PDFium is not thread-safe, and PDFs are opened from the request threadpool,
+# the upload job workers and the text index worker: hold this around every
+# pdfium call, from opening a document until it is closed.
+PDFIUM_LOCK = threading.Lock()
+
+settings = get_settings()
+
+
+def describe_pdf(
+    backend: StorageBackend,
+    handle: BinaryIO,
+    url: str,
+    folder: str,
+    name_prefix: str,
+) -> Tuple[Optional[int], List[dict]]:
+    """Return ``(page_count, [preview variant])`` for the PDF at ``url``.
+
+    ``(None, [])`` for files pdfium cannot open. ``handle`` is rewound afterwards.
+    """
+    width = settings.pdf_preview_width
+    fmt = settings.image_variant_formats[0]
+    with PDFIUM_LOCK:
+        try:
+            document = pdfium.PdfDocument(handle)
+        except pdfium.PdfiumError:
+            handle.seek(0)
+            return None, []
+        try:
+            page_count = len(document)
+            if page_count == 0:
+                return 0, []
+            preview_url = backend.derived_url(url, width, fmt, page=1)
+            if preview_url is not None:
+                return page_count, [
+                    {"name": PREVIEW_NAME, "width": width, "format": fmt, "url": preview_url}
+                ]
+            page = document[0]
+            try:
+                image = page.render(scale=width / page.get_width()).to_pil()
+            finally:
+                page.close()
+        finally:
+            document.close()
+            handle.seek(0)
+
+    buffer = io.BytesIO()
+    image.convert("RGB").save(buffer, fmt.upper(), quality=PREVIEW_QUALITY)
+    buffer.seek(0)
+    preview_url = backend.upload(
+        buffer,
+        f"{folder}/previews",
+        name_prefix=f"{name_prefix}-{PREVIEW_NAME}",
+        filename=f"{PREVIEW_NAME}.{fmt}",
+    )
+    return page_count, [
+        {"name": PREVIEW_NAME, "width": image.width, "format": fmt, "url": preview_url, "stored": True}
+    ]
+
+
+def preview_url(variants: Optional[List[dict]]) -> Optional[str]:
+    for variant in variants or []:
+        if variant.get("name") == PREVIEW_NAME:
+            return variant["url"]
+    return None
@@ -0,0 +1,104 @@
+"""Per-request count and duration of database statements.
+
+Every engine in app/database.py is instrumented. :class:`QueryStatsMiddleware`
+reports the totals of each request in ``X-DB-Queries`` and ``Server-Timing``
+(visible in the browser's network panel), and :func:`count_queries` collects
+the statements run inside a block, for query budgets (see
+benchmarks/query_budgets.py).
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Generator, List, Optional, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy import event
+from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+
+DB_QUERIES_HEADER = "X-DB-Queries"
+
+
+@dataclass(eq=False)
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+    statements: Optional[List[str]] = None  # kept only by count_queries()
+
+    def add(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        if self.statements is not None:
+            self.statements.append(statement)
+
+
+_request_stats: ContextVar[Optional[QueryStats]] = ContextVar("request_query_stats", default=None)
+# count_queries() blocks: (stats, id of the thread that opened the block)
+_collectors: List[Tuple[QueryStats, int]] = []
+
+
+def _before_execute(_conn, _cursor, _statement, _parameters, context, _executemany) -> None:
+    context._query_started = time.perf_counter()
+
+
+def _after_execute(_conn, _cursor, statement, _parameters, context, _executemany) -> None:
+    elapsed = time.perf_counter() - context._query_started
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.add(statement, elapsed)
+    if not _collectors:
+        return
+    thread = threading.get_ident()
+    for collector, owner in _collectors:
+        if stats is not None or thread == owner:
+            collector.add(statement, elapsed)
+
+
+def instrument(sync_engine) -> None:
+    """Count the statements ``sync_engine`` runs (``engine.sync_engine`` for async ones)."""
+    event.listen(sync_engine, "before_cursor_execute", _before_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_execute)
+
+
+@contextmanager
+def count_queries() -> Generator[QueryStats, None, None]:
+    """Collect the statements run inside the block by requests and by the
+    calling thread; background workers (uploads, deletions, text index) are
+    left out.
+
+    Meant for scripts and tests driving the app with a TestClient, with
+    :class:`QueryStatsMiddleware` installed (``DB_TIMING_HEADERS``), which
+    marks request handling on whatever thread it runs::
+
+        with count_queries() as stats:
+            client.get("/api/library/")
+        assert stats.count <= 4, stats.statements
+    """
+    stats = QueryStats(statements=[])
+    collector = (stats, threading.get_ident())
+    _collectors.append(collector)
+    try:
+        yield stats
+    finally:
+        _collectors.remove(collector)
+
+
+class QueryStatsMiddleware(BaseHTTPMiddleware):
+    """Add the request's statement count and DB time to the response headers."""
+
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        stats = QueryStats()
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await call_next(request)
+        finally:
+            _request_stats.reset(token)
+        total_ms = (time.perf_counter() - started) * 1000
+        response.headers[DB_QUERIES_HEADER] = str(stats.count)
+        response.headers["Server-Timing"] = (
+            f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries", app;dur={total_ms:.1f}'
+        )
+        return response
@@ -0,0 +1,170 @@
+"""Routing of public reads to read replicas.
+
+Public GET endpoints take their session from :func:`get_read_session`, which
+rotates over the replicas in DATABASE_READ_URL. A replica that cannot be
+connected to is skipped for ``db_replica_retry_seconds`` (the next read after
+that probes it again); when no replica is usable, reads use the primary.
+
+Read-your-writes: while replicas are configured, admin responses carry the
+current catalogue version in ``X-Catalogue-Version``. The admin UI sends the
+highest version it has seen as ``X-Min-Catalogue-Version`` and replicas that
+have not replayed it yet are passed over for the primary. Public GETs then
+vary on that header (``Vary``), so shared caches keep lagged bodies apart.
+Background uploads (``?background=true``, app/upload_jobs.py) commit after
+the 202 is sent, so their result is not covered: the version the client
+saw predates the write, and a lagging replica may still be read until the
+admin UI sees a newer version from a later admin response.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import func
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+
+from .core.config import get_settings
+from .database import async_engine, display_url, read_engines
+from .models import CatalogueVersion
+
+CATALOGUE_VERSION_HEADER = "X-Catalogue-Version"
+MIN_VERSION_HEADER = "X-Min-Catalogue-Version"
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+@dataclass
+class Replica:
+    engine: AsyncEngine
+    retry_at: float = 0.0  # monotonic time before which the replica is skipped
+    failures: int = 0  # consecutive connection failures
+    last_error: Optional[str] = None
+    reads: int = 0
+    behind: int = 0  # reads sent to the primary because this replica lagged
+
+
+@dataclass
+class ReadStats:
+    primary_reads: int = 0  # no replica was usable for the request
+
+
+_replicas: List[Replica] = [Replica(engine=read_engine) for read_engine in read_engines]
+_turn = itertools.count()
+read_stats = ReadStats()
+
+
+def min_catalogue_version(request: Request) -> Optional[int]:
+    """Catalogue version the client has already seen, if it sent one."""
+    try:
+        return int(request.headers[MIN_VERSION_HEADER])
+    except (KeyError, ValueError):
+        return None
+
+
+async def _catalogue_version(session: AsyncSession) -> int:
+    return (await session.exec(select(func.max(CatalogueVersion.version)))).one() or 0
+
+
+def _mark_failed(replica: Replica, exc: BaseException) -> None:
+    replica.failures += 1
+    replica.last_error = f"{type(exc).__name__}: {exc}"
+    replica.retry_at = time.monotonic() + settings.db_replica_retry_seconds
+    logger.warning(
+        "Read replica %s unavailable, using the primary for %.0fs: %s",
+        display_url(replica.engine),
+        settings.db_replica_retry_seconds,
+        replica.last_error,
+    )
+
+
+async def _replica_session(min_version: Optional[int]) -> Optional[AsyncSession]:
+    """Connected session on the next healthy replica that is not behind
+    ``min_version``, or ``None``."""
+    if not _replicas:
+        return None
+    now = time.monotonic()
+    start = next(_turn)
+    for offset in range(len(_replicas)):
+        replica = _replicas[(start + offset) % len(_replicas)]
+        if replica.retry_at > now:
+            continue
+        session = AsyncSession(replica.engine)
+        try:
+            if min_version is None:
+                await session.connection()
+            elif await _catalogue_version(session) < min_version:
+                replica.behind += 1
+                await session.close()
+                continue
+        except PoolTimeoutError:
+            # Busy rather than broken: try the next one without marking it.
+            await session.close()
+            continue
+        except (DBAPIError, OSError, asyncio.TimeoutError) as exc:
+            await session.close()
+            _mark_failed(replica, exc)
+            continue
+        replica.failures = 0
+        replica.reads += 1
+        return session
+    return None
+
+
+async def get_read_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """FastAPI dependency for public reads: a replica session, or the primary."""
+    session = await _replica_session(min_catalogue_version(request))
+    if session is None:
+        if _replicas:
+            read_stats.primary_reads += 1
+        session = AsyncSession(async_engine)
+    async with session:
+        yield session
+
+
+def replica_status() -> Dict[str, Any]:
+    """Health and routing counters of the configured replicas."""
+    now = time.monotonic()
+    return {
+        "primary_reads": read_stats.primary_reads,
+        "replicas": [
+            {
+                "url": display_url(replica.engine),
+                "healthy": replica.retry_at <= now,
+                "retry_in_seconds": max(replica.retry_at - now, 0.0),
+                "failures": replica.failures,
+                "last_error": replica.last_error,
+                "reads": replica.reads,
+                "behind": replica.behind,
+            }
+            for replica in _replicas
+        ],
+    }
+
+
+class CatalogueVersionMiddleware(BaseHTTPMiddleware):
+    """Tell admin clients which catalogue version their request left behind,
+    and mark public reads as varying on the version they asked for."""
+
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        response = await call_next(request)
+        if not _replicas:
+            return response
+        if request.url.path.startswith("/api/admin"):
+            if response.status_code < 400:
+                async with AsyncSession(async_engine) as session:
+                    version = await _catalogue_version(session)
+                response.headers[CATALOGUE_VERSION_HEADER] = str(version)
+        elif request.method == "GET" and request.url.path.startswith("/api/"):
+            vary = response.headers.get("vary")
+            response.headers["Vary"] = f"{vary}, {MIN_VERSION_HEADER}" if vary else MIN_VERSION_HEADER
+        return response
@@ -0,0 +1,194 @@
+"""In-process cache of serialized public catalogue responses.
+
+Entries are keyed by path plus normalized query string and tagged with the
+resources they contain (``"plays"``, ``"play:3"``, ``"author:1"`` ...). Admin
+writes invalidate the affected tags after committing. A response is not
+stored if an invalidation happened while it was built, or if its ETag is
+older than the last catalogue version written through this worker (a
+replica that has not caught up yet). The cache is per worker, so the TTL
+bounds how stale another worker's copy can get.
+"""
+
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Dict, Iterable, Optional, Set
+
+from fastapi import Request, Response
+from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+
+from .core.config import get_settings
+from .http_cache import is_not_modified
+from .replicas import min_catalogue_version
+
+_CACHEABLE_PATH = re.compile(r"^/api/(plays|authors|library)/(\d+)?$")
+_COLLECTION_TAGS = {"plays": "plays", "authors": "authors", "library": "library"}
+_ITEM_TAGS = {"plays": "play", "authors": "author", "library": "piece"}
+
+
+@dataclass
+class CacheEntry:
+    body: bytes
+    headers: Dict[str, str]
+    tags: Set[str]
+    expires_at: float
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+
+@dataclass
+class ResponseCache:
+    """Bounded LRU + TTL cache of response bodies with tag invalidation."""
+
+    max_entries: int
+    max_bytes: int
+    ttl_seconds: float
+    stats: CacheStats = field(default_factory=CacheStats)
+    generation: int = 0
+    # Highest catalogue version committed by this worker's admin writes
+    min_version: int = 0
+    _entries: "OrderedDict[str, CacheEntry]" = field(default_factory=OrderedDict)
+    _size: int = 0
+    _lock: Lock = field(default_factory=Lock)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return entry
+
+    def set(
+        self, key: str, body: bytes, headers: Dict[str, str], tags: Set[str], generation: int
+    ) -> None:
+        """Store a response unless an invalidation happened since ``generation``
+        or it shows a catalogue version older than ``min_version``."""
+        if len(body) > self.max_bytes:
+            return
+        version = _etag_version(headers)
+        with self._lock:
+            if generation != self.generation:
+                return
+            if version is None or version < self.min_version:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = CacheEntry(
+                body, headers, tags, time.monotonic() + self.ttl_seconds
+            )
+            self._size += len(body)
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.stats.evictions += 1
+
+    def invalidate(self, tags: Iterable[str], version: Optional[int] = None) -> None:
+        """Drop entries with any of ``tags``; ``version`` is the catalogue
+        version the write committed, below which nothing is stored again."""
+        tags = set(tags)
+        with self._lock:
+            self.generation += 1
+            if version is not None:
+                self.min_version = max(self.min_version, version)
+            for key in [k for k, e in self._entries.items() if e.tags & tags]:
+                self._remove(key)
+                self.stats.invalidations += 1
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.stats.hits + self.stats.misses
+            return {
+                **self.stats.__dict__,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hit_ratio": round(self.stats.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._size -= len(entry.body)
+
+
+settings = get_settings()
+response_cache = ResponseCache(
+    max_entries=settings.response_cache_max_entries,
+    max_bytes=settings.response_cache_max_bytes,
+    ttl_seconds=settings.response_cache_ttl_seconds,
+)
+
+
+def _cache_key(request: Request) -> str:
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    return f"{request.url.path}?{query}"
+
+
+def _tags_for(collection: str, item_id: Optional[str]) -> Set[str]:
+    if item_id is None:
+        return {_COLLECTION_TAGS[collection]}
+    return {f"{_ITEM_TAGS[collection]}:{item_id}"}
+
+
+class ResponseCacheMiddleware(BaseHTTPMiddleware):
+    """Serve cached public catalogue GETs, including conditional 304s."""
+
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        match = _CACHEABLE_PATH.match(request.url.path)
+        if request.method != "GET" or not match or response_cache.max_entries <= 0:
+            return await call_next(request)
+
+        key = _cache_key(request)
+        entry = response_cache.get(key)
+        if entry is not None and _older_than(entry, min_catalogue_version(request)):
+            # Read-your-writes: the client has seen a newer catalogue (app/replicas.py).
+            entry = None
+        if entry is not None:
+            etag, last_modified = entry.headers.get("etag"), entry.headers.get("last-modified")
+            if is_not_modified(request, etag, last_modified):
+                return Response(status_code=304, headers=_validator_headers(entry.headers))
+            return Response(content=entry.body, status_code=200, headers=entry.headers)
+
+        generation = response_cache.generation
+        response = await call_next(request)
+        if response.status_code != 200:
+            return response
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        headers = dict(response.headers)
+        response_cache.set(key, body, headers, _tags_for(*match.groups()), generation)
+        return Response(content=body, status_code=200, headers=headers)
+
+
+def _etag_version(headers: Dict[str, str]) -> Optional[int]:
+    """Catalogue version in a response's ETag, ``None`` if it has none."""
+    # ETags are '"<catalogue version>-<digest>"' (see app/http_cache.py)
+    version = headers.get("etag", "").strip('"').split("-", 1)[0]
+    return int(version) if version.isdigit() else None
+
+
+def _older_than(entry: CacheEntry, version: Optional[int]) -> bool:
+    if version is None:
+        return False
+    cached_version = _etag_version(entry.headers)
+    return cached_version is None or cached_version < version
+
+
+def _validator_headers(headers: Dict[str, str]) -> Dict[str, str]:
+    return {k: v for k, v in headers.items() if k in ("etag", "last-modified", "cache-control")}
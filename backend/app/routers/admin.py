@@ -1,7 +1,8 @@
 """Admin endpoints protected by token."""
 
+import asyncio
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Union
 
 from fastapi import (
     APIRouter,
@@ -9,16 +10,27 @@ from fastapi import (
     File,
     Form,
     HTTPException,
+    Query,
     UploadFile,
     status,
 )
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
 
-from ..core.cloudinary_service import delete_file, upload_file
+from ..asset_deletions import queue_deletion
+from ..catalogue import author_tags, commit_change, piece_tags, play_tags
+from ..core.asset_cache import asset_cache
+from ..core.config import get_settings
+from ..core.file_proxy import proxy_stats
 from ..core.security import admin_required, create_access_token, verify_admin_password
-from ..database import get_session
-from ..models import Author, LiteraryPiece, Play, PlayFile, PlayImage
+from ..database import get_session, pool_stats
+from ..document_text import queue_text_extraction
+from ..models import Author, LiteraryPiece, Play, PlayFile, PlayImage, UploadJob
+from ..replicas import replica_status
+from ..response_cache import response_cache
 from ..schemas import (
     AdminLoginRequest,
     AuthorCreate,
@@ -28,6 +40,7 @@ from ..schemas import (
     LiteraryPieceRead,
     LiteraryPieceUpdate,
     PlayCreate,
+    PlayBatchUploadResult,
     PlayDetail,
     PlayFileCaptionUpdate,
     PlayFileRead,
@@ -36,10 +49,22 @@ from ..schemas import (
     PlayRead,
     PlayUpdate,
     TokenResponse,
+    UploadFailure,
+    UploadJobRead,
+)
+from ..upload_jobs import (
+    TERMINAL_STATUSES,
+    attach_gallery,
+    attach_upload,
+    enqueue_upload,
+    get_job,
+    upload_for,
+    upload_many,
 )
 
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
+settings = get_settings()
 
 
 def _play_with_relations(session: Session, play_id: int) -> Optional[Play]:
@@ -54,6 +79,29 @@ def _play_with_relations(session: Session, play_id: int) -> Optional[Play]:
     ).first()
 
 
+def _forget_pdf_details(target: Union[Play, LiteraryPiece]) -> None:
+    # Page count and preview belong to the uploaded PDF, not to a hand-entered path
+    target.pdf_page_count = None
+    target.pdf_size = None
+    target.pdf_preview_url = None
+
+
+def _accepted(job: UploadJob) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=jsonable_encoder(UploadJobRead.from_orm(job)),
+        headers={"Location": f"{router.prefix}/upload-jobs/{job.id}"},
+    )
+
+
+def _require_job(job: Optional[UploadJob]) -> UploadJob:
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Задачата не е намерена."
+        )
+    return job
+
+
 @router.post("/login", response_model=TokenResponse)
 def admin_login(payload: AdminLoginRequest) -> TokenResponse:
     if not verify_admin_password(payload.password):
@@ -62,6 +110,23 @@ def admin_login(payload: AdminLoginRequest) -> TokenResponse:
     return TokenResponse(access_token=token)
 
 
+@router.get("/cache/stats")
+def cache_stats(_: str = Depends(admin_required)) -> dict:
+    """Hit/miss/eviction counters of this worker's caches and download proxy."""
+    return {
+        "responses": response_cache.snapshot(),
+        "assets": asset_cache.snapshot(),
+        "downloads": dict(proxy_stats),
+    }
+
+
+@router.get("/db/pool")
+def db_pool_stats(_: str = Depends(admin_required)) -> dict:
+    """Connection pool state of this worker (sync, async and replica engines):
+    checked out, overflow, checkout waits, plus replica health."""
+    return {**pool_stats(), "read_routing": replica_status()}
+
+
 @router.post("/authors", response_model=AuthorRead)
 def create_author(
     author_in: AuthorCreate,
@@ -71,7 +136,7 @@ def create_author(
     # Pydantic v1: use .dict() instead of .model_dump()
     author = Author(**author_in.dict())
     session.add(author)
-    session.commit()
+    commit_change(session, {"authors"})
     session.refresh(author)
     # Pydantic v1: use from_orm with orm_mode
     return AuthorRead.from_orm(author)
@@ -89,12 +154,16 @@ def update_author(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Авторът не е намерен."
         )
+    previous_photo_url = author.photo_url
     # Pydantic v1: use .dict(exclude_unset=True)
     for key, value in author_in.dict(exclude_unset=True).items():
         setattr(author, key, value)
+    if author.photo_url != previous_photo_url:
+        # Variants belong to the uploaded photo, not to a hand-entered URL
+        author.photo_variants = None
     author.updated_at = datetime.utcnow()
     session.add(author)
-    session.commit()
+    commit_change(session, author_tags(author))
     session.refresh(author)
     return AuthorRead.from_orm(author)
 
@@ -113,11 +182,9 @@ def delete_author(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Изтрийте или преместете пиесите на автора преди тази операция.",
         )
-    # Delete photo from Cloudinary if it exists
-    if author.photo_url and author.photo_url.startswith("https://res.cloudinary.com"):
-        delete_file(author.photo_url)
+    queue_deletion(session, author.photo_url)
     session.delete(author)
-    session.commit()
+    commit_change(session, author_tags(author))
 
 
 @router.post("/plays", response_model=PlayDetail)
@@ -129,11 +196,12 @@ def create_play(
     # Pydantic v1: use .dict(exclude=...)
     play = Play(**play_in.dict(exclude={"image_urls"}))
     session.add(play)
-    session.commit()
+    queue_text_extraction(session, play.pdf_path)
+    commit_change(session, {"plays", f"author:{play.author_id}"})
     if play_in.image_urls:
         for url in play_in.image_urls:
             session.add(PlayImage(play_id=play.id, image_url=url))
-        session.commit()
+        commit_change(session, {f"play:{play.id}"})
     enriched = _play_with_relations(session, play.id) or play
     return PlayDetail.from_orm(enriched)
 
@@ -150,23 +218,27 @@ def update_play(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Пиесата не е намерена."
         )
+    previous_author_id = play.author_id
+    previous_pdf_path = play.pdf_path
     # Pydantic v1: use .dict(exclude_unset=True, ...)
     update_data = play_in.dict(exclude_unset=True, exclude={"image_urls"})
     for key, value in update_data.items():
         setattr(play, key, value)
+    if play.pdf_path != previous_pdf_path:
+        _forget_pdf_details(play)
+        queue_text_extraction(session, play.pdf_path)
     play.updated_at = datetime.utcnow()
     session.add(play)
-    session.commit()
+    commit_change(session, play_tags(play, previous_author_id))
     if play_in.image_urls is not None:
-        # Delete old images from Cloudinary before removing from database
+        # Queue old images for deletion from Cloudinary with the DB change
         old_images = session.query(PlayImage).filter(PlayImage.play_id == play.id).all()  # type: ignore[attr-defined]
         for old_image in old_images:
-            if old_image.image_url.startswith("https://res.cloudinary.com"):
-                delete_file(old_image.image_url)
+            queue_deletion(session, old_image.image_url)
         session.query(PlayImage).filter(PlayImage.play_id == play.id).delete()  # type: ignore[attr-defined]
         for url in play_in.image_urls:
             session.add(PlayImage(play_id=play.id, image_url=url))
-        session.commit()
+        commit_change(session, {f"play:{play.id}"})
     enriched = _play_with_relations(session, play.id) or play
     return PlayDetail.from_orm(enriched)
 
@@ -180,25 +252,25 @@ def delete_play(
     play = session.get(Play, play_id)
     if not play:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Пиесата не е намерена.")
-    # Delete PDF from Cloudinary if it exists
-    if play.pdf_path and play.pdf_path.startswith("https://res.cloudinary.com"):
-        delete_file(play.pdf_path)
-    # Delete images from Cloudinary
+    # Queue the PDF, images and files for deletion from Cloudinary
+    queue_deletion(session, play.pdf_path)
     for image in play.images:
-        if image.image_url.startswith("https://res.cloudinary.com"):
-            delete_file(image.image_url)
-    # Delete files from Cloudinary
+        queue_deletion(session, image.image_url)
     for f in play.files:
-        if f.file_url.startswith("https://res.cloudinary.com"):
-            delete_file(f.file_url)
+        queue_deletion(session, f.file_url)
     session.delete(play)
-    session.commit()
+    commit_change(session, play_tags(play))
 
 
-@router.post("/authors/{author_id}/upload-photo", response_model=AuthorRead)
+@router.post(
+    "/authors/{author_id}/upload-photo",
+    response_model=AuthorRead,
+    responses={202: {"model": UploadJobRead}},
+)
 def upload_author_photo(
     author_id: int,
     file: UploadFile = File(...),
+    background: bool = Query(False),
     session: Session = Depends(get_session),
     _: str = Depends(admin_required),
 ) -> AuthorRead:
@@ -207,23 +279,23 @@ def upload_author_photo(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Авторът не е намерен."
         )
-    # Delete old photo from Cloudinary if it exists
-    if author.photo_url and author.photo_url.startswith("https://res.cloudinary.com"):
-        delete_file(author.photo_url)
-    # Upload to Cloudinary
-    cloudinary_url = upload_file(file, "authors", name_prefix=f"author-{author_id}")
-    author.photo_url = cloudinary_url
-    author.updated_at = datetime.utcnow()
-    session.add(author)
-    session.commit()
+    if background:
+        return _accepted(enqueue_upload(session, "author_photo", author.id, file))
+    stored = upload_for("author_photo", author.id, file)
+    attach_upload(session, "author_photo", author, stored)
     session.refresh(author)
     return AuthorRead.from_orm(author)
 
 
-@router.post("/plays/{play_id}/upload-pdf", response_model=PlayRead)
+@router.post(
+    "/plays/{play_id}/upload-pdf",
+    response_model=PlayRead,
+    responses={202: {"model": UploadJobRead}},
+)
 def upload_play_pdf(
     play_id: int,
     file: UploadFile = File(...),
+    background: bool = Query(False),
     session: Session = Depends(get_session),
     _: str = Depends(admin_required),
 ) -> PlayRead:
@@ -232,25 +304,25 @@ def upload_play_pdf(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Пиесата не е намерена."
         )
-    # Delete old PDF from Cloudinary if it exists
-    if play.pdf_path and play.pdf_path.startswith("https://res.cloudinary.com"):
-        delete_file(play.pdf_path)
-    # Upload to Cloudinary
-    cloudinary_url = upload_file(file, "pdfs", name_prefix=f"play-{play_id}-script")
-    play.pdf_path = cloudinary_url
-    play.updated_at = datetime.utcnow()
-    session.add(play)
-    session.commit()
+    if background:
+        return _accepted(enqueue_upload(session, "play_pdf", play.id, file))
+    stored = upload_for("play_pdf", play.id, file)
+    attach_upload(session, "play_pdf", play, stored)
     enriched = _play_with_relations(session, play.id) or play
     return PlayRead.from_orm(enriched)
 
 
-@router.post("/plays/{play_id}/upload-image", response_model=PlayDetail)
+@router.post(
+    "/plays/{play_id}/upload-image",
+    response_model=PlayDetail,
+    responses={202: {"model": UploadJobRead}},
+)
 def upload_play_image(
     play_id: int,
     file: UploadFile = File(...),
     caption_bg: Optional[str] = Form(None),
     caption_en: Optional[str] = Form(None),
+    background: bool = Query(False),
     session: Session = Depends(get_session),
     _: str = Depends(admin_required),
 ) -> PlayDetail:
@@ -260,17 +332,12 @@ def upload_play_image(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Пиесата не е намерена."
         )
-    cloudinary_url = upload_file(file, "images", name_prefix=f"play-{play_id}")
-    session.add(
-        PlayImage(
-            play_id=play.id,
-            image_url=cloudinary_url,
-            caption_bg=caption_bg.strip() if caption_bg and caption_bg.strip() else None,
-            caption_en=caption_en.strip() if caption_en and caption_en.strip() else None,
+    if background:
+        return _accepted(
+            enqueue_upload(session, "play_image", play.id, file, caption_bg, caption_en)
         )
-    )
-    play.updated_at = datetime.utcnow()
-    session.commit()
+    stored = upload_for("play_image", play.id, file)
+    attach_upload(session, "play_image", play, stored, caption_bg, caption_en)
     enriched = _play_with_relations(session, play.id) or play
     return PlayDetail.from_orm(enriched)
 
@@ -287,18 +354,22 @@ def delete_play_image(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Изображението не е намерено."
         )
-    if image.image_url.startswith("https://res.cloudinary.com"):
-        delete_file(image.image_url)
+    queue_deletion(session, image.image_url)
     session.delete(image)
-    session.commit()
+    commit_change(session, {f"play:{play_id}"})
 
 
-@router.post("/plays/{play_id}/upload-file", response_model=PlayDetail)
+@router.post(
+    "/plays/{play_id}/upload-file",
+    response_model=PlayDetail,
+    responses={202: {"model": UploadJobRead}},
+)
 def upload_play_file(
     play_id: int,
     file: UploadFile = File(...),
     caption_bg: Optional[str] = Form(None),
     caption_en: Optional[str] = Form(None),
+    background: bool = Query(False),
     session: Session = Depends(get_session),
     _: str = Depends(admin_required),
 ) -> PlayDetail:
@@ -308,21 +379,80 @@ def upload_play_file(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Пиесата не е намерена."
         )
-    cloudinary_url = upload_file(file, "files", name_prefix=f"play-{play_id}")
-    session.add(
-        PlayFile(
-            play_id=play.id,
-            file_url=cloudinary_url,
-            caption_bg=caption_bg.strip() if caption_bg and caption_bg.strip() else None,
-            caption_en=caption_en.strip() if caption_en and caption_en.strip() else None,
+    if background:
+        return _accepted(
+            enqueue_upload(session, "play_file", play.id, file, caption_bg, caption_en)
         )
-    )
-    play.updated_at = datetime.utcnow()
-    session.commit()
+    stored = upload_for("play_file", play.id, file)
+    attach_upload(session, "play_file", play, stored, caption_bg, caption_en)
     enriched = _play_with_relations(session, play.id) or play
     return PlayDetail.from_orm(enriched)
 
 
+def _upload_gallery(
+    session: Session,
+    play_id: int,
+    kind: str,
+    files: List[UploadFile],
+    captions_bg: List[str],
+    captions_en: List[str],
+) -> PlayBatchUploadResult:
+    play = session.get(Play, play_id)
+    if not play:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Пиесата не е намерена."
+        )
+    if len(files) > settings.max_batch_files:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Могат да се качат най-много {settings.max_batch_files} файла наведнъж.",
+        )
+    items = []
+    failures = []
+    for index, (upload, result) in enumerate(zip(files, upload_many(kind, play.id, files))):
+        if isinstance(result, Exception):
+            detail = (
+                result.detail
+                if isinstance(result, HTTPException)
+                else "Качването е неуспешно."
+            )
+            failures.append(UploadFailure(filename=upload.filename, detail=detail))
+            continue
+        caption_bg = captions_bg[index] if index < len(captions_bg) else None
+        caption_en = captions_en[index] if index < len(captions_en) else None
+        items.append((result, caption_bg, caption_en))
+    if items:
+        attach_gallery(session, kind, play, items)
+    enriched = _play_with_relations(session, play.id) or play
+    return PlayBatchUploadResult(play=PlayDetail.from_orm(enriched), failures=failures)
+
+
+@router.post("/plays/{play_id}/upload-images", response_model=PlayBatchUploadResult)
+def upload_play_images(
+    play_id: int,
+    files: List[UploadFile] = File(...),
+    captions_bg: List[str] = Form([]),
+    captions_en: List[str] = Form([]),
+    session: Session = Depends(get_session),
+    _: str = Depends(admin_required),
+) -> PlayBatchUploadResult:
+    """Upload many images at once; captions are matched to files by position."""
+    return _upload_gallery(session, play_id, "play_image", files, captions_bg, captions_en)
+
+
+@router.post("/plays/{play_id}/upload-files", response_model=PlayBatchUploadResult)
+def upload_play_files(
+    play_id: int,
+    files: List[UploadFile] = File(...),
+    captions_bg: List[str] = Form([]),
+    captions_en: List[str] = Form([]),
+    session: Session = Depends(get_session),
+    _: str = Depends(admin_required),
+) -> PlayBatchUploadResult:
+    """Upload many files at once; captions are matched to files by position."""
+    return _upload_gallery(session, play_id, "play_file", files, captions_bg, captions_en)
+
+
 @router.delete("/plays/{play_id}/files/{file_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_play_file(
     play_id: int,
@@ -335,10 +465,9 @@ def delete_play_file(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Файлът не е намерен."
         )
-    if f.file_url.startswith("https://res.cloudinary.com"):
-        delete_file(f.file_url)
+    queue_deletion(session, f.file_url)
     session.delete(f)
-    session.commit()
+    commit_change(session, {f"play:{play_id}"})
 
 
 @router.patch("/plays/{play_id}/files/{file_id}", response_model=PlayFileRead)
@@ -359,7 +488,7 @@ def update_play_file_caption(
     if payload.caption_en is not None:
         f.caption_en = payload.caption_en or None
     session.add(f)
-    session.commit()
+    commit_change(session, {f"play:{play_id}"})
     session.refresh(f)
     return PlayFileRead.from_orm(f)
 
@@ -372,7 +501,8 @@ def create_literary_piece(
 ) -> LiteraryPieceRead:
     piece = LiteraryPiece(**piece_in.dict())
     session.add(piece)
-    session.commit()
+    queue_text_extraction(session, piece.pdf_path)
+    commit_change(session, {"library"})
     session.refresh(piece)
     piece = session.exec(
         select(LiteraryPiece)
@@ -398,11 +528,15 @@ def update_literary_piece(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Литературното произведение не е намерено.",
         )
+    previous_pdf_path = piece.pdf_path
     for key, value in piece_in.dict(exclude_unset=True).items():
         setattr(piece, key, value)
+    if piece.pdf_path != previous_pdf_path:
+        _forget_pdf_details(piece)
+        queue_text_extraction(session, piece.pdf_path)
     piece.updated_at = datetime.utcnow()
     session.add(piece)
-    session.commit()
+    commit_change(session, piece_tags(piece))
     piece = session.exec(
         select(LiteraryPiece)
         .where(LiteraryPiece.id == piece_id)
@@ -426,16 +560,20 @@ def delete_literary_piece(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Литературното произведение не е намерено.",
         )
-    if piece.pdf_path and piece.pdf_path.startswith("https://res.cloudinary.com"):
-        delete_file(piece.pdf_path)
+    queue_deletion(session, piece.pdf_path)
     session.delete(piece)
-    session.commit()
+    commit_change(session, piece_tags(piece))
 
 
-@router.post("/library/{piece_id}/upload-pdf", response_model=LiteraryPieceRead)
+@router.post(
+    "/library/{piece_id}/upload-pdf",
+    response_model=LiteraryPieceRead,
+    responses={202: {"model": UploadJobRead}},
+)
 def upload_literary_piece_pdf(
     piece_id: int,
     file: UploadFile = File(...),
+    background: bool = Query(False),
     session: Session = Depends(get_session),
     _: str = Depends(admin_required),
 ) -> LiteraryPieceRead:
@@ -445,13 +583,10 @@ def upload_literary_piece_pdf(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Литературното произведение не е намерено.",
         )
-    if piece.pdf_path and piece.pdf_path.startswith("https://res.cloudinary.com"):
-        delete_file(piece.pdf_path)
-    cloudinary_url = upload_file(file, "pdfs", name_prefix=f"piece-{piece_id}")
-    piece.pdf_path = cloudinary_url
-    piece.updated_at = datetime.utcnow()
-    session.add(piece)
-    session.commit()
+    if background:
+        return _accepted(enqueue_upload(session, "piece_pdf", piece.id, file))
+    stored = upload_for("piece_pdf", piece.id, file)
+    attach_upload(session, "piece_pdf", piece, stored)
     piece = session.exec(
         select(LiteraryPiece)
         .where(LiteraryPiece.id == piece_id)
@@ -481,7 +616,41 @@ def update_play_image_caption(
     if payload.caption_en is not None:
         image.caption_en = payload.caption_en or None
     session.add(image)
-    session.commit()
+    commit_change(session, {f"play:{play_id}"})
     session.refresh(image)
     return PlayImageRead.from_orm(image)
 
+
+@router.get("/upload-jobs/{job_id}", response_model=UploadJobRead)
+def get_upload_job(
+    job_id: int,
+    session: Session = Depends(get_session),
+    _: str = Depends(admin_required),
+) -> UploadJobRead:
+    return UploadJobRead.from_orm(_require_job(session.get(UploadJob, job_id)))
+
+
+@router.get("/upload-jobs/{job_id}/events")
+async def stream_upload_job(
+    job_id: int,
+    _: str = Depends(admin_required),
+) -> StreamingResponse:
+    """Server-sent events with the job state, until it succeeds or fails."""
+    job = _require_job(await run_in_threadpool(get_job, job_id))
+
+    async def events():
+        nonlocal job
+        last = None
+        while True:
+            payload = UploadJobRead.from_orm(job).json()
+            if payload != last:
+                yield f"event: status\ndata: {payload}\n\n"
+                last = payload
+            if job.status in TERMINAL_STATUSES:
+                return
+            await asyncio.sleep(1.0)
+            job = await run_in_threadpool(get_job, job_id) or job
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"}
+    )
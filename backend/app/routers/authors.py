@@ -2,57 +2,78 @@
 
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import func, or_
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import selectinload
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from ..database import get_session
+from ..http_cache import catalogue_validators
 from ..models import Author, Play
+from ..pagination import MAX_PAGE_SIZE, count_rows, paginate, set_page_headers
+from ..replicas import get_read_session
 from ..schemas import AuthorDetail, AuthorRead, PlayRead
+from ..search import apply_search
+from ..serialization import orm_json_response
 
 
 router = APIRouter(prefix="/api/authors", tags=["authors"])
 
 
-@router.get("/", response_model=List[AuthorRead])
-def list_authors(
-    search: Optional[str] = Query(default=None, description="Търсене по име"),
-    session: Session = Depends(get_session),
-) -> List[AuthorRead]:
+@router.get(
+    "/",
+    response_model=List[AuthorRead],
+    dependencies=[Depends(catalogue_validators)],
+)
+async def list_authors(
+    request: Request,
+    response: Response,
+    search: Optional[str] = Query(default=None, description="Търсене по име и биография"),
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE, description="Размер на страница"),
+    cursor: Optional[str] = Query(default=None, description="Курсор за следваща страница"),
+    include_total: bool = Query(default=False, description="Включи общия брой в X-Total-Count"),
+    session: AsyncSession = Depends(get_read_session),
+) -> Response:
     query = select(Author)
+    rank = None
     if search:
-        search_value = f"%{search.lower()}%"
-        query = query.where(func.lower(Author.name).like(search_value))
-    authors = session.exec(query.order_by(Author.name)).all()
-    return [AuthorRead.from_orm(author) for author in authors]
+        query, rank = apply_search(session, query, Author, search)
+    if limit is not None or cursor is not None:
+        order = [(Author.name, False), (Author.id, False)]
+        if rank is not None:
+            order.insert(0, (rank, True))
+        total = await count_rows(session, query, request) if include_total else None
+        authors, next_cursor = await paginate(session, query, order, limit, cursor)
+        set_page_headers(response, next_cursor, total)
+        return orm_json_response(AuthorRead, authors, response)
+    if rank is not None:
+        query = query.order_by(rank.desc())
+    authors = (await session.exec(query.order_by(Author.name))).all()
+    return orm_json_response(AuthorRead, authors, response)
 
 
-@router.get("/{author_id}", response_model=AuthorDetail)
-def get_author(
+@router.get(
+    "/{author_id}",
+    response_model=AuthorDetail,
+    dependencies=[Depends(catalogue_validators)],
+)
+async def get_author(
     author_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     play_search: Optional[str] = Query(default=None, alias="playSearch"),
 ) -> AuthorDetail:
-    author = session.exec(
-        select(Author)
-        .where(Author.id == author_id)
-        .options(selectinload(Author.plays))
-    ).first()
+    author = (await session.exec(select(Author).where(Author.id == author_id))).first()
     if not author:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Авторът не е намерен."
         )
-    plays_query = select(Play).where(Play.author_id == author.id)
+    plays_query = (
+        select(Play).where(Play.author_id == author.id).options(selectinload(Play.author))
+    )
     if play_search:
-        pattern = f"%{play_search.lower()}%"
-        plays_query = plays_query.where(
-            or_(
-                func.lower(Play.title_bg).like(pattern),
-                (Play.title_en.isnot(None)) & (func.lower(Play.title_en).like(pattern)),
-            )
-        )
-    plays = session.exec(plays_query.order_by(Play.title_bg)).all()
+        plays_query, rank = apply_search(session, plays_query, Play, play_search)
+        if rank is not None:
+            plays_query = plays_query.order_by(rank.desc())
+    plays = (await session.exec(plays_query.order_by(Play.title_bg))).all()
     author_dict = AuthorRead.from_orm(author).dict()
     author_dict["plays"] = [PlayRead.from_orm(play) for play in plays]
     return AuthorDetail.parse_obj(author_dict)
@@ -3,17 +3,22 @@
 from pathlib import Path
 from typing import List, Optional
 
-import httpx
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from fastapi.responses import FileResponse, RedirectResponse, Response
-from sqlalchemy import func, or_
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import Response
 from sqlalchemy.orm import selectinload
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from ..core.config import get_settings
-from ..database import get_session
-from ..models import LiteraryPiece
+from ..core.file_proxy import local_file_response, serve_stored_file
+from ..core.storage import storage_for_url
+from ..http_cache import catalogue_validators
+from ..models import LiteraryPiece, Play
+from ..pagination import MAX_PAGE_SIZE, count_rows, paginate, set_page_headers
+from ..replicas import get_read_session
 from ..schemas import LiteraryPieceRead
+from ..search import apply_search
+from ..serialization import orm_json_response
 
 settings = get_settings()
 
@@ -21,59 +26,64 @@ settings = get_settings()
 router = APIRouter(prefix="/api/library", tags=["library"])
 
 
-@router.get("/", response_model=List[LiteraryPieceRead])
-def list_literary_pieces(
-    search: Optional[str] = Query(default=None, description="Търсене по заглавие"),
+@router.get(
+    "/",
+    response_model=List[LiteraryPieceRead],
+    dependencies=[Depends(catalogue_validators)],
+)
+async def list_literary_pieces(
+    request: Request,
+    response: Response,
+    search: Optional[str] = Query(default=None, description="Търсене по заглавие и описание"),
     author_id: Optional[int] = Query(default=None, description="Филтър по автор"),
     play_id: Optional[int] = Query(default=None, description="Филтър по пиеса"),
-    session: Session = Depends(get_session),
-) -> List[LiteraryPieceRead]:
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE, description="Размер на страница"),
+    cursor: Optional[str] = Query(default=None, description="Курсор за следваща страница"),
+    include_total: bool = Query(default=False, description="Включи общия брой в X-Total-Count"),
+    session: AsyncSession = Depends(get_read_session),
+) -> Response:
     query = select(LiteraryPiece).options(
         selectinload(LiteraryPiece.author),
-        selectinload(LiteraryPiece.play),
+        selectinload(LiteraryPiece.play).selectinload(Play.author),
     )
+    rank = None
     if search:
-        pattern = f"%{search.lower()}%"
-        query = query.where(
-            or_(
-                func.lower(LiteraryPiece.title_bg).like(pattern),
-                (LiteraryPiece.title_en.isnot(None))
-                & (func.lower(LiteraryPiece.title_en).like(pattern)),
-            )
-        )
+        query, rank = apply_search(session, query, LiteraryPiece, search)
     if author_id:
         query = query.where(LiteraryPiece.author_id == author_id)
     if play_id is not None:
         query = query.where(LiteraryPiece.play_id == play_id)
-    pieces = session.exec(query.order_by(LiteraryPiece.title_bg)).all()
-    return [LiteraryPieceRead.from_orm(p) for p in pieces]
+    if limit is not None or cursor is not None:
+        order = [(LiteraryPiece.title_bg, False), (LiteraryPiece.id, False)]
+        if rank is not None:
+            order.insert(0, (rank, True))
+        total = await count_rows(session, query, request) if include_total else None
+        pieces, next_cursor = await paginate(session, query, order, limit, cursor)
+        set_page_headers(response, next_cursor, total)
+        return orm_json_response(LiteraryPieceRead, pieces, response)
+    if rank is not None:
+        query = query.order_by(rank.desc())
+    pieces = (await session.exec(query.order_by(LiteraryPiece.title_bg))).all()
+    return orm_json_response(LiteraryPieceRead, pieces, response)
 
 
 @router.get("/{piece_id}/download-pdf")
-def download_literary_piece_pdf(
-    piece_id: int, session: Session = Depends(get_session)
+async def download_literary_piece_pdf(
+    piece_id: int, request: Request, session: AsyncSession = Depends(get_read_session)
 ):
-    piece = session.get(LiteraryPiece, piece_id)
+    piece = await session.get(LiteraryPiece, piece_id)
     if not piece or not piece.pdf_path:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Няма качен PDF.",
         )
-    if piece.pdf_path.startswith("https://res.cloudinary.com"):
-        try:
-            with httpx.Client() as client:
-                response = client.get(piece.pdf_path, timeout=30.0)
-                response.raise_for_status()
-            return Response(
-                content=response.content,
-                media_type="application/pdf",
-                headers={
-                    "Content-Disposition": f'inline; filename="piece-{piece_id}.pdf"',
-                    "Content-Length": str(len(response.content)),
-                },
-            )
-        except Exception:
-            return RedirectResponse(url=piece.pdf_path, status_code=302)
+    if storage_for_url(piece.pdf_path) is not None:
+        return await serve_stored_file(
+            piece.pdf_path,
+            request,
+            filename=f"piece-{piece_id}.pdf",
+            media_type="application/pdf",
+        )
     pdf_path = Path(piece.pdf_path)
     if not pdf_path.is_absolute():
         pdf_path = settings.media_root / pdf_path
@@ -81,26 +91,26 @@ def download_literary_piece_pdf(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Файлът липсва."
         )
-    return FileResponse(
-        pdf_path,
-        media_type="application/pdf",
-        filename=pdf_path.name,
-        headers={"Content-Disposition": f'inline; filename="{pdf_path.name}"'},
-    )
+    return local_file_response(pdf_path, request, media_type="application/pdf")
 
 
-@router.get("/{piece_id}", response_model=LiteraryPieceRead)
-def get_literary_piece(
-    piece_id: int, session: Session = Depends(get_session)
+@router.get(
+    "/{piece_id}",
+    response_model=LiteraryPieceRead,
+    dependencies=[Depends(catalogue_validators)],
+)
+async def get_literary_piece(
+    piece_id: int, session: AsyncSession = Depends(get_read_session)
 ) -> LiteraryPieceRead:
-    piece = session.exec(
+    result = await session.exec(
         select(LiteraryPiece)
         .where(LiteraryPiece.id == piece_id)
         .options(
             selectinload(LiteraryPiece.author),
-            selectinload(LiteraryPiece.play),
+            selectinload(LiteraryPiece.play).selectinload(Play.author),
         )
-    ).first()
+    )
+    piece = result.first()
     if not piece:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -3,26 +3,37 @@
 from pathlib import Path
 from typing import List, Optional
 
-import httpx
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from fastapi.responses import FileResponse, RedirectResponse, Response
-from sqlalchemy import func, or_
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import Response
 from sqlalchemy.orm import selectinload
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from ..core.config import get_settings
-from ..database import get_session
+from ..core.file_proxy import local_file_response, serve_stored_file
+from ..core.storage import storage_for_url
+from ..http_cache import catalogue_validators
 from ..models import Play, PlayFile
+from ..pagination import MAX_PAGE_SIZE, count_rows, paginate, set_page_headers
+from ..replicas import get_read_session
 from ..schemas import PlayDetail, PlayRead
+from ..search import apply_search
+from ..serialization import orm_json_response
 
 
 router = APIRouter(prefix="/api/plays", tags=["plays"])
 settings = get_settings()
 
 
-@router.get("/", response_model=List[PlayRead])
-def list_plays(
-    search: Optional[str] = Query(default=None, description="Търсене по заглавие"),
+@router.get(
+    "/",
+    response_model=List[PlayRead],
+    dependencies=[Depends(catalogue_validators)],
+)
+async def list_plays(
+    request: Request,
+    response: Response,
+    search: Optional[str] = Query(default=None, description="Търсене по заглавие и описание"),
     author_id: Optional[int] = Query(default=None, description="Филтър по автор"),
     genre: Optional[str] = Query(default=None, description="Филтър по жанр"),
     theme: Optional[str] = Query(default=None, description="Филтър по тема"),
@@ -32,17 +43,15 @@ def list_plays(
     male_participants_max: Optional[int] = Query(default=None, description="Максимален брой мъже"),
     female_participants_min: Optional[int] = Query(default=None, description="Минимален брой жени"),
     female_participants_max: Optional[int] = Query(default=None, description="Максимален брой жени"),
-    session: Session = Depends(get_session),
-) -> List[PlayRead]:
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE, description="Размер на страница"),
+    cursor: Optional[str] = Query(default=None, description="Курсор за следваща страница"),
+    include_total: bool = Query(default=False, description="Включи общия брой в X-Total-Count"),
+    session: AsyncSession = Depends(get_read_session),
+) -> Response:
     query = select(Play).options(selectinload(Play.author))
+    rank = None
     if search:
-        pattern = f"%{search.lower()}%"
-        query = query.where(
-            or_(
-                func.lower(Play.title_bg).like(pattern),
-                (Play.title_en.isnot(None)) & (func.lower(Play.title_en).like(pattern)),
-            )
-        )
+        query, rank = apply_search(session, query, Play, search)
     if author_id:
         query = query.where(Play.author_id == author_id)
     if genre:
@@ -61,13 +70,29 @@ def list_plays(
         query = query.where(Play.female_participants >= female_participants_min)
     if female_participants_max is not None:
         query = query.where(Play.female_participants <= female_participants_max)
-    plays = session.exec(query.order_by(Play.title_bg)).all()
-    return [PlayRead.from_orm(play) for play in plays]
+    if limit is not None or cursor is not None:
+        order = [(Play.title_bg, False), (Play.id, False)]
+        if rank is not None:
+            order.insert(0, (rank, True))
+        total = await count_rows(session, query, request) if include_total else None
+        plays, next_cursor = await paginate(session, query, order, limit, cursor)
+        set_page_headers(response, next_cursor, total)
+        return orm_json_response(PlayRead, plays, response)
+    if rank is not None:
+        query = query.order_by(rank.desc())
+    plays = (await session.exec(query.order_by(Play.title_bg))).all()
+    return orm_json_response(PlayRead, plays, response)
 
 
-@router.get("/{play_id}", response_model=PlayDetail)
-def get_play(play_id: int, session: Session = Depends(get_session)) -> PlayDetail:
-    play = session.exec(
+@router.get(
+    "/{play_id}",
+    response_model=PlayDetail,
+    dependencies=[Depends(catalogue_validators)],
+)
+async def get_play(
+    play_id: int, session: AsyncSession = Depends(get_read_session)
+) -> PlayDetail:
+    result = await session.exec(
         select(Play)
             .where(Play.id == play_id)
             .options(
@@ -75,7 +100,8 @@ def get_play(play_id: int, session: Session = Depends(get_session)) -> PlayDetai
                 selectinload(Play.images),
                 selectinload(Play.files),
             )
-    ).first()
+    )
+    play = result.first()
     if not play:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Пиесата не е намерена."
@@ -84,30 +110,22 @@ def get_play(play_id: int, session: Session = Depends(get_session)) -> PlayDetai
 
 
 @router.get("/{play_id}/download-pdf")
-def download_pdf(play_id: int, session: Session = Depends(get_session)):
-    play = session.get(Play, play_id)
+async def download_pdf(
+    play_id: int, request: Request, session: AsyncSession = Depends(get_read_session)
+):
+    play = await session.get(Play, play_id)
     if not play or not play.pdf_path:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Няма качен сценарий.")
     
-    # If it's a Cloudinary URL, proxy it through our server to avoid CORS issues
-    if play.pdf_path.startswith("https://res.cloudinary.com"):
-        try:
-            # Fetch the PDF from Cloudinary
-            with httpx.Client() as client:
-                response = client.get(play.pdf_path, timeout=30.0)
-                response.raise_for_status()
-                # Return the PDF with proper headers
-                return Response(
-                    content=response.content,
-                    media_type="application/pdf",
-                    headers={
-                        "Content-Disposition": f'inline; filename="play-{play_id}-script.pdf"',
-                        "Content-Length": str(len(response.content)),
-                    },
-                )
-        except Exception:
-            # Fallback to redirect if proxy fails
-            return RedirectResponse(url=play.pdf_path, status_code=302)
+    # Uploaded files come from their storage backend (remote ones are streamed
+    # through our server to avoid CORS issues)
+    if storage_for_url(play.pdf_path) is not None:
+        return await serve_stored_file(
+            play.pdf_path,
+            request,
+            filename=f"play-{play_id}-script.pdf",
+            media_type="application/pdf",
+        )
     
     # Otherwise, try to serve from local storage (for backward compatibility)
     pdf_path = Path(play.pdf_path)
@@ -115,42 +133,22 @@ def download_pdf(play_id: int, session: Session = Depends(get_session)):
         pdf_path = settings.media_root / pdf_path
     if not pdf_path.exists():
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Файлът липсва.")
-    return FileResponse(
-        pdf_path,
-        media_type="application/pdf",
-        filename=pdf_path.name,
-        headers={"Content-Disposition": f'inline; filename="{pdf_path.name}"'},
-    )
+    return local_file_response(pdf_path, request, media_type="application/pdf")
 
 
 @router.get("/{play_id}/files/{file_id}/view")
-def view_play_file(play_id: int, file_id: int, session: Session = Depends(get_session)):
+async def view_play_file(
+    play_id: int, file_id: int, request: Request, session: AsyncSession = Depends(get_read_session)
+):
     """Serve a play file with inline disposition so it opens in the browser viewer."""
-    f = session.get(PlayFile, file_id)
+    f = await session.get(PlayFile, file_id)
     if not f or f.play_id != play_id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Файлът не е намерен."
         )
-    if not f.file_url.startswith("http"):
+    if storage_for_url(f.file_url) is None and not f.file_url.startswith("http"):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Файлът не е достъпен."
         )
-    try:
-        with httpx.Client() as client:
-            response = client.get(f.file_url, timeout=30.0)
-            response.raise_for_status()
-        filename = f.file_url.split("/")[-1].split("?")[0] or "file"
-        content_type = response.headers.get(
-            "content-type", "application/octet-stream"
-        ).split(";")[0]
-        return Response(
-            content=response.content,
-            media_type=content_type,
-            headers={
-                "Content-Disposition": f'inline; filename="{filename}"',
-                "Content-Length": str(len(response.content)),
-            },
-        )
-    except Exception:
-        return RedirectResponse(url=f.file_url, status_code=302)
-
+    filename = f.file_url.split("/")[-1].split("?")[0] or "file"
+    return await serve_stored_file(f.file_url, request, filename=filename)
@@ -0,0 +1,107 @@
+"""Search inside the text of uploaded scripts and PDFs."""
+
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy import func
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ..document_text import INDEXED
+from ..http_cache import CATALOGUE_VERSION_ID, send_validators
+from ..models import CatalogueVersion, IndexedDocument, LiteraryPiece, Play, PlayFile
+from ..replicas import get_read_session
+from ..schemas import PlayRead, ScriptMatch, ScriptSearchResult
+from ..search import search_pages
+
+router = APIRouter(prefix="/api/search", tags=["search"])
+
+# Pages fetched per requested play, and matches returned per play.
+PAGES_PER_RESULT = 5
+MATCHES_PER_PLAY = 3
+
+
+async def search_validators(
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_read_session),
+) -> None:
+    """Catalogue validators that also change when the text index does.
+
+    The extraction worker does not bump the catalogue version; the number of
+    indexed documents and the latest indexing time stand in for it, read
+    with the version in one query.
+    """
+    catalogue = CatalogueVersion.id == CATALOGUE_VERSION_ID
+    row = (
+        await session.execute(
+            select(
+                select(CatalogueVersion.version).where(catalogue).scalar_subquery(),
+                select(CatalogueVersion.updated_at).where(catalogue).scalar_subquery(),
+                func.count(IndexedDocument.id),
+                func.max(IndexedDocument.updated_at),
+            ).where(IndexedDocument.status == INDEXED)
+        )
+    ).one()
+    version, changed_at, indexed, indexed_at = row
+    if indexed_at is not None and (changed_at is None or indexed_at > changed_at):
+        changed_at = indexed_at
+    send_validators(request, response, version or 0, changed_at, f"{indexed}:{indexed_at}")
+
+
+@router.get(
+    "/scripts",
+    response_model=List[ScriptSearchResult],
+    dependencies=[Depends(search_validators)],
+)
+async def search_scripts(
+    q: str = Query(..., min_length=2, description="Реплика, име на персонаж или друг текст"),
+    limit: int = Query(default=20, ge=1, le=50, description="Максимален брой пиеси"),
+    session: AsyncSession = Depends(get_read_session),
+) -> List[ScriptSearchResult]:
+    return await session.run_sync(_search_scripts, q, limit)
+
+
+def _search_scripts(session: Session, q: str, limit: int) -> List[ScriptSearchResult]:
+    hits = search_pages(session, q, limit * PAGES_PER_RESULT)
+    if not hits:
+        return []
+    urls = {hit.url for hit in hits}
+    # url -> [(play id, source, source id)]
+    owners: Dict[str, List[Tuple[int, str, int]]] = defaultdict(list)
+    for play_id, url in session.exec(select(Play.id, Play.pdf_path).where(Play.pdf_path.in_(urls))):
+        owners[url].append((play_id, "script", play_id))
+    for file_id, play_id, url in session.exec(
+        select(PlayFile.id, PlayFile.play_id, PlayFile.file_url).where(PlayFile.file_url.in_(urls))
+    ):
+        owners[url].append((play_id, "file", file_id))
+    for piece_id, play_id, url in session.exec(
+        select(LiteraryPiece.id, LiteraryPiece.play_id, LiteraryPiece.pdf_path).where(
+            LiteraryPiece.pdf_path.in_(urls), LiteraryPiece.play_id.is_not(None)
+        )
+    ):
+        owners[url].append((play_id, "library", piece_id))
+
+    # Plays in order of their best matching page
+    matches: Dict[int, List[ScriptMatch]] = {}
+    for hit in hits:
+        for play_id, source, source_id in owners.get(hit.url, []):
+            play_matches = matches.setdefault(play_id, [])
+            if len(play_matches) < MATCHES_PER_PLAY:
+                play_matches.append(
+                    ScriptMatch(source=source, source_id=source_id, page=hit.page_number, snippet=hit.snippet)
+                )
+    play_ids = list(matches)[:limit]
+    plays = {
+        play.id: play
+        for play in session.exec(
+            select(Play).where(Play.id.in_(play_ids)).options(selectinload(Play.author))
+        )
+    }
+    return [
+        ScriptSearchResult(play=PlayRead.from_orm(plays[play_id]), matches=matches[play_id])
+        for play_id in play_ids
+        if play_id in plays
+    ]
@@ -3,7 +3,20 @@
 from datetime import datetime
 from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, validator
+
+
+def _none_as_empty(value):
+    return value or []
+
+
+class ImageVariant(BaseModel):
+    """One resized copy of an image; a list of these maps onto ``srcset``."""
+
+    name: str
+    width: int
+    format: str
+    url: str
 
 
 class AuthorBase(BaseModel):
@@ -34,9 +47,12 @@ class PlayImageRead(BaseModel):
     id: int
     # Use snake_case in JSON to match frontend types
     image_url: str
+    variants: List[ImageVariant] = []
     caption_bg: Optional[str] = None
     caption_en: Optional[str] = None
 
+    _variants = validator("variants", pre=True, allow_reuse=True)(_none_as_empty)
+
     class Config:
         orm_mode = True
 
@@ -91,9 +107,12 @@ class PlayUpdate(BaseModel):
 
 class AuthorRead(AuthorBase):
     id: int
+    photo_variants: List[ImageVariant] = []
     created_at: datetime
     updated_at: datetime
 
+    _photo_variants = validator("photo_variants", pre=True, allow_reuse=True)(_none_as_empty)
+
     class Config:
         orm_mode = True
 
@@ -108,7 +127,15 @@ class PlayRead(PlayBase):
         orm_mode = True
 
 
-class PlayDetail(PlayRead):
+class PdfDetails(BaseModel):
+    """Facts about an uploaded PDF, shown without downloading it."""
+
+    pdf_page_count: Optional[int] = None
+    pdf_size: Optional[int] = None
+    pdf_preview_url: Optional[str] = None
+
+
+class PlayDetail(PdfDetails, PlayRead):
     images: List[PlayImageRead] = []
     files: List[PlayFileRead] = []
 
@@ -141,7 +168,7 @@ class LiteraryPieceUpdate(BaseModel):
     play_id: Optional[int] = None
 
 
-class LiteraryPieceRead(LiteraryPieceBase):
+class LiteraryPieceRead(PdfDetails, LiteraryPieceBase):
     id: int
     created_at: datetime
     updated_at: datetime
@@ -152,6 +179,46 @@ class LiteraryPieceRead(LiteraryPieceBase):
         orm_mode = True
 
 
+class ScriptMatch(BaseModel):
+    """A PDF page matching a script search."""
+
+    source: str  # "script" (play PDF), "file" (play file) or "library" (piece PDF)
+    source_id: int  # play, file or piece id
+    page: int
+    # HTML-escaped text with matched words wrapped in <mark>
+    snippet: str
+
+
+class ScriptSearchResult(BaseModel):
+    play: PlayRead
+    matches: List[ScriptMatch] = []
+
+
+class UploadFailure(BaseModel):
+    filename: Optional[str] = None
+    detail: str
+
+
+class PlayBatchUploadResult(BaseModel):
+    play: PlayDetail
+    failures: List[UploadFailure] = []
+
+
+class UploadJobRead(BaseModel):
+    id: int
+    kind: str
+    target_id: int
+    status: str
+    attempts: int
+    result_url: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        orm_mode = True
+
+
 class AdminLoginRequest(BaseModel):
     password: str
 
@@ -0,0 +1,204 @@
+"""Full-text search helpers shared by the public routers."""
+
+import html
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Float, cast, func, literal_column, or_
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.elements import ColumnElement
+from sqlmodel import Session, select
+
+from .models import DocumentPage, IndexedDocument, LiteraryPiece, Play, PlayFile
+
+# Postgres ships no Bulgarian stemmer, so the language-neutral "simple"
+# configuration is used for both languages (lowercasing, no stemming).
+SEARCH_CONFIG = "simple"
+
+# Searchable columns per table: (weight "A" columns, weight "B" columns).
+SEARCH_COLUMNS: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {
+    "author": (("name",), ("biography_bg", "biography_en")),
+    "play": (("title_bg", "title_en"), ("description_bg", "description_en")),
+    "literarypiece": (("title_bg", "title_en"), ("description_bg", "description_en")),
+}
+
+# Extracted PDF pages get a stored tsvector column on Postgres (GIN-indexed,
+# see migrations), so ranking does not re-parse page text.
+PAGE_VECTOR_COLUMN = "search_vector"
+PAGE_DOCUMENT = f"to_tsvector('{SEARCH_CONFIG}', coalesce(content, ''))"
+
+# Snippets are HTML-escaped text with the matched words wrapped in these tags.
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_STOP = "</mark>"
+SNIPPET_CHARS = 200
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+# \w includes "_", a LIKE wildcard, so the SQLite fallback escapes tokens
+LIKE_ESCAPE = "\\"
+
+
+def search_document(table_name: str, qualified: bool = False) -> str:
+    """Return the weighted tsvector SQL expression for a table.
+
+    The same expression is used for the GIN index (unqualified) and the
+    query (qualified), so Postgres can serve the match from the index.
+    """
+    prefix = f"{table_name}." if qualified else ""
+    weighted = []
+    for weight, columns in zip("AB", SEARCH_COLUMNS[table_name]):
+        text_sql = " || ' ' || ".join(f"coalesce({prefix}{c}, '')" for c in columns)
+        weighted.append(
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', {text_sql}), '{weight}')"
+        )
+    return " || ".join(weighted)
+
+
+def search_tokens(term: str) -> List[str]:
+    """Split a user search term into lowercase word tokens."""
+    return [token.lower() for token in _TOKEN_RE.findall(term)]
+
+
+def _contains_pattern(token: str) -> str:
+    """LIKE pattern matching ``token`` anywhere; use with ``escape=LIKE_ESCAPE``."""
+    for char in (LIKE_ESCAPE, "%", "_"):
+        token = token.replace(char, LIKE_ESCAPE + char)
+    return f"%{token}%"
+
+
+def _prefix_query(tokens: List[str]):
+    return func.to_tsquery(
+        literal_column(f"'{SEARCH_CONFIG}'::regconfig"),
+        " & ".join(f"{token}:*" for token in tokens),
+    )
+
+
+def apply_search(
+    session: Session, query: Select, model: type, term: str
+) -> Tuple[Select, Optional[ColumnElement]]:
+    """Filter ``query`` by ``term`` and return it with a relevance expression.
+
+    On Postgres every token is matched as a prefix against the indexed
+    tsvector and results can be ordered by ``ts_rank``. Other databases
+    (SQLite in development) fall back to substring matching on the same
+    columns and return no rank.
+    """
+    tokens = search_tokens(term)
+    if not tokens:
+        return query, None
+    table_name = model.__tablename__
+    if session.get_bind().dialect.name == "postgresql":
+        document = literal_column(f"({search_document(table_name, qualified=True)})")
+        ts_query = _prefix_query(tokens)
+        # ts_rank returns float4; widen it so the value round-trips exactly
+        # through pagination cursors.
+        rank = cast(func.ts_rank(document, ts_query), Float)
+        return query.where(document.op("@@")(ts_query)), rank
+
+    columns = [getattr(model, c) for group in SEARCH_COLUMNS[table_name] for c in group]
+    for token in tokens:
+        pattern = _contains_pattern(token)
+        query = query.where(
+            or_(*(func.lower(column).like(pattern, escape=LIKE_ESCAPE) for column in columns))
+        )
+    return query, None
+
+
+@dataclass(frozen=True)
+class PageHit:
+    url: str
+    page_number: int
+    snippet: str
+
+
+def _linked_documents():
+    # Only PDFs still attached to a play (directly, as a file or via a piece)
+    return or_(
+        IndexedDocument.url.in_(select(Play.pdf_path)),
+        IndexedDocument.url.in_(select(PlayFile.file_url)),
+        IndexedDocument.url.in_(
+            select(LiteraryPiece.pdf_path).where(LiteraryPiece.play_id.is_not(None))
+        ),
+    )
+
+
+def _highlight(content: str, tokens: List[str]) -> str:
+    """Plain-text snippet around the first match, with matched words marked."""
+    lowered = content.lower()
+    positions = [lowered.find(token) for token in tokens]
+    first = min((p for p in positions if p >= 0), default=0)
+    start = max(0, first - SNIPPET_CHARS // 3)
+    snippet = " ".join(content[start : start + SNIPPET_CHARS].split())
+    pattern = re.compile(
+        r"\b(" + "|".join(re.escape(token) for token in tokens) + r")\w*", re.IGNORECASE
+    )
+    parts = []
+    last = 0
+    for match in pattern.finditer(snippet):
+        parts.append(html.escape(snippet[last : match.start()]))
+        parts.append(HIGHLIGHT_START + html.escape(match.group(0)) + HIGHLIGHT_STOP)
+        last = match.end()
+    parts.append(html.escape(snippet[last:]))
+    prefix = "… " if start > 0 else ""
+    suffix = " …" if start + SNIPPET_CHARS < len(content) else ""
+    return prefix + "".join(parts) + suffix
+
+
+def search_pages(session: Session, term: str, limit: int) -> List[PageHit]:
+    """Best matching PDF pages for ``term``, with highlighted snippets.
+
+    On Postgres the match is served by the GIN index and ranked with
+    ``ts_rank``; snippets are built only for the returned pages, so latency
+    does not grow with the total amount of indexed text. SQLite falls back
+    to substring matching in page order.
+    """
+    tokens = search_tokens(term)
+    if not tokens:
+        return []
+    if session.get_bind().dialect.name == "postgresql":
+        document = literal_column(f"{DocumentPage.__tablename__}.{PAGE_VECTOR_COLUMN}")
+        ts_query = _prefix_query(tokens)
+        rank = func.ts_rank(document, ts_query)
+        ranked = (
+            select(
+                IndexedDocument.url,
+                DocumentPage.page_number,
+                DocumentPage.id.label("page_id"),
+                rank.label("rank"),
+            )
+            .join(IndexedDocument, IndexedDocument.id == DocumentPage.document_id)
+            .where(_linked_documents(), document.op("@@")(ts_query))
+            .order_by(rank.desc(), DocumentPage.id)
+            .limit(limit)
+            .subquery()
+        )
+        escaped = DocumentPage.content
+        for char, entity in (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;")):
+            escaped = func.replace(escaped, char, entity)
+        # Built only for the ranked page ids, not for every match
+        headline = func.ts_headline(
+            literal_column(f"'{SEARCH_CONFIG}'::regconfig"),
+            escaped,
+            ts_query,
+            f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, MaxWords=35, MinWords=15",
+        )
+        rows = session.exec(
+            select(ranked.c.url, ranked.c.page_number, headline)
+            .join(DocumentPage, DocumentPage.id == ranked.c.page_id)
+            .order_by(ranked.c.rank.desc(), ranked.c.page_id)
+        ).all()
+        return [PageHit(url, page, snippet) for url, page, snippet in rows]
+
+    query = (
+        select(IndexedDocument.url, DocumentPage.page_number, DocumentPage.content)
+        .join(IndexedDocument, IndexedDocument.id == DocumentPage.document_id)
+        .where(_linked_documents())
+    )
+    for token in tokens:
+        query = query.where(
+            func.lower(DocumentPage.content).like(_contains_pattern(token), escape=LIKE_ESCAPE)
+        )
+    rows = session.exec(
+        query.order_by(DocumentPage.document_id, DocumentPage.page_number).limit(limit)
+    ).all()
+    return [PageHit(url, page, _highlight(content, tokens)) for url, page, content in rows]
@@ -1,94 +1,137 @@
-"""Seed helpers for initial demo data."""
+"""Seed helpers for demo data and fixtures.
 
+:func:`seed_catalogue` inserts the authors and plays that are missing,
+matched by author name and Bulgarian play title, with a fixed number of bulk
+statements however many rows there are (two queries when nothing is
+missing). Run it with ``python -m app seed``; startup seeding of the demo
+data is controlled by ``SEED_DEMO_DATA_ON_STARTUP``.
+"""
+
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import insert
 from sqlmodel import Session, select
 
+from .catalogue import commit_change
 from .models import Author, Play, PlayImage
 
+DEMO_AUTHORS: List[dict] = [
+    {
+        "name": "Иван Вазов",
+        "biography_bg": "Класик на българската литература, автор на множество пиеси и романи.",
+        "biography_en": "Classic of Bulgarian literature, author of many plays and novels.",
+        "photo_url": "https://upload.wikimedia.org/wikipedia/commons/thumb/9/9f/Ivan_Vazov.jpg/330px-Ivan_Vazov.jpg",
+    },
+    {
+        "name": "Пейо Яворов",
+        "biography_bg": "Поет и драматург, свързан със символизма и модернизма в България.",
+        "biography_en": "Poet and playwright associated with symbolism and modernism in Bulgaria.",
+        "photo_url": "https://upload.wikimedia.org/wikipedia/commons/thumb/f/fe/Pejo_Yavorov.jpg/330px-Pejo_Yavorov.jpg",
+    },
+    {
+        "name": "Яна Добрева",
+        "biography_bg": "Съвременен драматург с фокус върху съвременното българско общество.",
+        "biography_en": "Contemporary playwright focused on contemporary Bulgarian society.",
+        "photo_url": None,
+    },
+]
 
-def seed_demo_data(session: Session) -> None:
-    """Populate the database with Bulgarian demo authors and plays."""
-    author_names = {
-        "Иван Вазов": Author(
-            name="Иван Вазов",
-            biography_bg="Класик на българската литература, автор на множество пиеси и романи.",
-            biography_en="Classic of Bulgarian literature, author of many plays and novels.",
-            photo_url="https://upload.wikimedia.org/wikipedia/commons/thumb/9/9f/Ivan_Vazov.jpg/330px-Ivan_Vazov.jpg",
-        ),
-        "Пейо Яворов": Author(
-            name="Пейо Яворов",
-            biography_bg="Поет и драматург, свързан със символизма и модернизма в България.",
-            biography_en="Poet and playwright associated with symbolism and modernism in Bulgaria.",
-            photo_url="https://upload.wikimedia.org/wikipedia/commons/thumb/f/fe/Pejo_Yavorov.jpg/330px-Pejo_Yavorov.jpg",
-        ),
-        "Яна Добрева": Author(
-            name="Яна Добрева",
-            biography_bg="Съвременен драматург с фокус върху съвременното българско общество.",
-            biography_en="Contemporary playwright focused on contemporary Bulgarian society.",
-            photo_url=None,
-        ),
-    }
-
-    for name, author in author_names.items():
-        exists = session.exec(select(Author).where(Author.name == name)).first()
-        if not exists:
-            session.add(author)
-    session.commit()
-
-    plays_data = [
-        {
-            "title_bg": "Под игото",
-            "title_en": "Under the Yoke",
-            "author_name": "Иван Вазов",
-            "description_bg": "Драматизация на знаковия роман за българското възраждане.",
-            "description_en": "Dramatization of the landmark novel about the Bulgarian Revival.",
-            "year": 1894,
-            "genre": "Историческа драма",
-            "images": [
-                "https://images.unsplash.com/photo-1545239351-1141bd82e8a6",
-                "https://images.unsplash.com/photo-1485561672498-63b532250ede",
-            ],
-        },
-        {
-            "title_bg": "В полите на Витоша",
-            "title_en": "On the Slopes of Vitosha",
-            "author_name": "Пейо Яворов",
-            "description_bg": "Трагическа пиеса за любов и общество, вдъхновена от истински събития.",
-            "description_en": "Tragic play about love and society, inspired by true events.",
-            "year": 1910,
-            "genre": "Трагедия",
-            "images": ["https://images.unsplash.com/photo-1454922915609-78549ad709bb"],
-        },
-        {
-            "title_bg": "Гласове в мъглата",
-            "title_en": "Voices in the Mist",
-            "author_name": "Яна Добрева",
-            "description_bg": "Съвременна урбанистична драма за семейство и памет.",
-            "description_en": "Contemporary urban drama about family and memory.",
-            "year": 2017,
-            "genre": "Съвременна драма",
-            "images": ["https://images.unsplash.com/photo-1500530855697-b586d89ba3ee"],
-        },
+DEMO_PLAYS: List[dict] = [
+    {
+        "title_bg": "Под игото",
+        "title_en": "Under the Yoke",
+        "author_name": "Иван Вазов",
+        "description_bg": "Драматизация на знаковия роман за българското възраждане.",
+        "description_en": "Dramatization of the landmark novel about the Bulgarian Revival.",
+        "year": 1894,
+        "genre": "Историческа драма",
+        "images": [
+            "https://images.unsplash.com/photo-1545239351-1141bd82e8a6",
+            "https://images.unsplash.com/photo-1485561672498-63b532250ede",
+        ],
+    },
+    {
+        "title_bg": "В полите на Витоша",
+        "title_en": "On the Slopes of Vitosha",
+        "author_name": "Пейо Яворов",
+        "description_bg": "Трагическа пиеса за любов и общество, вдъхновена от истински събития.",
+        "description_en": "Tragic play about love and society, inspired by true events.",
+        "year": 1910,
+        "genre": "Трагедия",
+        "images": ["https://images.unsplash.com/photo-1454922915609-78549ad709bb"],
+    },
+    {
+        "title_bg": "Гласове в мъглата",
+        "title_en": "Voices in the Mist",
+        "author_name": "Яна Добрева",
+        "description_bg": "Съвременна урбанистична драма за семейство и памет.",
+        "description_en": "Contemporary urban drama about family and memory.",
+        "year": 2017,
+        "genre": "Съвременна драма",
+        "images": ["https://images.unsplash.com/photo-1500530855697-b586d89ba3ee"],
+    },
+]
+
+
+def _rows(model: type, items: Iterable[dict]) -> List[dict]:
+    """Column values (defaults filled in) for a bulk insert into ``model``."""
+    return [
+        model(**{k: v for k, v in item.items() if k in model.__fields__}).dict(exclude={"id"})
+        for item in items
     ]
 
-    for play_data in plays_data:
-        author = session.exec(select(Author).where(Author.name == play_data["author_name"])).first()
-        if not author:
-            continue
-        existing = session.exec(select(Play).where(Play.title_bg == play_data["title_bg"])).first()
-        if existing:
-            continue
-        play = Play(
-            title_bg=play_data["title_bg"],
-            title_en=play_data.get("title_en"),
-            description_bg=play_data["description_bg"],
-            description_en=play_data.get("description_en"),
-            year=play_data["year"],
-            genre=play_data["genre"],
-            author_id=author.id,  # type: ignore[arg-type]
+
+def _ids_by(session: Session, column, keys: Iterable[str]) -> Dict[str, int]:
+    model = column.class_
+    return dict(session.exec(select(column, model.id).where(column.in_(set(keys)))).all())
+
+
+def seed_catalogue(
+    session: Session, authors: List[dict], plays: List[dict]
+) -> Tuple[int, int]:
+    """Insert missing authors and plays (with their ``images`` URLs) and commit.
+
+    Plays name their author in ``author_name``; it must be in ``authors`` or
+    already in the database. When anything is added the catalogue version is
+    bumped, so HTTP validators and cached responses pick up the new rows.
+    Returns ``(authors added, plays added)``.
+    """
+    authors_by_name = {author["name"]: author for author in authors}
+    author_ids = _ids_by(
+        session, Author.name, {*authors_by_name, *(play["author_name"] for play in plays)}
+    )
+    new_authors = [author for name, author in authors_by_name.items() if name not in author_ids]
+    if new_authors:
+        session.execute(insert(Author.__table__), _rows(Author, new_authors))
+        author_ids.update(_ids_by(session, Author.name, (a["name"] for a in new_authors)))
+
+    plays_by_title = {play["title_bg"]: play for play in plays}
+    existing = _ids_by(session, Play.title_bg, plays_by_title)
+    new_plays = [
+        {**play, "author_id": author_ids[play["author_name"]]}
+        for title, play in plays_by_title.items()
+        if title not in existing and play["author_name"] in author_ids
+    ]
+    if new_plays:
+        session.execute(insert(Play.__table__), _rows(Play, new_plays))
+        play_ids = _ids_by(session, Play.title_bg, (play["title_bg"] for play in new_plays))
+        images = [
+            {"play_id": play_ids[play["title_bg"]], "image_url": url}
+            for play in new_plays
+            for url in play.get("images", [])
+        ]
+        if images:
+            session.execute(insert(PlayImage.__table__), _rows(PlayImage, images))
+    if new_authors or new_plays:
+        commit_change(
+            session,
+            {"authors", "plays", *(f"author:{play['author_id']}" for play in new_plays)},
         )
-        session.add(play)
-        session.flush()
-        for image in play_data["images"]:
-            session.add(PlayImage(play_id=play.id, image_url=image))  # type: ignore[arg-type]
-    session.commit()
+    else:
+        session.commit()
+    return len(new_authors), len(new_plays)
 
+
+def seed_demo_data(session: Session) -> None:
+    """Populate the database with Bulgarian demo authors and plays."""
+    seed_catalogue(session, DEMO_AUTHORS, DEMO_PLAYS)
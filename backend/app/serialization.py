@@ -0,0 +1,75 @@
+"""Serialize ORM objects straight to JSON bytes for the public list endpoints.
+
+Returning ``[PlayRead.from_orm(p) for p in plays]`` validates every row twice:
+once in ``from_orm`` and again when FastAPI checks the list against the
+route's ``response_model``, before the stdlib encoder runs. For long lists
+that costs more than the query. :func:`orm_json_response` reads the schema's
+fields straight off ORM objects (or Core rows) and encodes them with orjson;
+a returned Response skips FastAPI's validation, while the route keeps its
+``response_model`` so the OpenAPI schema is unchanged. The body is the same
+as FastAPI would send (see benchmarks/serialization.py).
+"""
+
+from functools import lru_cache
+from typing import Any, Callable, Iterable, List, Optional, Tuple, Type
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+from pydantic.fields import SHAPE_LIST, SHAPE_SINGLETON, ModelField
+
+Converter = Callable[[Any], Any]
+
+
+def _read(source: Any, name: str) -> Any:
+    # JSON columns (image variants) hold plain dicts
+    return source[name] if isinstance(source, dict) else getattr(source, name)
+
+
+def _field_converter(field: ModelField) -> Optional[Converter]:
+    """Converter for nested schemas; ``None`` when orjson takes the value as is."""
+    if not (isinstance(field.type_, type) and issubclass(field.type_, BaseModel)):
+        return None
+    convert = schema_converter(field.type_)
+    if field.shape == SHAPE_SINGLETON:
+        return lambda value: None if value is None else convert(value)
+    if field.shape == SHAPE_LIST:
+        if field.allow_none:
+            return lambda items: None if items is None else [convert(item) for item in items]
+        # Like the schemas' _none_as_empty validators: a NULL list is empty
+        return lambda items: [convert(item) for item in items or ()]
+    raise TypeError(f"Unsupported field {field.name} on {field.type_.__name__}")
+
+
+@lru_cache(maxsize=None)
+def schema_converter(schema: Type[BaseModel]) -> Converter:
+    """Build a function turning an object into a dict of ``schema``'s fields."""
+    fields: List[Tuple[str, Optional[Converter]]] = [
+        (name, _field_converter(field)) for name, field in schema.__fields__.items()
+    ]
+
+    def convert(source: Any) -> dict:
+        return {
+            name: _read(source, name) if nested is None else nested(_read(source, name))
+            for name, nested in fields
+        }
+
+    return convert
+
+
+def orm_json_response(
+    schema: Type[BaseModel], rows: Iterable[Any], response: Response
+) -> Response:
+    """Encode ``rows`` as a JSON list of ``schema`` without validating them.
+
+    ``response`` is the endpoint's injected Response; its status and headers
+    (validators, pagination) are carried over, as FastAPI would do.
+    """
+    convert = schema_converter(schema)
+    result = Response(
+        content=orjson.dumps([convert(row) for row in rows]),
+        status_code=response.status_code or 200,
+        media_type="application/json",
+    )
+    result.headers.raw.extend(response.headers.raw)
+    return result
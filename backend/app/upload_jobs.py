@@ -0,0 +1,377 @@
+"""Admin uploads: attaching stored files to rows, inline or as background jobs.
+
+A background upload is spooled to ``upload_spool_root`` (outside the public
+media mount), recorded in the ``uploadjob`` table and handed to a bounded
+thread pool. Workers claim a job with a conditional UPDATE, so a job runs at
+most once at a time even with several app workers; failures are retried with
+exponential backoff. The spooled file is removed once the job succeeds or
+finally fails; files no unfinished job points to are swept on startup.
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set, Tuple, Union
+
+from fastapi import UploadFile
+from sqlalchemy import update
+from sqlmodel import Session, SQLModel, select
+
+from .asset_deletions import queue_deletion
+from .catalogue import author_tags, commit_change, piece_tags, play_tags
+from .assets import (
+    StoredUpload,
+    add_reference,
+    copy_with_digest,
+    discard_upload,
+    store_stream,
+    store_upload,
+)
+from .core.cloudinary_service import check_upload_size, upload_size
+from .core.config import get_settings
+from .database import engine
+from .document_text import queue_text_extraction
+from .models import Author, LiteraryPiece, Play, PlayFile, PlayImage, UploadJob
+from .pdf_preview import preview_url
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+TERMINAL_STATUSES = {SUCCEEDED, FAILED}
+
+# Jobs left "running" this long (e.g. by a killed worker) are picked up again.
+STALE_RUNNING_AFTER = timedelta(minutes=15)
+
+
+@dataclass(frozen=True)
+class UploadKind:
+    model: type
+    folder: str
+    name_prefix: str  # formatted with the target id
+    derive_images: bool = False  # make responsive variants (app/images.py)
+    describe_pdfs: bool = False  # page count and preview (app/pdf_preview.py)
+
+
+UPLOAD_KINDS: Dict[str, UploadKind] = {
+    "author_photo": UploadKind(Author, "authors", "author-{id}", derive_images=True),
+    "play_pdf": UploadKind(Play, "pdfs", "play-{id}-script", describe_pdfs=True),
+    "play_image": UploadKind(Play, "images", "play-{id}", derive_images=True),
+    "play_file": UploadKind(Play, "files", "play-{id}"),
+    "piece_pdf": UploadKind(LiteraryPiece, "pdfs", "piece-{id}", describe_pdfs=True),
+}
+
+settings = get_settings()
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _clean_caption(value: Optional[str]) -> Optional[str]:
+    return value.strip() if value and value.strip() else None
+
+
+def upload_for(kind: str, target_id: int, upload: UploadFile) -> StoredUpload:
+    """Store a request file using the folder/prefix of ``kind``."""
+    spec = UPLOAD_KINDS[kind]
+    return store_upload(
+        upload,
+        spec.folder,
+        name_prefix=spec.name_prefix.format(id=target_id),
+        derive_images=spec.derive_images,
+        describe_pdfs=spec.describe_pdfs,
+    )
+
+
+def upload_many(
+    kind: str, target_id: int, uploads: Sequence[UploadFile]
+) -> List[Union[StoredUpload, Exception]]:
+    """Store several files concurrently; results (upload or error) keep input order."""
+    if not uploads:
+        return []
+    workers = min(settings.upload_batch_concurrency, len(uploads))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="upload-batch") as pool:
+        futures = [pool.submit(upload_for, kind, target_id, upload) for upload in uploads]
+    return [future.exception() or future.result() for future in futures]
+
+
+def _gallery_row(
+    kind: str,
+    play_id: int,
+    stored: StoredUpload,
+    caption_bg: Optional[str],
+    caption_en: Optional[str],
+) -> Union[PlayImage, PlayFile]:
+    captions = {"caption_bg": _clean_caption(caption_bg), "caption_en": _clean_caption(caption_en)}
+    if kind == "play_image":
+        return PlayImage(
+            play_id=play_id, image_url=stored.url, variants=stored.variants or None, **captions
+        )
+    return PlayFile(play_id=play_id, file_url=stored.url, **captions)
+
+
+def attach_gallery(
+    session: Session,
+    kind: str,
+    play: Play,
+    items: Sequence[Tuple[StoredUpload, Optional[str], Optional[str]]],
+) -> None:
+    """Add uploaded images or files, as ``(upload, caption_bg, caption_en)``, in one commit.
+
+    If the commit fails the freshly uploaded assets are deleted again.
+    """
+    try:
+        for stored, caption_bg, caption_en in items:
+            saved = add_reference(session, stored)
+            session.add(_gallery_row(kind, play.id, saved, caption_bg, caption_en))
+            if kind == "play_file":
+                queue_text_extraction(session, saved.url)
+        play.updated_at = datetime.utcnow()
+        session.add(play)
+        commit_change(session, play_tags(play))
+    except Exception:
+        session.rollback()
+        for stored, _, _ in items:
+            discard_upload(stored)
+        raise
+
+
+def attach_upload(
+    session: Session,
+    kind: str,
+    target: SQLModel,
+    stored: StoredUpload,
+    caption_bg: Optional[str] = None,
+    caption_en: Optional[str] = None,
+) -> str:
+    """Point ``target`` at an uploaded file, commit and return the saved URL.
+
+    The file it replaces, if any, is released in the same transaction, so a
+    failed write never leaves the row pointing at a deleted asset.
+    """
+    saved = add_reference(session, stored)
+    old_url = None
+    if kind == "author_photo":
+        old_url, target.photo_url = target.photo_url, saved.url
+        target.photo_variants = saved.variants or None
+        tags = author_tags(target)
+    elif kind in ("play_pdf", "piece_pdf"):
+        old_url, target.pdf_path = target.pdf_path, saved.url
+        target.pdf_page_count = saved.page_count
+        target.pdf_size = saved.size
+        target.pdf_preview_url = preview_url(saved.variants)
+        queue_text_extraction(session, saved.url)
+        tags = play_tags(target) if kind == "play_pdf" else piece_tags(target)
+    else:
+        session.add(_gallery_row(kind, target.id, saved, caption_bg, caption_en))
+        if kind == "play_file":
+            queue_text_extraction(session, saved.url)
+        tags = play_tags(target)
+    queue_deletion(session, old_url)
+    target.updated_at = datetime.utcnow()
+    session.add(target)
+    commit_change(session, tags)
+    return saved.url
+
+
+def enqueue_upload(
+    session: Session,
+    kind: str,
+    target_id: int,
+    upload: UploadFile,
+    caption_bg: Optional[str] = None,
+    caption_en: Optional[str] = None,
+) -> UploadJob:
+    """Spool ``upload`` to local disk, record a job and schedule it."""
+    check_upload_size(upload_size(upload))
+    settings.upload_spool_root.mkdir(parents=True, exist_ok=True)
+    suffix = Path(upload.filename or "").suffix
+    spool_path = settings.upload_spool_root / f"{uuid.uuid4().hex}{suffix}"
+    try:
+        with spool_path.open("wb") as spool:
+            sha256, size = copy_with_digest(upload.file, spool)
+        upload.file.seek(0)
+
+        job = UploadJob(
+            kind=kind,
+            target_id=target_id,
+            spool_path=str(spool_path),
+            sha256=sha256,
+            size=size,
+            filename=upload.filename,
+            caption_bg=caption_bg,
+            caption_en=caption_en,
+        )
+        session.add(job)
+        session.commit()
+    except BaseException:
+        spool_path.unlink(missing_ok=True)
+        raise
+    session.refresh(job)
+    submit_job(job.id)
+    return job
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.upload_workers, thread_name_prefix="upload-job"
+            )
+        return _executor
+
+
+def submit_job(job_id: int, delay: float = 0.0) -> None:
+    """Run a job on the worker pool, optionally after ``delay`` seconds."""
+    if delay > 0:
+        timer = threading.Timer(delay, submit_job, args=(job_id,))
+        timer.daemon = True
+        timer.start()
+        return
+    _get_executor().submit(process_job, job_id)
+
+
+def _claim(session: Session, job_id: int) -> bool:
+    result = session.execute(
+        update(UploadJob)
+        .where(UploadJob.id == job_id, UploadJob.status == QUEUED)
+        .values(status=RUNNING, attempts=UploadJob.attempts + 1, updated_at=datetime.utcnow())
+    )
+    session.commit()
+    return result.rowcount == 1
+
+
+def _finish(session: Session, job: UploadJob, status: str, error: Optional[str] = None) -> None:
+    job.status = status
+    job.error = error
+    job.updated_at = datetime.utcnow()
+    session.add(job)
+    session.commit()
+    Path(job.spool_path).unlink(missing_ok=True)
+
+
+def _retry_or_fail(session: Session, job: UploadJob, error: str) -> None:
+    if job.attempts >= settings.upload_job_max_attempts:
+        _finish(session, job, FAILED, error)
+        return
+    job.status = QUEUED
+    job.error = error
+    job.updated_at = datetime.utcnow()
+    session.add(job)
+    session.commit()
+    submit_job(job.id, delay=settings.upload_job_backoff_seconds * 2 ** (job.attempts - 1))
+
+
+def process_job(job_id: int) -> None:
+    """Upload a spooled file to storage and attach it to its target row."""
+    with Session(engine) as session:
+        if not _claim(session, job_id):
+            return
+        job = session.get(UploadJob, job_id)
+        spec = UPLOAD_KINDS[job.kind]
+        if session.get(spec.model, job.target_id) is None:
+            _finish(session, job, FAILED, "Обектът вече не съществува.")
+            return
+        try:
+            with open(job.spool_path, "rb") as handle:
+                stored = store_stream(
+                    handle,
+                    spec.folder,
+                    spec.name_prefix.format(id=job.target_id),
+                    job.filename,
+                    derive_images=spec.derive_images,
+                    describe_pdfs=spec.describe_pdfs,
+                    digest=(job.sha256, job.size) if job.sha256 else None,
+                )
+        except Exception as exc:
+            _retry_or_fail(session, job, f"Качването е неуспешно: {exc}")
+            return
+
+        # The upload may have taken a while; re-read the target before writing.
+        session.expire_all()
+        target = session.get(spec.model, job.target_id)
+        if target is None:
+            discard_upload(stored)
+            _finish(session, job, FAILED, "Обектът вече не съществува.")
+            return
+        job.status = SUCCEEDED
+        job.result_url = stored.url
+        job.error = None
+        job.updated_at = datetime.utcnow()
+        session.add(job)
+        try:
+            url = attach_upload(
+                session, job.kind, target, stored, job.caption_bg, job.caption_en
+            )
+        except Exception as exc:
+            session.rollback()
+            discard_upload(stored)
+            job = session.get(UploadJob, job_id)
+            _retry_or_fail(session, job, f"Записът е неуспешен: {exc}")
+            return
+        if url != job.result_url:
+            job.result_url = url
+            session.add(job)
+            session.commit()
+        Path(job.spool_path).unlink(missing_ok=True)
+
+
+def get_job(job_id: int) -> Optional[UploadJob]:
+    with Session(engine) as session:
+        return session.get(UploadJob, job_id)
+
+
+def resume_upload_jobs() -> None:
+    """Reschedule queued jobs and jobs orphaned by a killed worker."""
+    with Session(engine) as session:
+        session.execute(
+            update(UploadJob)
+            .where(
+                UploadJob.status == RUNNING,
+                UploadJob.updated_at < datetime.utcnow() - STALE_RUNNING_AFTER,
+            )
+            .values(status=QUEUED)
+        )
+        session.commit()
+        unfinished = session.exec(
+            select(UploadJob.id, UploadJob.status, UploadJob.spool_path).where(
+                UploadJob.status.notin_(TERMINAL_STATUSES)
+            )
+        ).all()
+    _sweep_spool({spool_path for _, _, spool_path in unfinished})
+    for job_id, status, _ in unfinished:
+        if status == QUEUED:
+            submit_job(job_id)
+
+
+def _sweep_spool(keep: Set[str]) -> None:
+    """Remove spooled files no unfinished job points to.
+
+    Files newer than STALE_RUNNING_AFTER are left alone: another worker may
+    have just spooled one and not yet committed its job. Earlier releases
+    spooled under media_root, which /media serves, so that directory is
+    swept too.
+    """
+    cutoff = time.time() - STALE_RUNNING_AFTER.total_seconds()
+    for directory in (settings.upload_spool_root, settings.media_root / "upload-spool"):
+        if not directory.is_dir():
+            continue
+        for path in directory.iterdir():
+            try:
+                if str(path) not in keep and path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except OSError:
+                continue
+
+
+def shutdown_upload_workers() -> None:
+    """Stop accepting work; unfinished jobs are resumed on the next start."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
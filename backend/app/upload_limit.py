@@ -0,0 +1,86 @@
+"""Reject oversized admin uploads before their bodies are read."""
+
+from fastapi import status
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Room for multipart boundaries and the caption form fields around the file.
+MULTIPART_OVERHEAD = 64 * 1024
+# Multi-file routes get the larger batch cap; each file is still checked alone.
+BATCH_UPLOAD_SUFFIXES = ("/upload-images", "/upload-files")
+TOO_LARGE_DETAIL = "Файлът е твърде голям."
+
+
+class _BodyTooLarge(Exception):
+    """Raised from ``receive`` once the body crosses the cap."""
+
+
+def _too_large_response() -> JSONResponse:
+    return JSONResponse(
+        {"detail": TOO_LARGE_DETAIL},
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+    )
+
+
+class UploadSizeLimitMiddleware:
+    """Cap the request body of admin upload endpoints at ``max_bytes``
+    (``batch_max_bytes`` for the multi-file routes).
+
+    A declared Content-Length above the cap is answered with 413 straight
+    away; otherwise the body is counted as it arrives and parsing is aborted
+    as soon as the cap is crossed. The 413 is then sent from here, not from
+    inside ``receive``: the error surfaces differently depending on what it
+    passes through (FastAPI turns it into a 400, BaseHTTPMiddleware may wrap
+    it in an exception group), so whatever the app answers is replaced.
+    """
+
+    def __init__(self, app: ASGIApp, max_bytes: int, batch_max_bytes: int) -> None:
+        self.app = app
+        self.limit = max_bytes + MULTIPART_OVERHEAD
+        self.batch_limit = batch_max_bytes + MULTIPART_OVERHEAD
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or not scope["path"].startswith("/api/admin/")
+            or "/upload" not in scope["path"]
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.batch_limit if scope["path"].endswith(BATCH_UPLOAD_SUFFIXES) else self.limit
+        headers = dict(scope["headers"])
+        declared = headers.get(b"content-length", b"").decode("latin-1")
+        if declared.isdigit() and int(declared) > limit:
+            await _too_large_response()(scope, receive, send)
+            return
+
+        received = 0
+        exceeded = False
+        started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    exceeded = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def guarded_send(message: Message) -> None:
+            nonlocal started
+            if exceeded and not started:
+                return  # replaced by the 413 below
+            started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not exceeded or started:
+                raise
+        if exceeded and not started:
+            await _too_large_response()(scope, receive, send)
@@ -0,0 +1,167 @@
+"""Throughput and tail latency of sync vs async read endpoints under concurrency.
+
+Usage (from ``backend/``, with the usual backend environment)::
+
+    python -m benchmarks.async_reads --database-url postgresql+psycopg2://... \\
+        --concurrency 50 200 --requests 4000 --sleep-ms 5
+
+Both endpoints run the same query (a page of plays with their authors); one
+is a sync ``def`` using ``get_session`` (the old path, one threadpool thread
+per request), the other an ``async def`` using ``get_async_session``. They
+are served by a uvicorn subprocess and hit over HTTP. ``--sleep-ms`` adds a
+``pg_sleep`` to every query on Postgres to model network round trips. The
+target database is dropped and recreated, so never point this at a real
+catalogue. SQLite works, but aiosqlite runs on threads too, so the numbers
+say little.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import List
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database import get_async_session, get_session
+from app.models import Author, Play
+from app.schemas import PlayRead
+
+PAGE_SIZE = 20
+SLEEP_MS = float(os.environ.get("BENCH_SLEEP_MS", "0"))
+
+bench_app = FastAPI()
+
+
+def _plays_query():
+    query = select(Play).options(selectinload(Play.author)).order_by(Play.id).limit(PAGE_SIZE)
+    if SLEEP_MS:
+        query = query.where(text(f"(SELECT pg_sleep({SLEEP_MS / 1000})) IS NOT NULL"))
+    return query
+
+
+@bench_app.get("/sync/plays")
+def sync_plays(session: Session = Depends(get_session)) -> List[PlayRead]:
+    return [PlayRead.from_orm(play) for play in session.exec(_plays_query()).all()]
+
+
+@bench_app.get("/async/plays")
+async def async_plays(session: AsyncSession = Depends(get_async_session)) -> List[PlayRead]:
+    plays = (await session.exec(_plays_query())).all()
+    return [PlayRead.from_orm(play) for play in plays]
+
+
+def load_rows(database_url: str, rows: int, seed: int) -> None:
+    rng = random.Random(seed)
+    engine = create_engine(database_url)
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        authors = [Author(name=f"Автор {i}", biography_bg="Биография") for i in range(20)]
+        session.add_all(authors)
+        session.commit()
+        session.bulk_insert_mappings(
+            Play,
+            [
+                {
+                    "title_bg": f"Пиеса {i}",
+                    "description_bg": "Описание " * 20,
+                    "author_id": rng.choice(authors).id,
+                }
+                for i in range(rows)
+            ],
+        )
+        session.commit()
+    engine.dispose()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _drive(base_url: str, path: str, concurrency: int, total: int) -> List[float]:
+    samples: List[float] = []
+    remaining = total
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+
+        async def worker() -> None:
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                started = time.perf_counter()
+                response = await client.get(path)
+                response.raise_for_status()
+                samples.append((time.perf_counter() - started) * 1000)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples
+
+
+def _wait_until_up(base_url: str, server: subprocess.Popen) -> None:
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            httpx.get(f"{base_url}/docs", timeout=1.0)
+            return
+        except httpx.TransportError:
+            time.sleep(0.2)
+    raise RuntimeError("uvicorn did not start")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default="sqlite:///async-bench.db")
+    parser.add_argument("--rows", type=int, default=2_000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--sleep-ms", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    load_rows(args.database_url, args.rows, args.seed)
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = {**os.environ, "DATABASE_URL": args.database_url, "BENCH_SLEEP_MS": str(args.sleep_ms)}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.async_reads:bench_app",
+         "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        _wait_until_up(base_url, server)
+        print(f"{'path':<8} {'conc':>5} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+        for concurrency in args.concurrency:
+            for name in ("sync", "async"):
+                path = f"/{name}/plays"
+                asyncio.run(_drive(base_url, path, concurrency, min(200, args.requests)))  # warm up
+                started = time.perf_counter()
+                samples = sorted(asyncio.run(_drive(base_url, path, concurrency, args.requests)))
+                elapsed = time.perf_counter() - started
+                p95 = samples[int(len(samples) * 0.95) - 1]
+                p99 = samples[int(len(samples) * 0.99) - 1]
+                print(
+                    f"{name:<8} {concurrency:>5} {len(samples) / elapsed:>9.1f} "
+                    f"{statistics.median(samples):>9.2f} {p95:>9.2f} {p99:>9.2f} {samples[-1]:>9.2f}"
+                )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
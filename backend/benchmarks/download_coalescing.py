@@ -0,0 +1,105 @@
+"""Check that concurrent downloads of one remote file share a single upstream fetch.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.download_coalescing
+    python -m benchmarks.download_coalescing --requests 50 --payload-kb 2048
+
+Run with the usual backend environment (``.env``); ASSET_CACHE_ROOT is
+replaced by a temporary directory so the asset cache starts empty. A local stand-in
+server plays the role of Cloudinary and sends its body slowly, and
+``--requests`` plain GETs go through ``proxy_remote_file`` (what the
+download endpoints call for remote storage) at the same time. Exits with
+status 1 unless exactly one upstream fetch was made and every client got
+the whole file.
+"""
+
+import argparse
+import asyncio
+import http.server
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from starlette.requests import Request
+
+
+def _slow_handler(payload: bytes, chunks: int, delay: float):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        fetches = 0
+
+        def log_message(self, *args) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            Handler.fetches += 1
+            self.send_response(200)
+            self.send_header("Content-Type", "application/pdf")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            step = -(-len(payload) // chunks)
+            for start in range(0, len(payload), step):
+                self.wfile.write(payload[start : start + step])
+                self.wfile.flush()
+                time.sleep(delay)
+
+    return Handler
+
+
+def _request(path: str) -> Request:
+    return Request({
+        "type": "http", "method": "GET", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "headers": [], "scheme": "http", "server": ("test", 80),
+    })
+
+
+async def download_all(url: str, requests: int) -> list:
+    from app.core.file_proxy import proxy_remote_file
+    from app.core.http_client import close_http_client
+
+    async def download() -> bytes:
+        response = await proxy_remote_file(url, _request("/download"), "script.pdf")
+        return b"".join([chunk async for chunk in response.body_iterator])
+
+    try:
+        return await asyncio.gather(*(download() for _ in range(requests)))
+    finally:
+        await close_http_client()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--payload-kb", type=int, default=512)
+    args = parser.parse_args()
+
+    # The asset cache directory is read from the settings on first import.
+    os.environ["ASSET_CACHE_ROOT"] = tempfile.mkdtemp(prefix="download-coalescing-")
+    from app.core.file_proxy import proxy_stats
+
+    payload = os.urandom(args.payload_kb * 1024)
+    handler = _slow_handler(payload, chunks=10, delay=0.02)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/script.pdf"
+    try:
+        bodies = asyncio.run(download_all(url, args.requests))
+    finally:
+        server.shutdown()
+
+    intact = sum(body == payload for body in bodies)
+    print(
+        f"{args.requests} requests: {handler.fetches} upstream fetches "
+        f"(proxy counted {proxy_stats['upstream_fetches']}, {proxy_stats['coalesced']} coalesced), "
+        f"{intact} complete bodies"
+    )
+    if handler.fetches != 1 or proxy_stats["upstream_fetches"] != 1 or intact != args.requests:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""Drive the public API at a target concurrency and compare with a baseline.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.synthetic_catalogue --authors 10000 --plays 50000 --reset
+    python -m benchmarks.load_test --concurrency 50 --duration 60 --save-baseline
+    python -m benchmarks.load_test --concurrency 50 --duration 60
+
+Run with the usual backend environment (``.env``). The app is started with
+uvicorn against DATABASE_URL unless ``--base-url`` points at a running one.
+Requests are a weighted mix of scenarios: paginated play lists with random
+filter combinations, play/author/library pages, and script and file
+downloads (the synthetic catalogue serves these from a local stub PDF).
+
+Results are compared per scenario with the baseline stored under
+``--profile`` in ``--baselines``: the run fails (exit status 1) when p95
+latency rises or throughput drops by more than ``--tolerance``, or when any
+request fails. Baselines depend on the machine and database, so record them
+on the machine that runs the comparison.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import httpx
+from sqlmodel import Session, select
+
+from app.database import engine
+from app.models import Author, LiteraryPiece, Play, PlayFile
+from benchmarks.synthetic_catalogue import GENRES, NOUNS, THEMES
+
+PAGE_SIZE = 24
+SAMPLE_SIZE = 2_000
+DEFAULT_BASELINES = Path(__file__).with_name("baselines") / "load_test.json"
+
+
+@dataclass
+class Targets:
+    """Ids sampled from the database for the detail and download scenarios."""
+
+    plays: List[int]
+    authors: List[int]
+    pieces: List[int]
+    scripts: List[int]
+    files: List[tuple]
+
+
+@dataclass
+class Samples:
+    latencies: Dict[str, List[float]] = field(default_factory=lambda: defaultdict(list))
+    errors: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+
+def load_targets(rng: random.Random) -> Targets:
+    def sample(values: list) -> list:
+        return rng.sample(values, min(len(values), SAMPLE_SIZE))
+
+    with Session(engine) as session:
+        return Targets(
+            plays=sample(session.exec(select(Play.id)).all()),
+            authors=sample(session.exec(select(Author.id)).all()),
+            pieces=sample(session.exec(select(LiteraryPiece.id)).all()),
+            scripts=sample(session.exec(select(Play.id).where(Play.pdf_path.is_not(None))).all()),
+            files=sample(session.exec(select(PlayFile.play_id, PlayFile.id)).all()),
+        )
+
+
+def _play_filters(rng: random.Random, targets: Targets) -> str:
+    params = {"limit": str(PAGE_SIZE)}
+    filters: Dict[str, Callable[[], Dict[str, str]]] = {
+        "genre": lambda: {"genre": rng.choice(GENRES)},
+        "theme": lambda: {"theme": rng.choice(THEMES)},
+        "years": lambda: {"year_min": str((start := rng.randint(1870, 2000))), "year_max": str(start + 30)},
+        "cast": lambda: {"male_participants_max": str(rng.randint(2, 6)), "female_participants_min": "1"},
+        "author": lambda: {"author_id": str(rng.choice(targets.authors))},
+        "search": lambda: {"search": rng.choice(NOUNS)[rng.randint(0, 1)]},
+    }
+    for name in rng.sample(list(filters), rng.randint(0, 2)):
+        params.update(filters[name]())
+    return "/api/plays/?" + str(httpx.QueryParams(params))
+
+
+# name -> (weight, path factory)
+SCENARIOS: Dict[str, tuple] = {
+    "plays_list": (30, _play_filters),
+    "play_detail": (25, lambda rng, t: f"/api/plays/{rng.choice(t.plays)}"),
+    "authors_list": (5, lambda rng, t: f"/api/authors/?limit={PAGE_SIZE}"),
+    "author_detail": (10, lambda rng, t: f"/api/authors/{rng.choice(t.authors)}"),
+    "library_list": (10, lambda rng, t: f"/api/library/?limit={PAGE_SIZE}"),
+    "library_detail": (5, lambda rng, t: f"/api/library/{rng.choice(t.pieces)}"),
+    "script_download": (10, lambda rng, t: f"/api/plays/{rng.choice(t.scripts)}/download-pdf"),
+    "file_view": (5, lambda rng, t: "/api/plays/{}/files/{}/view".format(*rng.choice(t.files))),
+}
+
+
+def _active_scenarios(targets: Targets, names: Optional[List[str]]) -> Dict[str, tuple]:
+    required = {
+        "play_detail": targets.plays, "author_detail": targets.authors,
+        "library_detail": targets.pieces, "script_download": targets.scripts,
+        "file_view": targets.files, "plays_list": targets.authors,
+    }
+    return {
+        name: scenario
+        for name, scenario in SCENARIOS.items()
+        if (names is None or name in names) and required.get(name, [True])
+    }
+
+
+async def run_load(
+    base_url: str, targets: Targets, scenarios: Dict[str, tuple],
+    concurrency: int, duration: float, seed: int,
+) -> Samples:
+    samples = Samples()
+    names = list(scenarios)
+    weights = [scenarios[name][0] for name in names]
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+
+        async def worker(worker_id: int) -> None:
+            rng = random.Random(seed * 1_000 + worker_id)
+            while time.perf_counter() < deadline:
+                name = rng.choices(names, weights)[0]
+                path = scenarios[name][1](rng, targets)
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    await response.aread()
+                    ok = response.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    samples.latencies[name].append((time.perf_counter() - started) * 1000)
+                else:
+                    samples.errors[name] += 1
+
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return samples
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def summarize(samples: Samples, duration: float) -> Dict[str, Dict[str, float]]:
+    results = {}
+    everything: List[float] = []
+    for name in sorted(set(samples.latencies) | set(samples.errors)):
+        ordered = sorted(samples.latencies[name])
+        everything.extend(ordered)
+        results[name] = _stats(ordered, samples.errors[name], duration)
+    results["total"] = _stats(sorted(everything), sum(samples.errors.values()), duration)
+    return results
+
+
+def _stats(ordered: List[float], errors: int, duration: float) -> Dict[str, float]:
+    if not ordered:
+        return {"requests": 0, "errors": errors, "rps": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0}
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "rps": round(len(ordered) / duration, 1),
+        "p50_ms": round(_percentile(ordered, 0.50), 2),
+        "p95_ms": round(_percentile(ordered, 0.95), 2),
+        "p99_ms": round(_percentile(ordered, 0.99), 2),
+    }
+
+
+def regressions(
+    results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float
+) -> List[str]:
+    problems = []
+    for name, current in results.items():
+        if current["errors"]:
+            problems.append(f"{name}: {current['errors']} failed requests")
+        expected = baseline.get(name)
+        if not expected:
+            continue
+        if current["p95_ms"] > expected["p95_ms"] * (1 + tolerance):
+            problems.append(f"{name}: p95 {current['p95_ms']} ms > baseline {expected['p95_ms']} ms")
+        if current["rps"] < expected["rps"] * (1 - tolerance):
+            problems.append(f"{name}: {current['rps']} req/s < baseline {expected['rps']} req/s")
+    return problems
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(workers: int) -> tuple:
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        env=os.environ.copy(),
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            if httpx.get(f"{base_url}/api/health", timeout=1.0).status_code == 200:
+                return server, base_url
+        except httpx.TransportError:
+            pass
+        time.sleep(0.3)
+    server.terminate()
+    raise RuntimeError("uvicorn did not start")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", help="target a running server instead of starting one")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers when starting one")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of measured load")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds of unmeasured load first")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baselines", type=Path, default=DEFAULT_BASELINES)
+    parser.add_argument("--profile", default="default", help="baseline entry to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    targets = load_targets(rng)
+    scenarios = _active_scenarios(targets, args.scenarios)
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        server, base_url = _start_server(args.workers)
+    try:
+        if args.warmup:
+            asyncio.run(run_load(base_url, targets, scenarios, args.concurrency, args.warmup, args.seed + 1))
+        samples = asyncio.run(
+            run_load(base_url, targets, scenarios, args.concurrency, args.duration, args.seed)
+        )
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    results = summarize(samples, args.duration)
+    print(f"{'scenario':<16} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, stats in results.items():
+        print(
+            f"{name:<16} {stats['requests']:>9} {stats['errors']:>7} {stats['rps']:>8.1f} "
+            f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f}"
+        )
+
+    baselines = json.loads(args.baselines.read_text()) if args.baselines.exists() else {}
+    if args.save_baseline:
+        baselines[args.profile] = {
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "results": results,
+        }
+        args.baselines.parent.mkdir(parents=True, exist_ok=True)
+        args.baselines.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        print(f"Saved baseline '{args.profile}' to {args.baselines}")
+        return
+    baseline = baselines.get(args.profile)
+    if baseline is None:
+        print(f"No baseline '{args.profile}' in {args.baselines}; run with --save-baseline first.")
+        return
+    if baseline["concurrency"] != args.concurrency:
+        print(f"Warning: baseline was recorded at concurrency {baseline['concurrency']}.")
+    problems = regressions(results, baseline["results"], args.tolerance)
+    for problem in problems:
+        print(f"REGRESSION {problem}")
+    if problems:
+        sys.exit(1)
+    print("No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Check that public endpoints stay within their database query budgets.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.query_budgets
+    python -m benchmarks.query_budgets --database-url postgresql+psycopg2://... --verbose
+
+Run with the usual backend environment (``.env``). A small synthetic
+catalogue (benchmarks/synthetic_catalogue.py) is loaded into a temporary
+SQLite database, or into ``--database-url``, which is dropped and recreated,
+so never point it at a real catalogue. Each endpoint is requested once
+through a TestClient with the response cache off, and the statements are
+counted with ``app.query_stats.count_queries``. Budgets do not depend on the
+number of rows, so an N+1 (one query per listed row) exceeds them. Exits
+with status 1 when any endpoint goes over budget.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict
+
+# endpoint -> maximum statements. Every catalogue read starts with the
+# catalogue version lookup of app/http_cache.py.
+BUDGETS: Dict[str, int] = {
+    "/api/plays/": 3,
+    "/api/plays/?limit=24": 3,
+    "/api/plays/?limit=24&include_total=true&genre=Трагедия&year_min=1900": 4,
+    "/api/plays/?search=любов&limit=24": 3,
+    "/api/plays/{play}": 5,
+    "/api/authors/?limit=24": 2,
+    "/api/authors/{author}": 4,
+    "/api/library/": 5,
+    "/api/library/?limit=24": 5,
+    "/api/library/{piece}": 4,
+    "/api/search/scripts?q=script": 7,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="database to recreate (default: temporary SQLite)")
+    parser.add_argument("--verbose", action="store_true", help="print the statements of each request")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="query-budgets-"))
+    # Settings are read on first import of the app, so configure it first.
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{workdir / 'budgets.db'}"
+    os.environ["MEDIA_ROOT"] = str(workdir / "media")
+    os.environ["ASSET_CACHE_ROOT"] = str(workdir / "asset-cache")
+    os.environ["UPLOAD_SPOOL_ROOT"] = str(workdir / "upload-spool")
+    os.environ["RESPONSE_CACHE_MAX_ENTRIES"] = "0"
+    os.environ["DB_TIMING_HEADERS"] = "true"  # count_queries() needs QueryStatsMiddleware
+    os.environ["SEED_DEMO_DATA_ON_STARTUP"] = "false"
+
+    from fastapi.testclient import TestClient
+    from sqlmodel import SQLModel
+
+    from app.asset_deletions import stop_deletion_worker
+    from app.database import engine
+    from app.document_text import index_next, queue_missing_documents, stop_text_index_worker
+    from app.main import app
+    from app.query_stats import count_queries
+    from benchmarks.synthetic_catalogue import generate
+
+    SQLModel.metadata.drop_all(engine)
+    with TestClient(app) as client:  # startup applies the migrations
+        # The text is indexed synchronously below, not by the workers.
+        stop_deletion_worker()
+        stop_text_index_worker()
+        generate(authors=20, plays=200, pieces=60, seed=1, batch=500, pdf_share=0.5)
+        queue_missing_documents()
+        while index_next():  # script search needs the extracted text
+            pass
+        ids = {
+            "play": client.get("/api/plays/?limit=1").json()[0]["id"],
+            "author": client.get("/api/authors/?limit=1").json()[0]["id"],
+            "piece": client.get("/api/library/?limit=1").json()[0]["id"],
+        }
+        failures = 0
+        for template, budget in BUDGETS.items():
+            path = template.format(**ids)
+            with count_queries() as stats:
+                response = client.get(path)
+            over = stats.count > budget or response.status_code != 200
+            failures += over
+            print(
+                f"{'OVER ' if over else 'ok   '} {stats.count:>3} / {budget:<3} "
+                f"{response.status_code} {path}"
+            )
+            if args.verbose or over:
+                for statement in stats.statements:
+                    print(f"        {' '.join(statement.split())[:140]}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Measure catalogue search latency against row count.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.search_latency --database-url sqlite:///bench.db
+    python -m benchmarks.search_latency --database-url postgresql+psycopg2://...
+
+Run with the usual backend environment (``.env``). The target database
+is dropped and recreated, so never point this at a real catalogue.
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.models import Author, Play
+from app.search import apply_search, search_document
+
+WORDS = [
+    "любов", "война", "село", "град", "майка", "баща", "сватба", "гроб",
+    "love", "war", "village", "city", "mother", "father", "wedding", "grave",
+]
+TERMS = ["любов", "сватба град", "village", "под игото"]
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def load_rows(engine, rows: int, seed: int) -> None:
+    rng = random.Random(seed)
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        author = Author(name="Автор", biography_bg="Биография")
+        session.add(author)
+        session.commit()
+        session.bulk_insert_mappings(
+            Play,
+            [
+                {
+                    "title_bg": _sentence(rng, 3),
+                    "title_en": _sentence(rng, 3),
+                    "description_bg": _sentence(rng, 30),
+                    "description_en": _sentence(rng, 30),
+                    "author_id": author.id,
+                }
+                for _ in range(rows)
+            ],
+        )
+        session.commit()
+        if engine.dialect.name == "postgresql":
+            session.exec(
+                text(f"CREATE INDEX ix_play_search ON play USING GIN (({search_document('play')}))")
+            )
+            session.exec(text("ANALYZE play"))
+            session.commit()
+
+
+def time_searches(engine, repeats: int) -> list:
+    samples = []
+    with Session(engine) as session:
+        for _ in range(repeats):
+            for term in TERMS:
+                query, rank = apply_search(session, select(Play), Play, term)
+                if rank is not None:
+                    query = query.order_by(rank.desc())
+                started = time.perf_counter()
+                session.exec(query.order_by(Play.title_bg).limit(50)).all()
+                samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default="sqlite:///search-bench.db")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    print(f"{'rows':>8} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for rows in args.rows:
+        load_rows(engine, rows, args.seed)
+        samples = sorted(time_searches(engine, args.repeats))
+        p95 = samples[int(len(samples) * 0.95) - 1]
+        print(f"{rows:>8} {statistics.median(samples):>9.2f} {p95:>9.2f} {samples[-1]:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
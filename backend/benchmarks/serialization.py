@@ -0,0 +1,128 @@
+"""Compare FastAPI's validated list serialization with the orjson fast path.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --rows 100 1000 10000 --repeat 20
+
+Run with the usual backend environment (``.env``); no database is used.
+Plays (with their author), authors and library pieces (with author and
+play) are built in memory from the synthetic catalogue vocabulary. The
+"validated" path is what a list endpoint did before: ``from_orm`` for every
+row, FastAPI's ``serialize_response`` against the ``response_model`` and a
+JSONResponse. The "fast" path is ``app.serialization.orm_json_response``.
+Both must produce the same body; the best of ``--repeat`` runs is reported.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from typing import Callable, Dict, List, Tuple, Type
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from pydantic import BaseModel
+
+from app.models import Author, LiteraryPiece, Play
+from app.schemas import AuthorRead, LiteraryPieceRead, PlayRead
+from app.serialization import orm_json_response
+from benchmarks.synthetic_catalogue import GENRES, THEMES, _description, _phrase, _timestamps
+
+
+def build_rows(count: int, seed: int) -> Dict[str, list]:
+    """Transient ORM objects shaped like the list endpoints' results."""
+    rng = random.Random(seed)
+    authors = []
+    for author_id in range(1, max(1, count // 10) + 1):
+        bio_bg, bio_en = _description(rng, 4)
+        authors.append(Author(
+            id=author_id, name=f"Автор {author_id}", biography_bg=bio_bg, biography_en=bio_en,
+            photo_url=f"https://picsum.photos/seed/author-{author_id}/600/800", **_timestamps(rng),
+        ))
+    plays = []
+    for play_id in range(1, count + 1):
+        title_bg, title_en = _phrase(rng)
+        description_bg, description_en = _description(rng, 6)
+        author = rng.choice(authors)
+        plays.append(Play(
+            id=play_id, title_bg=title_bg, title_en=title_en,
+            description_bg=description_bg, description_en=description_en,
+            year=rng.randint(1870, 2024), genre=rng.choice(GENRES), theme=rng.choice(THEMES),
+            male_participants=rng.randint(0, 12), female_participants=rng.randint(0, 12),
+            author_id=author.id, author=author, **_timestamps(rng),
+        ))
+    pieces = []
+    for piece_id in range(1, count + 1):
+        title_bg, title_en = _phrase(rng)
+        description_bg, description_en = _description(rng, 4)
+        play = rng.choice(plays)
+        pieces.append(LiteraryPiece(
+            id=piece_id, title_bg=title_bg, title_en=title_en,
+            description_bg=description_bg, description_en=description_en,
+            author_id=play.author_id, author=play.author, play_id=play.id, play=play,
+            **_timestamps(rng),
+        ))
+    rows = {"plays": plays, "authors": authors, "library": pieces}
+    return {name: (items * count)[:count] for name, items in rows.items()}
+
+
+SCHEMAS: Dict[str, Type[BaseModel]] = {
+    "plays": PlayRead,
+    "authors": AuthorRead,
+    "library": LiteraryPieceRead,
+}
+
+
+async def validated_body(schema: Type[BaseModel], rows: list) -> bytes:
+    """The list endpoint path before the fast one, as FastAPI runs it."""
+    field = create_response_field(name=f"Response_{schema.__name__}", type_=List[schema])
+    content = [schema.from_orm(row) for row in rows]
+    encoded = await serialize_response(field=field, response_content=content)
+    return JSONResponse(encoded).body
+
+
+def fast_body(schema: Type[BaseModel], rows: list) -> bytes:
+    response = Response()  # the injected one, as FastAPI creates it
+    del response.headers["content-length"]
+    response.status_code = None
+    return orm_json_response(schema, rows, response).body
+
+
+def best_of(repeat: int, run: Callable[[], bytes]) -> Tuple[float, bytes]:
+    best, body = float("inf"), b""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = run()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, body
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1_000, 10_000])
+    parser.add_argument("--repeat", type=int, default=10, help="runs per measurement; the best counts")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    print(f"{'endpoint':<10} {'rows':>7} {'validated ms':>13} {'fast ms':>9} {'speedup':>8} {'body KiB':>9}")
+    for count in args.rows:
+        rows = build_rows(count, args.seed)
+        for name, schema in SCHEMAS.items():
+            slow_ms, slow = best_of(
+                args.repeat, lambda: loop.run_until_complete(validated_body(schema, rows[name]))
+            )
+            fast_ms, fast = best_of(args.repeat, lambda: fast_body(schema, rows[name]))
+            if slow != fast:
+                raise SystemExit(f"{name}: the fast path produced a different body")
+            print(
+                f"{name:<10} {count:>7} {slow_ms:>13.2f} {fast_ms:>9.2f} "
+                f"{slow_ms / fast_ms:>7.1f}x {len(fast) / 1024:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Count the database round trips the app makes before it is ready to serve.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.startup_queries --budget 6
+    python -m benchmarks.startup_queries --budget 6 --verbose
+
+Run with the usual backend environment (``.env``); DATABASE_URL should point
+at a migrated database, as on a normal restart. Startup runs twice and the
+second, warm run is counted. Statements issued by the background workers
+started at the end are not counted. Exits with status 1 when the warm run
+needs more than ``--budget`` statements, so it can gate CI or a deploy.
+"""
+
+import argparse
+import asyncio
+import sys
+import threading
+from typing import List
+
+from sqlalchemy import event
+
+from app.database import async_engine, engine, read_engines
+from app.main import create_app
+
+
+def count_startup_statements() -> List[str]:
+    """Statements run by the startup handlers on the calling thread."""
+    statements: List[str] = []
+    thread = threading.get_ident()
+
+    def _record(_conn, _cursor, statement, _parameters, _context, _executemany) -> None:
+        if threading.get_ident() == thread:
+            statements.append(" ".join(statement.split()))
+
+    bound = [engine, async_engine.sync_engine, *(e.sync_engine for e in read_engines)]
+    for target in bound:
+        event.listen(target, "before_cursor_execute", _record)
+    app = create_app()
+    try:
+        asyncio.run(app.router.startup())
+    finally:
+        for target in bound:
+            event.remove(target, "before_cursor_execute", _record)
+        asyncio.run(app.router.shutdown())
+    return statements
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget", type=int, default=6, help="allowed statements on a warm start")
+    parser.add_argument("--verbose", action="store_true", help="print every statement")
+    args = parser.parse_args()
+
+    cold = count_startup_statements()
+    warm = count_startup_statements()
+    print(f"cold start: {len(cold)} statements, warm start: {len(warm)} (budget {args.budget})")
+    if args.verbose:
+        for statement in warm:
+            print(f"  {statement[:120]}")
+    if len(warm) > args.budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Upload, read and delete throughput of the storage backends.
+
+Usage (from ``backend/``, with the usual backend environment)::
+
+    python -m benchmarks.storage_backends --backends local s3 --files 50 --size-kb 512
+
+The s3 backend needs ``S3_BUCKET`` (and ``S3_ENDPOINT_URL`` for a local
+stand-in such as MinIO); cloudinary talks to the real service, so it is only
+measured when asked for explicitly.
+"""
+
+import argparse
+import io
+import time
+
+from app.core.storage import _registry
+
+
+def run(backend, files: int, payload: bytes):
+    started = time.perf_counter()
+    urls = [
+        backend.upload(io.BytesIO(payload), "benchmark", name_prefix="bench", filename="bench.bin")
+        for _ in range(files)
+    ]
+    uploaded = time.perf_counter()
+    for url in urls:
+        with backend.open(url) as handle:
+            while handle.read(1024 * 1024):
+                pass
+    read = time.perf_counter()
+    backend.delete_many(urls)
+    deleted = time.perf_counter()
+    return uploaded - started, read - uploaded, deleted - read
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=["local"])
+    parser.add_argument("--files", type=int, default=50)
+    parser.add_argument("--size-kb", type=int, default=512)
+    args = parser.parse_args()
+
+    payload = b"x" * args.size_kb * 1024
+    megabytes = args.files * len(payload) / (1024 * 1024)
+    backends = _registry()
+    print(f"{'backend':<12} {'upload MB/s':>12} {'read MB/s':>10} {'delete s':>9}")
+    for name in args.backends:
+        if name not in backends:
+            print(f"{name:<12} not configured")
+            continue
+        upload_s, read_s, delete_s = run(backends[name], args.files, payload)
+        print(f"{name:<12} {megabytes / upload_s:>12.1f} {megabytes / read_s:>10.1f} {delete_s:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""Bulk-load a synthetic bilingual catalogue at production-like scale.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.synthetic_catalogue --authors 10000 --plays 50000 --reset
+    python -m benchmarks.synthetic_catalogue --plays 5000 --seed 7
+
+Run with the usual backend environment (``.env``); rows go to DATABASE_URL.
+``--reset`` drops every table and re-runs the migrations first, so never use
+it against a real catalogue; without it the rows are appended. The same
+``--seed`` on an empty database gives the same catalogue. Scripts, play files
+and library PDFs all point at one small PDF stored with the local storage
+backend, so downloads are served from disk (see benchmarks/load_test.py).
+"""
+
+import argparse
+import io
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Tuple
+
+from sqlalchemy import func, insert, text
+from sqlmodel import Session, SQLModel, select
+
+from app.core.storage import get_storage
+from app.database import engine
+from app.http_cache import commit_catalogue_change
+from app.migrations import run_migrations
+from app.models import Author, LiteraryPiece, Play, PlayFile, PlayImage
+
+FIRST_NAMES = [
+    ("Иван", "Ivan"), ("Петър", "Petar"), ("Мария", "Maria"), ("Елена", "Elena"),
+    ("Георги", "Georgi"), ("Димитър", "Dimitar"), ("Николай", "Nikolay"), ("Яна", "Yana"),
+    ("Стефан", "Stefan"), ("Христо", "Hristo"), ("Радой", "Radoy"), ("Вера", "Vera"),
+    ("Станислав", "Stanislav"), ("Теодора", "Teodora"), ("Константин", "Konstantin"),
+    ("Александра", "Aleksandra"), ("Борис", "Boris"), ("Людмила", "Lyudmila"),
+]
+LAST_NAMES = [
+    ("Вазов", "Vazov"), ("Яворов", "Yavorov"), ("Стратиев", "Stratiev"), ("Радичков", "Radichkov"),
+    ("Петров", "Petrov"), ("Добрева", "Dobreva"), ("Костов", "Kostov"), ("Минкова", "Minkova"),
+    ("Гечев", "Gechev"), ("Николова", "Nikolova"), ("Ангелов", "Angelov"), ("Илиева", "Ilieva"),
+    ("Йовков", "Yovkov"), ("Ралин", "Ralin"), ("Вежинов", "Vezhinov"), ("Каралийчев", "Karaliychev"),
+]
+# (bg, en) pairs so both titles and descriptions say the same thing
+NOUNS = [
+    ("любов", "love"), ("война", "war"), ("село", "village"), ("град", "city"),
+    ("майка", "mother"), ("баща", "father"), ("сватба", "wedding"), ("мъгла", "mist"),
+    ("планина", "mountain"), ("река", "river"), ("памет", "memory"), ("песен", "song"),
+    ("зима", "winter"), ("пролет", "spring"), ("дом", "home"), ("път", "road"),
+    ("сянка", "shadow"), ("огън", "fire"), ("съд", "trial"), ("хан", "inn"),
+]
+ADJECTIVES = [
+    ("последната", "the last"), ("тихата", "the quiet"), ("изгубената", "the lost"),
+    ("далечната", "the distant"), ("старата", "the old"), ("новата", "the new"),
+    ("горчивата", "the bitter"), ("бялата", "the white"), ("чуждата", "the foreign"),
+]
+GENRES = ["Трагедия", "Комедия", "Историческа драма", "Съвременна драма", "Мелодрама", "Фарс"]
+THEMES = ["Семейство", "История", "Любов", "Село и град", "Власт", "Емиграция", "Памет"]
+BASE_DATE = datetime(2020, 1, 1)
+
+
+def _stub_pdf() -> bytes:
+    """A valid one-page PDF with a line of text."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        b"/Resources << /Font << /F1 5 0 R >> >> /Contents 4 0 R >>",
+    ]
+    stream = b"BT /F1 12 Tf 72 720 Td (Synthetic script for load tests) Tj ET"
+    objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF" % (len(objects) + 1, xref)
+    return out
+
+
+def _phrase(rng: random.Random) -> Tuple[str, str]:
+    (adj_bg, adj_en), (noun_bg, noun_en) = rng.choice(ADJECTIVES), rng.choice(NOUNS)
+    return f"{adj_bg.capitalize()} {noun_bg}", f"{adj_en.capitalize()} {noun_en}"
+
+
+def _description(rng: random.Random, sentences: int) -> Tuple[str, str]:
+    bg, en = [], []
+    for _ in range(sentences):
+        (n1_bg, n1_en), (n2_bg, n2_en) = rng.sample(NOUNS, 2)
+        bg.append(f"История за {n1_bg} и {n2_bg}.")
+        en.append(f"A story of {n1_en} and {n2_en}.")
+    return " ".join(bg), " ".join(en)
+
+
+def _timestamps(rng: random.Random) -> Dict[str, datetime]:
+    created = BASE_DATE + timedelta(minutes=rng.randrange(60 * 24 * 365 * 5))
+    return {"created_at": created, "updated_at": created}
+
+
+def _next_id(session: Session, model: type) -> int:
+    return (session.exec(select(func.max(model.id))).one() or 0) + 1
+
+
+def _batched(rows: List[dict], size: int) -> Iterator[List[dict]]:
+    for start in range(0, len(rows), size):
+        yield rows[start : start + size]
+
+
+def generate(
+    authors: int, plays: int, pieces: int, seed: int, batch: int, pdf_share: float
+) -> Dict[str, int]:
+    """Insert the synthetic rows and return how many went into each table."""
+    rng = random.Random(seed)
+    stub_url = get_storage("local").upload(
+        io.BytesIO(_stub_pdf()), "synthetic", name_prefix="script", filename="script.pdf"
+    )
+    with Session(engine) as session:
+        first = {
+            model: _next_id(session, model)
+            for model in (Author, Play, PlayImage, PlayFile, LiteraryPiece)
+        }
+
+    author_ids = list(range(first[Author], first[Author] + authors))
+    author_rows = []
+    for author_id in author_ids:
+        (first_bg, first_en), (last_bg, last_en) = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        bio_bg, bio_en = _description(rng, rng.randint(2, 6))
+        author_rows.append({
+            "id": author_id,
+            "name": f"{first_bg} {last_bg}",
+            "biography_bg": f"{first_bg} {last_bg} е драматург. {bio_bg}",
+            "biography_en": f"{first_en} {last_en} is a playwright. {bio_en}",
+            "photo_url": (
+                f"https://picsum.photos/seed/author-{author_id}/600/800" if rng.random() < 0.6 else None
+            ),
+            **_timestamps(rng),
+        })
+
+    play_ids = list(range(first[Play], first[Play] + plays))
+    play_rows, image_rows, file_rows = [], [], []
+    for play_id in play_ids:
+        title_bg, title_en = _phrase(rng)
+        description_bg, description_en = _description(rng, rng.randint(3, 12))
+        play_rows.append({
+            "id": play_id,
+            "title_bg": title_bg,
+            "title_en": title_en,
+            "description_bg": description_bg,
+            "description_en": description_en,
+            "year": rng.randint(1870, 2024),
+            "genre": rng.choice(GENRES),
+            "theme": rng.choice(THEMES) if rng.random() < 0.8 else None,
+            "male_participants": rng.randint(0, 12),
+            "female_participants": rng.randint(0, 12),
+            "pdf_path": stub_url if rng.random() < pdf_share else None,
+            "author_id": rng.choice(author_ids),
+            **_timestamps(rng),
+        })
+        for _ in range(rng.choice((0, 1, 1, 2, 3))):
+            image_rows.append({
+                "id": first[PlayImage] + len(image_rows),
+                "image_url": f"https://picsum.photos/seed/play-{play_id}-{len(image_rows)}/1200/800",
+                "caption_bg": "Сцена от представлението",
+                "caption_en": "A scene from the performance",
+                "play_id": play_id,
+            })
+        for _ in range(rng.choice((0, 0, 1, 2))):
+            file_rows.append({
+                "id": first[PlayFile] + len(file_rows),
+                "file_url": stub_url,
+                "caption_bg": "Програма",
+                "caption_en": "Programme",
+                "play_id": play_id,
+            })
+
+    piece_rows = []
+    for offset in range(pieces):
+        title_bg, title_en = _phrase(rng)
+        description_bg, description_en = _description(rng, rng.randint(2, 8))
+        piece_rows.append({
+            "id": first[LiteraryPiece] + offset,
+            "title_bg": title_bg,
+            "title_en": title_en,
+            "description_bg": description_bg,
+            "description_en": description_en,
+            "pdf_path": stub_url if rng.random() < pdf_share else None,
+            "author_id": rng.choice(author_ids),
+            "play_id": rng.choice(play_ids) if play_ids and rng.random() < 0.5 else None,
+            **_timestamps(rng),
+        })
+
+    tables = [
+        (Author, author_rows), (Play, play_rows), (PlayImage, image_rows),
+        (PlayFile, file_rows), (LiteraryPiece, piece_rows),
+    ]
+    with engine.begin() as connection:
+        for model, rows in tables:
+            for chunk in _batched(rows, batch):
+                connection.execute(insert(model.__table__), chunk)
+        if engine.dialect.name == "postgresql":
+            # Explicit ids leave the serial sequences behind.
+            for model, _rows in tables:
+                table = model.__tablename__
+                connection.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                    f"(SELECT coalesce(max(id), 1) FROM {table}))"
+                ))
+    if engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(text("ANALYZE"))
+    with Session(engine) as session:
+        commit_catalogue_change(session)  # new ETags for cached clients
+    return {model.__tablename__: len(rows) for model, rows in tables}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--authors", type=int, default=10_000)
+    parser.add_argument("--plays", type=int, default=50_000)
+    parser.add_argument("--pieces", type=int, default=None, help="library pieces (default: plays / 5)")
+    parser.add_argument("--pdf-share", type=float, default=0.3, help="share of rows with a PDF")
+    parser.add_argument("--batch", type=int, default=5_000, help="rows per INSERT batch")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="drop all tables first")
+    args = parser.parse_args()
+
+    if args.reset:
+        SQLModel.metadata.drop_all(engine)
+    run_migrations()
+    started = time.perf_counter()
+    counts = generate(
+        args.authors,
+        args.plays,
+        args.plays // 5 if args.pieces is None else args.pieces,
+        args.seed,
+        args.batch,
+        args.pdf_share,
+    )
+    elapsed = time.perf_counter() - started
+    print(", ".join(f"{count} {table}" for table, count in counts.items()) + f" in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
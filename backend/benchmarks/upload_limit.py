@@ -0,0 +1,102 @@
+"""Check that oversized admin uploads are answered with 413, however they are sent.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.upload_limit
+    python -m benchmarks.upload_limit --max-bytes 100000
+
+Run with the usual backend environment (``.env``); the app is started with
+uvicorn, MAX_UPLOAD_BYTES set to ``--max-bytes`` and a temporary SQLite
+database. A multipart upload goes through the full middleware stack with a
+declared Content-Length and with a chunked body (no Content-Length, so the
+cap is only noticed while the body streams in), each over the cap and under
+it. Exits with status 1 when any case gets an unexpected answer, including
+a dropped connection.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Iterator
+
+BOUNDARY = "upload-limit-boundary"
+CHUNK_SIZE = 16 * 1024
+
+
+def multipart_body(size: int) -> bytes:
+    return (
+        f"--{BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="photo.jpg"\r\n'
+        "Content-Type: image/jpeg\r\n\r\n"
+    ).encode() + b"x" * size + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+def chunked(body: bytes) -> Iterator[bytes]:
+    for start in range(0, len(body), CHUNK_SIZE):
+        yield body[start : start + CHUNK_SIZE]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-bytes", type=int, default=100_000, help="MAX_UPLOAD_BYTES for the run")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="upload-limit-"))
+    # Settings are read on first import of the app, so configure it first.
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir / 'upload-limit.db'}"
+    os.environ["MEDIA_ROOT"] = str(workdir / "media")
+    os.environ["ASSET_CACHE_ROOT"] = str(workdir / "asset-cache")
+    os.environ["UPLOAD_SPOOL_ROOT"] = str(workdir / "upload-spool")
+    os.environ["MAX_UPLOAD_BYTES"] = str(args.max_bytes)
+    os.environ["SEED_DEMO_DATA_ON_STARTUP"] = "false"
+
+    import httpx
+
+    from app.core.config import get_settings
+    from app.upload_limit import MULTIPART_OVERHEAD, TOO_LARGE_DETAIL
+    from benchmarks.load_test import _start_server
+
+    too_large = multipart_body(args.max_bytes + MULTIPART_OVERHEAD + 1)
+    small = multipart_body(1024)
+    path = "/api/admin/authors/999999/upload-photo"
+    failures = 0
+    server, base_url = _start_server(workers=1)
+    try:
+        with httpx.Client(base_url=base_url, timeout=30.0) as client:
+            token = client.post(
+                "/api/admin/login", json={"password": get_settings().admin_password}
+            ).json()["access_token"]
+            headers = {
+                "Authorization": f"Bearer {token}",
+                "Content-Type": f"multipart/form-data; boundary={BOUNDARY}",
+            }
+            # (case, body, expect 413); small uploads reach the route (unknown author: 404)
+            cases = [
+                ("declared, over the cap", too_large, True),
+                ("chunked, over the cap", chunked(too_large), True),
+                ("declared, under the cap", small, False),
+                ("chunked, under the cap", chunked(small), False),
+            ]
+            for name, body, expect_413 in cases:
+                try:
+                    response = client.post(path, content=body, headers=headers)
+                    status, detail = response.status_code, response.json().get("detail")
+                except (httpx.HTTPError, ValueError) as exc:  # dropped connection or non-JSON answer
+                    status, detail = None, repr(exc)
+                if expect_413:
+                    ok = status == 413 and detail == TOO_LARGE_DETAIL
+                else:
+                    ok = status == 404
+                failures += not ok
+                print(f"{'ok  ' if ok else 'FAIL'} {name:<24} {status} {detail}")
+    finally:
+        server.terminate()
+        server.wait()
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Peak memory of one upload: whole-file read versus chunked streaming.
+
+Usage (from ``backend/``, with the usual backend environment)::
+
+    python -m benchmarks.upload_memory --sizes-mb 5 20 45
+
+Cloudinary is replaced by a stub that discards what it receives, so only
+the memory held by our side of the upload is measured (tracemalloc peak).
+"""
+
+import argparse
+import tempfile
+import tracemalloc
+
+import cloudinary.uploader
+from fastapi import UploadFile
+
+from app.core import cloudinary_service
+
+
+def _stub_upload(file, **options):
+    return {"secure_url": "https://res.cloudinary.com/stub", "public_id": "stub"}
+
+
+def _spooled_upload(size: int) -> UploadFile:
+    # Same spooling as Starlette's multipart parser: rolls to disk after 1 MB.
+    spooled = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    block = b"x" * (1024 * 1024)
+    for _ in range(size // len(block)):
+        spooled.write(block)
+    spooled.seek(0)
+    return UploadFile(file=spooled, filename="script.pdf")
+
+
+def legacy_upload(upload: UploadFile) -> None:
+    """The previous implementation: read everything, then send one request."""
+    content = upload.file.read()
+    cloudinary.uploader.upload(content, folder="pdfs", public_id="x")
+
+
+def peak_mb(run, upload: UploadFile) -> float:
+    tracemalloc.start()
+    run(upload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / (1024 * 1024)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes-mb", type=int, nargs="+", default=[5, 20, 45])
+    args = parser.parse_args()
+
+    cloudinary.uploader.upload = _stub_upload
+    cloudinary.uploader.upload_large_part = _stub_upload
+
+    print(f"{'size MB':>8} {'read() peak MB':>15} {'chunked peak MB':>16}")
+    for size_mb in args.sizes_mb:
+        size = size_mb * 1024 * 1024
+        legacy = peak_mb(legacy_upload, _spooled_upload(size))
+        chunked = peak_mb(
+            lambda upload: cloudinary_service.upload_file(upload, "pdfs"),
+            _spooled_upload(size),
+        )
+        print(f"{size_mb:>8} {legacy:>15.1f} {chunked:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Compare per-request HTTP clients with the shared pooled AsyncClient.
+
+Usage (from ``backend/``, with the usual backend environment)::
+
+    python -m benchmarks.upstream_proxy --requests 500 --concurrency 32
+
+A local stand-in server plays the role of Cloudinary and counts accepted
+TCP connections, so the output shows connection reuse next to throughput.
+"""
+
+import argparse
+import asyncio
+import http.server
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from app.core.http_client import close_http_client, get_http_client
+
+
+class _StubServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+    connections = 0
+
+    def get_request(self):
+        self.connections += 1
+        return super().get_request()
+
+
+def _stub_handler(payload: bytes):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/pdf")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    return Handler
+
+
+def run_per_request_clients(url: str, requests: int, concurrency: int) -> float:
+    """The previous behaviour: a fresh httpx.Client per download, in threads."""
+
+    def fetch(_: int) -> None:
+        with httpx.Client() as client:
+            client.get(url, timeout=30.0).raise_for_status()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(fetch, range(requests)))
+    return time.perf_counter() - started
+
+
+async def run_shared_client(url: str, requests: int, concurrency: int) -> float:
+    client = get_http_client()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch() -> None:
+        async with semaphore:
+            async with client.stream("GET", url) as response:
+                response.raise_for_status()
+                async for _ in response.aiter_bytes():
+                    pass
+
+    started = time.perf_counter()
+    await asyncio.gather(*(fetch() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    await close_http_client()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--payload-kb", type=int, default=256)
+    args = parser.parse_args()
+
+    server = _StubServer(("127.0.0.1", 0), _stub_handler(b"x" * args.payload_kb * 1024))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/script.pdf"
+
+    print(f"{'client':<22} {'req/s':>9} {'connections':>12}")
+    for name, run in (
+        ("httpx.Client/request", lambda: run_per_request_clients(url, args.requests, args.concurrency)),
+        ("shared AsyncClient", lambda: asyncio.run(run_shared_client(url, args.requests, args.concurrency))),
+    ):
+        server.connections = 0
+        elapsed = run()
+        print(f"{name:<22} {args.requests / elapsed:>9.1f} {server.connections:>12}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
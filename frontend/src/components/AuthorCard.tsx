@@ -1,8 +1,8 @@
 import { useTranslation } from 'react-i18next'
 import { Link } from 'react-router-dom'
 import type { Author } from '../types'
-import { getLocalized } from '../types'
-import { API_BASE } from '../services/api'
+import { getLocalized, variantSrcSet } from '../types'
+import { mediaUrl } from '../services/api'
 
 type Props = {
   author: Author
@@ -13,15 +13,20 @@ const AuthorCard = ({ author }: Props) => {
   const bio = getLocalized(author.biography_bg, author.biography_en, i18n.language)
 
   const src = author.photo_url
-    ? author.photo_url.startsWith('http')
-      ? author.photo_url
-      : `${API_BASE}${author.photo_url}`
+    ? mediaUrl(author.photo_url)
     : 'https://images.unsplash.com/photo-1478720568477-152d9b164e26'
+  const srcSet = variantSrcSet(author.photo_variants, mediaUrl)
 
   return (
     <article className="card">
       <div className="card__media">
-        <img src={src} alt={author.name} />
+        <img
+          src={src}
+          srcSet={srcSet}
+          sizes="(max-width: 640px) 100vw, 320px"
+          alt={author.name}
+          loading="lazy"
+        />
       </div>
       <div className="card__body">
         <h3>{author.name}</h3>
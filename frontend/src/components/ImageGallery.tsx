@@ -21,6 +21,7 @@ function linkifyText(text: string) {
 export type ImageWithCaption = {
   url: string
   caption: string
+  srcSet?: string
 }
 
 type Props = {
@@ -70,7 +71,13 @@ const ImageGallery = ({ images, title, emptyMessage }: Props) => {
               }
             }}
           >
-            <img src={item.url} alt={item.caption || `Gallery ${idx + 1}`} loading="lazy" />
+            <img
+              src={item.url}
+              srcSet={item.srcSet}
+              sizes="(max-width: 640px) 50vw, 240px"
+              alt={item.caption || `Gallery ${idx + 1}`}
+              loading="lazy"
+            />
           </figure>
         ))}
       </div>
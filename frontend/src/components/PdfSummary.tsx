@@ -0,0 +1,38 @@
+import { useTranslation } from 'react-i18next'
+import { mediaUrl } from '../services/api'
+import type { PdfDetails } from '../types'
+
+type Props = {
+  pdf: PdfDetails
+  title: string
+}
+
+const formatSize = (bytes: number) =>
+  bytes >= 1024 * 1024 ? `${(bytes / (1024 * 1024)).toFixed(1)} MB` : `${Math.ceil(bytes / 1024)} KB`
+
+const PdfSummary = ({ pdf, title }: Props) => {
+  const { t } = useTranslation()
+  if (!pdf.pdf_preview_url && pdf.pdf_page_count == null && pdf.pdf_size == null) {
+    return null
+  }
+
+  return (
+    <div className="pdf-summary">
+      {pdf.pdf_preview_url && (
+        <img
+          src={mediaUrl(pdf.pdf_preview_url)}
+          alt={t('common.pdfPreview', { title })}
+          loading="lazy"
+        />
+      )}
+      <div className="meta">
+        {pdf.pdf_page_count != null && (
+          <span>{t('common.pdfPages', { count: pdf.pdf_page_count })}</span>
+        )}
+        {pdf.pdf_size != null && <span>PDF · {formatSize(pdf.pdf_size)}</span>}
+      </div>
+    </div>
+  )
+}
+
+export default PdfSummary
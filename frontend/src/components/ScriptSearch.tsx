@@ -0,0 +1,80 @@
+import { useEffect, useState } from 'react'
+import { useTranslation } from 'react-i18next'
+import { Link } from 'react-router-dom'
+import { api } from '../services/api'
+import type { ScriptSearchResult } from '../types'
+import { getLocalized } from '../types'
+import SearchBar from './SearchBar'
+
+const MIN_QUERY_LENGTH = 2
+const DEBOUNCE_MS = 300
+
+/** Search for a line or character name inside uploaded scripts. */
+const ScriptSearch = () => {
+  const { t, i18n } = useTranslation()
+  const [query, setQuery] = useState('')
+  const [results, setResults] = useState<ScriptSearchResult[] | null>(null)
+  const [error, setError] = useState<string | null>(null)
+
+  useEffect(() => {
+    const term = query.trim()
+    if (term.length < MIN_QUERY_LENGTH) {
+      setResults(null)
+      return
+    }
+    let cancelled = false
+    const timer = setTimeout(async () => {
+      try {
+        const data = await api.searchScripts(term)
+        if (!cancelled) {
+          setResults(data)
+          setError(null)
+        }
+      } catch {
+        if (!cancelled) setError(t('plays.scriptSearchError'))
+      }
+    }, DEBOUNCE_MS)
+    return () => {
+      cancelled = true
+      clearTimeout(timer)
+    }
+  }, [query, t])
+
+  return (
+    <div className="script-search">
+      <SearchBar
+        label={t('plays.scriptSearchLabel')}
+        value={query}
+        onChange={setQuery}
+        placeholder={t('plays.scriptSearchPlaceholder')}
+      />
+      {error && <p className="muted">{error}</p>}
+      {results && !results.length && <p className="muted">{t('plays.noResults')}</p>}
+      {results && results.length > 0 && (
+        <ul className="script-search__results">
+          {results.map(({ play, matches }) => (
+            <li key={play.id}>
+              <Link to={`/plays/${play.id}`}>
+                {getLocalized(play.title_bg, play.title_en, i18n.language)}
+              </Link>
+              {play.author && <span className="muted"> — {play.author.name}</span>}
+              <ul>
+                {matches.map((match) => (
+                  <li key={`${match.source}-${match.source_id}-${match.page}`}>
+                    <span className="muted">
+                      {t(`plays.scriptSource.${match.source}`)}, {t('plays.scriptPage', { page: match.page })}:
+                    </span>{' '}
+                    {/* The API escapes the text; only <mark> tags are markup. */}
+                    <span dangerouslySetInnerHTML={{ __html: match.snippet }} />
+                  </li>
+                ))}
+              </ul>
+            </li>
+          ))}
+        </ul>
+      )}
+    </div>
+  )
+}
+
+export default ScriptSearch
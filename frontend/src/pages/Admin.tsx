@@ -241,21 +241,33 @@ const Admin = () => {
       if (playPdfFile) {
         await api.uploadPlayPdf(result.id, playPdfFile, token)
       }
-      for (const item of playImageItems) {
-        if (item.file) {
-          await api.uploadPlayImage(result.id, item.file, token, {
-            caption_bg: item.caption_bg.trim() || undefined,
-            caption_en: item.caption_en.trim() || undefined,
-          })
-        }
+      const newImages = playImageItems.flatMap((item) =>
+        item.file
+          ? [
+              {
+                file: item.file,
+                caption_bg: item.caption_bg.trim(),
+                caption_en: item.caption_en.trim(),
+              },
+            ]
+          : []
+      )
+      if (newImages.length) {
+        await api.uploadPlayGallery(result.id, 'images', newImages, token)
       }
-      for (const item of playFileItems) {
-        if (item.file) {
-          await api.uploadPlayFile(result.id, item.file, token, {
-            caption_bg: item.caption_bg.trim() || undefined,
-            caption_en: item.caption_en.trim() || undefined,
-          })
-        }
+      const newFiles = playFileItems.flatMap((item) =>
+        item.file
+          ? [
+              {
+                file: item.file,
+                caption_bg: item.caption_bg.trim(),
+                caption_en: item.caption_en.trim(),
+              },
+            ]
+          : []
+      )
+      if (newFiles.length) {
+        await api.uploadPlayGallery(result.id, 'files', newFiles, token)
       }
 
       if (editingPlayId) {
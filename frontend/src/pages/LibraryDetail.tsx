@@ -3,6 +3,7 @@ import { useTranslation } from 'react-i18next'
 import { Link, useParams } from 'react-router-dom'
 import ErrorMessage from '../components/ErrorMessage'
 import Loader from '../components/Loader'
+import PdfSummary from '../components/PdfSummary'
 import { api } from '../services/api'
 import type { LiteraryPiece } from '../types'
 import { getLocalized } from '../types'
@@ -62,6 +63,7 @@ const LibraryDetail = () => {
           )}
         </div>
         <p>{description}</p>
+        {piece.pdf_path && <PdfSummary pdf={piece} title={title} />}
         <div className="actions" style={{ display: 'flex', gap: '1rem', flexWrap: 'wrap' }}>
           {piece.pdf_path ? (
             <button
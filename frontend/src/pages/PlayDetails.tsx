@@ -4,9 +4,10 @@ import { Link, useParams } from 'react-router-dom'
 import ErrorMessage from '../components/ErrorMessage'
 import ImageGallery from '../components/ImageGallery'
 import Loader from '../components/Loader'
-import { api, API_BASE } from '../services/api'
+import PdfSummary from '../components/PdfSummary'
+import { api, mediaUrl } from '../services/api'
 import type { PlayDetail } from '../types'
-import { getLocalized } from '../types'
+import { getLocalized, variantSrcSet } from '../types'
 
 const PlayDetails = () => {
   const { t, i18n } = useTranslation()
@@ -45,7 +46,8 @@ const PlayDetails = () => {
 
   const galleryImages =
     play.images?.map((img) => ({
-      url: img.image_url.startsWith('http') ? img.image_url : `${API_BASE}${img.image_url}`,
+      url: mediaUrl(img.image_url),
+      srcSet: variantSrcSet(img.variants, mediaUrl),
       caption: getLocalized(img.caption_bg ?? null, img.caption_en ?? null, lang),
     })) ?? []
 
@@ -67,6 +69,7 @@ const PlayDetails = () => {
           {play.genre && <span>{t('playDetail.genre')}: {play.genre}</span>}
         </div>
         <p>{description}</p>
+        {play.pdf_path && <PdfSummary pdf={play} title={title} />}
 
         <div className="actions" style={{ display: 'flex', gap: '1rem', flexWrap: 'wrap' }}>
           <Link to={`/library?author=${play.author_id}`} className="btn btn--ghost">
@@ -3,6 +3,7 @@ import { useTranslation } from 'react-i18next'
 import ErrorMessage from '../components/ErrorMessage'
 import Loader from '../components/Loader'
 import PlayCard from '../components/PlayCard'
+import ScriptSearch from '../components/ScriptSearch'
 import SearchBar from '../components/SearchBar'
 import { api } from '../services/api'
 import type { Play } from '../types'
@@ -266,6 +267,7 @@ const Plays = () => {
             />
           </div>
         </div>
+        <ScriptSearch />
         {loading ? (
           <Loader />
         ) : error ? (
@@ -3,15 +3,33 @@ import type {
   AuthorDetail,
   LiteraryPiece,
   Play,
+  PlayBatchUploadResult,
   PlayDetail,
   PlayFile,
   PlayImage,
+  ScriptSearchResult,
   TokenResponse,
 } from '../types'
 
 export const API_BASE =
   import.meta.env.VITE_API_BASE_URL?.replace(/\/$/, '') ?? 'http://localhost:8000'
 
+/** Absolute URL for a stored file (local uploads are served by the API). */
+export const mediaUrl = (url: string) => (url.startsWith('http') ? url : `${API_BASE}${url}`)
+
+// Highest catalogue version returned by admin calls. Public reads send it so
+// the API doesn't answer them from a read replica that is still behind.
+let seenCatalogueVersion = 0
+
+function rememberCatalogueVersion(response: Response): Response {
+  const version = Number(response.headers.get('X-Catalogue-Version'))
+  if (version > seenCatalogueVersion) seenCatalogueVersion = version
+  return response
+}
+
+const adminFetch = (input: string, init: RequestInit) =>
+  fetch(input, init).then(rememberCatalogueVersion)
+
 async function request<T>(
   path: string,
   options: RequestInit = {},
@@ -24,10 +42,15 @@ async function request<T>(
   if (token) {
     headers.set('Authorization', `Bearer ${token}`)
   }
-  const response = await fetch(`${API_BASE}${path}`, {
-    ...options,
-    headers,
-  })
+  if (seenCatalogueVersion && !path.startsWith('/api/admin')) {
+    headers.set('X-Min-Catalogue-Version', String(seenCatalogueVersion))
+  }
+  const response = rememberCatalogueVersion(
+    await fetch(`${API_BASE}${path}`, {
+      ...options,
+      headers,
+    })
+  )
 
   if (!response.ok) {
     const errorText = await response.text()
@@ -72,6 +95,10 @@ export const api = {
     return request<Play[]>(`/api/plays${query ? `?${query}` : ''}`)
   },
   getPlay: (id: string) => request<PlayDetail>(`/api/plays/${id}`),
+  searchScripts: (q: string, limit = 20) =>
+    request<ScriptSearchResult[]>(
+      `/api/search/scripts?${new URLSearchParams({ q, limit: String(limit) })}`
+    ),
   getLibrary: (filters?: { search?: string; authorId?: string; playId?: number }) => {
     const params = new URLSearchParams()
     if (filters?.search) params.set('search', filters.search)
@@ -137,7 +164,7 @@ export const api = {
   uploadLiteraryPiecePdf: (id: number, file: File, token: string) => {
     const data = new FormData()
     data.append('file', file)
-    return fetch(`${API_BASE}/api/admin/library/${id}/upload-pdf`, {
+    return adminFetch(`${API_BASE}/api/admin/library/${id}/upload-pdf`, {
       method: 'POST',
       headers: token ? { Authorization: `Bearer ${token}` } : undefined,
       body: data,
@@ -154,7 +181,7 @@ export const api = {
   uploadAuthorPhoto: (id: number, file: File, token: string) => {
     const data = new FormData()
     data.append('file', file)
-    return fetch(`${API_BASE}/api/admin/authors/${id}/upload-photo`, {
+    return adminFetch(`${API_BASE}/api/admin/authors/${id}/upload-photo`, {
       method: 'POST',
       headers: token ? { Authorization: `Bearer ${token}` } : undefined,
       body: data,
@@ -168,7 +195,7 @@ export const api = {
   uploadPlayPdf: (id: number, file: File, token: string) => {
     const data = new FormData()
     data.append('file', file)
-    return fetch(`${API_BASE}/api/admin/plays/${id}/upload-pdf`, {
+    return adminFetch(`${API_BASE}/api/admin/plays/${id}/upload-pdf`, {
       method: 'POST',
       headers: token ? { Authorization: `Bearer ${token}` } : undefined,
       body: data,
@@ -189,7 +216,7 @@ export const api = {
     data.append('file', file)
     if (captions?.caption_bg) data.append('caption_bg', captions.caption_bg)
     if (captions?.caption_en) data.append('caption_en', captions.caption_en)
-    return fetch(`${API_BASE}/api/admin/plays/${id}/upload-image`, {
+    return adminFetch(`${API_BASE}/api/admin/plays/${id}/upload-image`, {
       method: 'POST',
       headers: token ? { Authorization: `Bearer ${token}` } : undefined,
       body: data,
@@ -213,7 +240,7 @@ export const api = {
     data.append('file', file)
     if (captions?.caption_bg) data.append('caption_bg', captions.caption_bg)
     if (captions?.caption_en) data.append('caption_en', captions.caption_en)
-    return fetch(`${API_BASE}/api/admin/plays/${id}/upload-file`, {
+    return adminFetch(`${API_BASE}/api/admin/plays/${id}/upload-file`, {
       method: 'POST',
       headers: token ? { Authorization: `Bearer ${token}` } : undefined,
       body: data,
@@ -225,6 +252,36 @@ export const api = {
       return res.json() as Promise<PlayDetail>
     })
   },
+  uploadPlayGallery: (
+    id: number,
+    kind: 'images' | 'files',
+    items: { file: File; caption_bg?: string; caption_en?: string }[],
+    token: string
+  ) => {
+    const data = new FormData()
+    for (const item of items) {
+      data.append('files', item.file)
+      data.append('captions_bg', item.caption_bg ?? '')
+      data.append('captions_en', item.caption_en ?? '')
+    }
+    return adminFetch(`${API_BASE}/api/admin/plays/${id}/upload-${kind}`, {
+      method: 'POST',
+      headers: token ? { Authorization: `Bearer ${token}` } : undefined,
+      body: data,
+    }).then(async (res) => {
+      if (!res.ok) {
+        const text = await res.text()
+        throw new Error(text || 'Качването на файловете е неуспешно.')
+      }
+      const result = (await res.json()) as PlayBatchUploadResult
+      if (result.failures.length) {
+        throw new Error(
+          result.failures.map((f) => `${f.filename ?? ''}: ${f.detail}`).join('\n')
+        )
+      }
+      return result.play
+    })
+  },
   deletePlayFile: (playId: number, fileId: number, token: string) =>
     request<void>(`/api/admin/plays/${playId}/files/${fileId}`, { method: 'DELETE' }, token),
   updatePlayFileCaption: (
@@ -4,13 +4,22 @@ export type Author = {
   biography_bg: string
   biography_en?: string | null
   photo_url?: string | null
+  photo_variants?: ImageVariant[]
   created_at: string
   updated_at: string
 }
 
+export type ImageVariant = {
+  name: string
+  width: number
+  format: string
+  url: string
+}
+
 export type PlayImage = {
   id: number
   image_url: string
+  variants?: ImageVariant[]
   caption_bg?: string | null
   caption_en?: string | null
 }
@@ -53,16 +62,57 @@ export function getLocalized(
   return (wantEn ? en : bg) ?? ''
 }
 
+/** Build an <img srcset> from stored variants of one format (WebP by default). */
+export function variantSrcSet(
+  variants: ImageVariant[] | null | undefined,
+  resolveUrl: (url: string) => string,
+  format = 'webp'
+): string | undefined {
+  const matching = (variants ?? []).filter((v) => v.format === format)
+  if (!matching.length) return undefined
+  return matching.map((v) => `${resolveUrl(v.url)} ${v.width}w`).join(', ')
+}
+
 export type AuthorDetail = Author & {
   plays: Play[]
 }
 
-export type PlayDetail = Play & {
+/** Page count, size and first-page preview of an uploaded PDF. */
+export type PdfDetails = {
+  pdf_page_count?: number | null
+  pdf_size?: number | null
+  pdf_preview_url?: string | null
+}
+
+export type PlayDetail = Play & PdfDetails & {
   images: PlayImage[]
   files: PlayFile[]
 }
 
-export type LiteraryPiece = {
+export type ScriptMatch = {
+  source: 'script' | 'file' | 'library'
+  source_id: number
+  page: number
+  /** HTML-escaped text with matched words wrapped in <mark>. */
+  snippet: string
+}
+
+export type ScriptSearchResult = {
+  play: Play
+  matches: ScriptMatch[]
+}
+
+export type UploadFailure = {
+  filename?: string | null
+  detail: string
+}
+
+export type PlayBatchUploadResult = {
+  play: PlayDetail
+  failures: UploadFailure[]
+}
+
+export type LiteraryPiece = PdfDetails & {
   id: number
   title_bg: string
   title_en?: string | null